@@ -1,207 +1,145 @@
 """The FoxESS Cloud integration."""
-import asyncio
 import logging
-from datetime import timedelta, datetime
-import time # Added for coordinator update logic
+from datetime import timedelta
 
-import async_timeout
-from homeassistant.config_entries import ConfigEntry
-from homeassistant.core import HomeAssistant
+import voluptuous as vol
+
+from homeassistant.config_entries import ConfigEntry, ConfigEntryState
+from homeassistant.const import EVENT_HOMEASSISTANT_STOP
+from homeassistant.core import Event, HomeAssistant, ServiceCall, ServiceResponse, SupportsResponse, callback
+from homeassistant.exceptions import HomeAssistantError
+from homeassistant.helpers import config_validation as cv, device_registry as dr, entity_registry as er
 from homeassistant.helpers.aiohttp_client import async_get_clientsession
-from homeassistant.helpers.device_registry import DeviceInfo
-from homeassistant.helpers.update_coordinator import DataUpdateCoordinator, UpdateFailed # Added
-# Removed duplicate import
+from homeassistant.helpers.dispatcher import async_dispatcher_send
+from homeassistant.helpers.event import async_call_later, async_track_time_interval
+from homeassistant.helpers.storage import Store
+from homeassistant.helpers.typing import UNDEFINED
+from homeassistant.util import dt as dt_util
 
-from .api import FoxEssApiClient, FoxEssApiException, FoxEssApiAuthError, FoxEssApiTimeoutError, FoxEssApiResponseError, DEFAULT_TIMEOUT
+from .api import CallBudget, DAILY_CALL_BUDGET, FoxEssApiClient
 from .const import (
     API_CLIENT,
+    ATTR_CYCLES,
+    ATTR_DEVICE_SN,
+    ATTR_DURATION,
+    ATTR_END,
+    ATTR_ENTRY_ID,
+    ATTR_START,
+    ATTR_VARIABLES,
+    CACHE_STORAGE_VERSION,
     CONF_API_KEY,
     CONF_DEVICE_SN,
-    CONF_EXTPV, # Added CONF_EXTPV import
+    CONF_DEVICES,
     COORDINATOR,
+    DATA_LOCAL_API_VIEWS,
+    DATA_METRICS_VIEW,
     DEVICE_INFO_DATA,
     DOMAIN,
+    ENDPOINT_PROBE_INTERVAL_MINUTES,
     PLATFORMS,
-    SCAN_INTERVAL_MINUTES,
+    SERVICE_ARCHIVE_QUERY,
+    SERVICE_PROFILE,
+    SERVICE_RECORD,
+    SNAPSHOT_STREAM,
+    SIGNAL_OPTIONS_UPDATED,
+    STRING_ANALYSIS_INTERVAL_MINUTES,
 )
-
-# Constants for coordinator update logic (adapted from old sensor.py)
-RETRY_NEXT_SLOT = -1
+from .config_flow import hub_title, hub_unique_id
+from .coordinator import FoxEssDataUpdateCoordinator
+from .local_api import LOCAL_API_VIEWS
+from .metrics import FoxEssMetricsView, async_track_metrics
+from .profiler import CycleProfiler
+from .replay import ApiRecorder
+from .websocket import SnapshotStream, async_setup_websocket
 
 _LOGGER = logging.getLogger(__name__)
-SCAN_INTERVAL = timedelta(minutes=SCAN_INTERVAL_MINUTES)
 
-# Define intervals for less frequent updates
-DEVICE_DETAIL_INTERVAL = timedelta(minutes=15)
-BATTERY_SETTINGS_INTERVAL = timedelta(minutes=60)
-REPORT_INTERVAL = timedelta(minutes=60)
+PROFILE_SCHEMA = vol.Schema(
+    {
+        vol.Optional(ATTR_CYCLES, default=3): vol.All(vol.Coerce(int), vol.Range(min=1, max=100)),
+        vol.Optional(ATTR_ENTRY_ID): cv.string,
+    }
+)
+RECORD_SCHEMA = vol.Schema(
+    {
+        vol.Optional(ATTR_DURATION, default=1440): vol.All(vol.Coerce(int), vol.Range(min=1, max=10080)),
+        vol.Optional(ATTR_ENTRY_ID): cv.string,
+    }
+)
+ARCHIVE_QUERY_SCHEMA = vol.Schema(
+    {
+        vol.Required(ATTR_DEVICE_SN): cv.string,
+        vol.Required(ATTR_VARIABLES): vol.All(cv.ensure_list, [cv.string]),
+        vol.Required(ATTR_START): cv.datetime,
+        vol.Optional(ATTR_END): cv.datetime, # Now if omitted
+    }
+)
 
 
 async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
-    """Set up FoxESS Cloud from a config entry."""
+    """Set up FoxESS Cloud from a config entry.
+
+    One entry covers every selected inverter of an API key, sharing a single
+    client, call budget and coordinator. With a cached device identity no cloud
+    I/O happens here: entities are built from the cached snapshot and the first
+    refresh runs in the background. Without one, the first refresh is awaited
+    and a failure raises ConfigEntryNotReady, which Home Assistant retries with
+    exponential backoff.
+    """
     hass.data.setdefault(DOMAIN, {})
 
     api_key = entry.data[CONF_API_KEY]
-    device_sn = entry.data[CONF_DEVICE_SN]
+    device_sns = list(entry.data[CONF_DEVICES])
 
     session = async_get_clientsession(hass)
-    api_client = FoxEssApiClient(session, api_key, device_sn)
-
-    # Fetch initial device info for registration
-    try:
-        async with async_timeout.timeout(30): # Shorter timeout for initial setup
-             device_info_data = await api_client.get_device_detail()
-    except (FoxEssApiException, asyncio.TimeoutError) as err:
-        _LOGGER.error("Could not connect to FoxESS API during setup for %s: %s", device_sn, err)
-        # Optionally: raise ConfigEntryNotReady(f"Could not connect: {err}")
-        return False # Abort setup if initial connection fails
-
-    # Store device info data for entities
-    # Store api_client and device info for other platforms (like sensor) to access
+    # The daily call allowance scales with the number of inverters on the key
+    budget = CallBudget(DAILY_CALL_BUDGET * len(device_sns))
+    api_client = FoxEssApiClient(session, api_key, budget=budget)
+
+    # Store api_client and device info (per deviceSN) for other platforms (like sensor) to access
     hass.data[DOMAIN][entry.entry_id] = {
         API_CLIENT: api_client,
-        DEVICE_INFO_DATA: device_info_data,
-        # COORDINATOR will likely be added by sensor.py when it sets up the coordinator
+        DEVICE_INFO_DATA: {},
     }
 
-    # Device registry creation moved after coordinator setup and refresh
-
-    # --- Coordinator Setup ---
-    async def _async_update_data():
-        """Fetch data from API endpoint.
-
-        This is the place to fetch data from your API service. Be sure to catch all errors
-        and exceptions that may occur during data retrieval. Return the processed data.
-        """
-        data = {
-            "raw": {},
-            "battery": {},
-            "report": {},
-            "report_daily": {},
-            "device_detail": hass.data[DOMAIN][entry.entry_id].get(DEVICE_INFO_DATA, {}), # Start with initial data
-            "online": False, # Assume offline until successful raw data fetch
-            "last_update_raw": None,
-            "last_update_detail": hass.data[DOMAIN][entry.entry_id].get("last_update_detail"),
-            "last_update_battery": hass.data[DOMAIN][entry.entry_id].get("last_update_battery"),
-            "last_update_report": hass.data[DOMAIN][entry.entry_id].get("last_update_report"),
-        }
-        # Use local time for report index calculation, consistent with old code
-        now_local = datetime.now()
-        current_time = datetime.utcnow() # Keep using UTC for interval comparisons
+    # Cancel in-flight requests immediately on HA shutdown; async_unload_entry does it on unload.
+    # Not an on-unload callback, as those also run when unloading fails and the entry stays loaded
+    @callback
+    def _async_close_client(_: Event) -> None:
+        api_client.close()
+
+    entry.async_on_unload(hass.bus.async_listen_once(EVENT_HOMEASSISTANT_STOP, _async_close_client))
+
+    coordinator = FoxEssDataUpdateCoordinator(hass, entry, api_client, budget)
+    hass.data[DOMAIN][entry.entry_id][COORDINATOR] = coordinator
+
+    # With several base URLs configured, the first refresh goes to the fastest healthy one
+    # (probes cost no API calls)
+    async def _async_probe_endpoints(*_) -> None:
+        await api_client.async_probe_endpoints()
+
+    if await coordinator.async_load_cache():
+        async def _async_first_refresh() -> None:
+            await _async_probe_endpoints()
+            await coordinator.async_refresh()
+
+        entry.async_create_background_task(hass, _async_first_refresh(), f"{DOMAIN}_{entry.entry_id}_first_refresh")
+    else:
+        _LOGGER.debug("No cached identity for %s, fetching it before setup", ", ".join(device_sns))
         try:
-            # Get extendPV option
-            extend_pv = entry.options.get(CONF_EXTPV, False)
-
-            # --- Fetch Raw Data (Every Update) ---
-            async with async_timeout.timeout(DEFAULT_TIMEOUT - 5): # Slightly less than total timeout
-                # Pass extend_pv option to get_raw_data
-                raw_data_result = await api_client.get_raw_data(extend_pv=extend_pv)
-                # Assuming get_raw_data returns the processed dictionary directly now
-                data["raw"] = raw_data_result # Store the processed data
-                data["online"] = True # Mark as online if raw data fetch succeeds
-                data["last_update_raw"] = current_time # Use consistent time variable
-                _LOGGER.debug("Successfully fetched raw data for %s", device_sn)
-
-            # --- Fetch Device Detail (Periodically) ---
-            last_detail_update = data["last_update_detail"]
-            if last_detail_update is None or (current_time - last_detail_update > DEVICE_DETAIL_INTERVAL):
-                 async with async_timeout.timeout(DEFAULT_TIMEOUT - 5):
-                     device_detail = await api_client.get_device_detail()
-                     data["device_detail"] = device_detail
-                     hass.data[DOMAIN][entry.entry_id][DEVICE_INFO_DATA] = device_detail # Update stored info
-                     data["last_update_detail"] = current_time
-                     hass.data[DOMAIN][entry.entry_id]["last_update_detail"] = current_time
-                     _LOGGER.debug("Successfully fetched device detail for %s", device_sn)
-
-            # --- Fetch Battery Settings (Periodically) ---
-            # Only fetch if device detail indicates a battery exists
-            has_battery = bool(data["device_detail"].get("hasBattery")) # Check if key exists and is truthy
-            last_battery_update = data["last_update_battery"]
-            if has_battery and (last_battery_update is None or (current_time - last_battery_update > BATTERY_SETTINGS_INTERVAL)):
-                 async with async_timeout.timeout(DEFAULT_TIMEOUT - 5):
-                     battery_settings = await api_client.get_battery_settings()
-                     data["battery"] = battery_settings
-                     data["last_update_battery"] = current_time
-                     hass.data[DOMAIN][entry.entry_id]["last_update_battery"] = current_time
-                     _LOGGER.debug("Successfully fetched battery settings for %s", device_sn)
-
-            # --- Fetch Reports (Periodically) ---
-            last_report_update = data["last_update_report"]
-            if last_report_update is None or (current_time - last_report_update > REPORT_INTERVAL):
-                 async with async_timeout.timeout(DEFAULT_TIMEOUT - 5):
-                     report_result = await api_client.get_report()
-                     # Process the report to extract today's values (matches old code logic)
-                     processed_report = {}
-                     today_index = now_local.day - 1 # 0-based index for today
-                     for item in report_result:
-                         variable = item.get("variable")
-                         values = item.get("values")
-                         if variable and values and isinstance(values, list) and len(values) > today_index:
-                             today_value = values[today_index]
-                             processed_report[variable] = round(today_value, 3) if today_value is not None else 0
-                         else:
-                             processed_report[variable] = 0 # Default if data missing
-                     data["report"] = processed_report # Store processed data for today
-                     # daily_gen_data = await api_client.get_report_daily_generation() # Keep commented for now
-                     # data["report_daily"] = daily_gen_data
-                     data["last_update_report"] = current_time
-                     hass.data[DOMAIN][entry.entry_id]["last_update_report"] = current_time
-                     _LOGGER.debug("Successfully fetched and processed report data for %s", device_sn)
-
-            _LOGGER.debug("Coordinator update successful for %s. Online: %s", device_sn, data["online"])
-            return data
-
-        except FoxEssApiAuthError as err:
-            # Raising ConfigEntryAuthFailed will cancel future updates
-            # and start a reauth flow.
-            _LOGGER.error("Authentication error connecting to FoxESS API for %s: %s", device_sn, err)
-            # Re-authentication might involve updating the API key via UI flow
-            # For now, just log and fail update. Re-auth flow needs config_flow changes.
-            # raise ConfigEntryAuthFailed from err
-            raise UpdateFailed(f"Authentication error: {err}") from err
-        except FoxEssApiTimeoutError as err:
-            _LOGGER.warning("Timeout connecting to FoxESS API for %s: %s", device_sn, err)
-            raise UpdateFailed(f"Timeout error: {err}") from err
-        except FoxEssApiResponseError as err:
-            _LOGGER.warning("Invalid response from FoxESS API for %s: %s", device_sn, err)
-            raise UpdateFailed(f"Invalid response error: {err}") from err
-        except FoxEssApiException as err:
-            _LOGGER.error("Unknown API error connecting to FoxESS API for %s: %s", device_sn, err)
-            raise UpdateFailed(f"Unknown API error: {err}") from err
-        except asyncio.TimeoutError as err:
-             _LOGGER.warning("Coordinator update timed out for %s: %s", device_sn, err)
-             raise UpdateFailed(f"Coordinator update timed out: {err}") from err
-
-
-    coordinator = DataUpdateCoordinator(
-        hass,
-        _LOGGER,
-        name=f"{DOMAIN}_{device_sn}",
-        update_method=_async_update_data,
-        update_interval=SCAN_INTERVAL,
+            await _async_probe_endpoints()
+            await coordinator.async_config_entry_first_refresh()
+        except Exception:
+            hass.data[DOMAIN].pop(entry.entry_id)
+            raise
+    entry.async_on_unload(
+        async_track_time_interval(hass, _async_probe_endpoints, timedelta(minutes=ENDPOINT_PROBE_INTERVAL_MINUTES))
     )
 
-    # Store coordinator and API client
-    hass.data[DOMAIN][entry.entry_id].update({
-        COORDINATOR: coordinator,
-        API_CLIENT: api_client,
-    })
-
-    # --- Initial Refresh ---
-    await coordinator.async_config_entry_first_refresh()
-    # --- Create Device Registry Entry (Moved Here) ---
-    device_registry = hass.helpers.device_registry.async_get()
-    device_registry.async_get_or_create(
-        config_entry_id=entry.entry_id,
-        identifiers={(DOMAIN, device_sn)},
-        name=device_info_data.get("plantName", f"FoxESS {device_sn}"), # Use plantName if available
-        manufacturer="FoxESS",
-        model=device_info_data.get("deviceType", "Unknown"),
-        sw_version=f"Master: {device_info_data.get('masterVersion', 'N/A')}, "
-                   f"Slave: {device_info_data.get('slaveVersion', 'N/A')}, "
-                   f"Manager: {device_info_data.get('managerVersion', 'N/A')}",
-        # hw_version can be added if available from API
-    )
+    # One device per inverter under this entry
+    device_registry = dr.async_get(hass)
+    for device_sn in device_sns:
+        device_registry.async_get_or_create(config_entry_id=entry.entry_id, **coordinator.device_info(device_sn))
 
     # --- Forward Setup to Platforms ---
     await hass.config_entries.async_forward_entry_setups(entry, PLATFORMS)
@@ -209,20 +147,230 @@ async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
     # Add listener for options updates
     entry.async_on_unload(entry.add_update_listener(update_listener))
 
+    _async_register_services(hass)
+
+    # Prometheus metrics, rendered on the first scrape after an update and served to all entries by one view
+    entry.async_on_unload(async_track_metrics(hass, coordinator))
+    if hass.http is not None and not hass.data.get(DATA_METRICS_VIEW):
+        hass.http.register_view(FoxEssMetricsView())
+        hass.data[DATA_METRICS_VIEW] = True
+
+    # OpenAPI look-alike endpoints; they only answer for entries with the option enabled
+    if hass.http is not None and not hass.data.get(DATA_LOCAL_API_VIEWS):
+        for view in LOCAL_API_VIEWS:
+            hass.http.register_view(view())
+        hass.data[DATA_LOCAL_API_VIEWS] = True
+
+    # PV string health from the archive, when it's enabled; the analysis runs in the executor
+    entry.async_create_background_task(hass, coordinator.async_analyze_strings(), f"{DOMAIN}_{entry.entry_id}_strings")
+    entry.async_on_unload(
+        async_track_time_interval(
+            hass, coordinator.async_analyze_strings, timedelta(minutes=STRING_ANALYSIS_INTERVAL_MINUTES)
+        )
+    )
+
+    # Snapshot deltas for foxess/subscribe
+    stream = hass.data[DOMAIN][entry.entry_id][SNAPSHOT_STREAM] = SnapshotStream(coordinator)
+    entry.async_on_unload(stream.async_close)
+    async_setup_websocket(hass)
+
     return True
 
 
+@callback
+def _async_register_services(hass: HomeAssistant) -> None:
+    """Register the integration's services, once for all entries."""
+    if hass.services.has_service(DOMAIN, SERVICE_PROFILE):
+        return
+
+    def _coordinators(call: ServiceCall) -> list[FoxEssDataUpdateCoordinator]:
+        """Return the coordinators of the targeted entry, or of all loaded entries."""
+        entry_id = call.data.get(ATTR_ENTRY_ID)
+        coordinators = [
+            entry_data[COORDINATOR]
+            for loaded_entry_id, entry_data in hass.data.get(DOMAIN, {}).items()
+            if entry_id in (None, loaded_entry_id)
+        ]
+        if not coordinators:
+            raise HomeAssistantError(f"No loaded FoxESS Cloud entry {entry_id or ''}".strip())
+        return coordinators
+
+    async def _async_handle_profile(call: ServiceCall) -> None:
+        """Profile the next update cycles of one or all loaded entries."""
+        coordinators = _coordinators(call)
+        for coordinator in coordinators:
+            if coordinator.profiler is not None:
+                raise HomeAssistantError(f"{coordinator.entry.title} is already being profiled")
+        for coordinator in coordinators:
+            CycleProfiler(hass, coordinator, call.data[ATTR_CYCLES]).start()
+
+    async def _async_handle_record(call: ServiceCall) -> None:
+        """Record the API traffic of one or all loaded entries for a while."""
+        coordinators = _coordinators(call)
+        for coordinator in coordinators:
+            if coordinator.api_client.recorder is not None:
+                raise HomeAssistantError(f"{coordinator.entry.title} is already being recorded")
+        stamp = dt_util.now().strftime("%Y%m%d_%H%M%S")
+        for coordinator in coordinators:
+            entry = coordinator.entry
+            api_client = coordinator.api_client
+            path = hass.config.path(f"foxess_record_{entry.entry_id}_{stamp}.jsonl.gz")
+            api_client.recorder = ApiRecorder(path, executor=hass.async_add_executor_job)
+            _LOGGER.info("Recording API traffic of %s to %s for %d minutes", entry.title, path, call.data[ATTR_DURATION])
+
+            @callback
+            def _async_stop(_now, api_client: FoxEssApiClient = api_client) -> None:
+                _async_stop_recording(api_client)
+
+            # Cancelled on unload, where the recording is stopped anyway
+            entry.async_on_unload(async_call_later(hass, call.data[ATTR_DURATION] * 60, _async_stop))
+
+    async def _async_handle_archive_query(call: ServiceCall) -> ServiceResponse:
+        """Aggregate an inverter's archived samples over a time range."""
+        device_sn = call.data[ATTR_DEVICE_SN]
+        coordinator = next(
+            (
+                entry_data[COORDINATOR]
+                for entry_data in hass.data.get(DOMAIN, {}).values()
+                if device_sn in entry_data[COORDINATOR].devices
+            ),
+            None,
+        )
+        if coordinator is None:
+            raise HomeAssistantError(f"No loaded FoxESS Cloud inverter {device_sn}")
+        if coordinator.archive is None:
+            raise HomeAssistantError(f"The archive isn't enabled in the options of {coordinator.entry.title}")
+        # Times without a zone are local
+        start = dt_util.as_utc(call.data[ATTR_START])
+        end = dt_util.as_utc(call.data.get(ATTR_END) or dt_util.utcnow())
+        if end < start:
+            raise HomeAssistantError("The end of the range is before its start")
+        variables = await hass.async_add_executor_job(
+            coordinator.archive.query, device_sn, call.data[ATTR_VARIABLES], start, end
+        )
+        return {"device_sn": device_sn, "start": start.isoformat(), "end": end.isoformat(), "variables": variables}
+
+    hass.services.async_register(DOMAIN, SERVICE_PROFILE, _async_handle_profile, schema=PROFILE_SCHEMA)
+    hass.services.async_register(DOMAIN, SERVICE_RECORD, _async_handle_record, schema=RECORD_SCHEMA)
+    hass.services.async_register(
+        DOMAIN,
+        SERVICE_ARCHIVE_QUERY,
+        _async_handle_archive_query,
+        schema=ARCHIVE_QUERY_SCHEMA,
+        supports_response=SupportsResponse.ONLY,
+    )
+
+
+@callback
+def _async_stop_recording(api_client: FoxEssApiClient) -> None:
+    """Detach a client's recorder and write what it still buffers."""
+    if (recorder := api_client.recorder) is not None:
+        api_client.recorder = None
+        recorder.flush()
+        _LOGGER.info("Recorded %d API responses to %s", recorder.records, recorder.path)
+
+
+async def async_migrate_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
+    """Migrate per-inverter entries (version 1) to one hub entry per API key (version 2).
+
+    The calls allowance is per API key, so entries sharing a key are folded into
+    one hub: the first one migrated (or a hub already there) takes every
+    inverter of the key, with their devices and entities, and the others remove
+    themselves. Each inverter keeps its old entry's unique ID as its entity
+    unique ID base, so entity IDs and history carry over. Hubs get the unique
+    ID new ones get from the config flow.
+    """
+    if entry.version != 1:
+        return True
+
+    api_key = entry.data[CONF_API_KEY]
+    group = [
+        other
+        for other in hass.config_entries.async_entries(DOMAIN, include_ignore=False)
+        if other.data.get(CONF_API_KEY) == api_key
+    ]
+    hub = next((other for other in group if other.version == 2), group[0])
+    # The hub takes every inverter of the key at once, before any of them is set up
+    devices = {device_sn: base for other in group for device_sn, base in _hub_devices(other).items()}
+    added = devices.keys() - _hub_devices(hub).keys()
+    _async_update_hub(hass, hub, devices)
+    if hub is entry:
+        _LOGGER.debug("Migrated config entry for %s to version 2", ", ".join(devices))
+        return True
+
+    # Hand this entry's entities and devices to the hub and drop it; its setup stops here
+    entity_registry = er.async_get(hass)
+    for entity in er.async_entries_for_config_entry(entity_registry, entry.entry_id):
+        entity_registry.async_update_entity(entity.entity_id, config_entry_id=hub.entry_id)
+    device_registry = dr.async_get(hass)
+    for device in dr.async_entries_for_config_entry(device_registry, entry.entry_id):
+        device_registry.async_update_device(
+            device.id, add_config_entry_id=hub.entry_id, remove_config_entry_id=entry.entry_id
+        )
+    if added and hub.state is ConfigEntryState.LOADED:
+        hass.config_entries.async_schedule_reload(hub.entry_id)
+    hass.async_create_task(hass.config_entries.async_remove(entry.entry_id), f"{DOMAIN} remove merged entry")
+    _LOGGER.info("Merged the FoxESS Cloud entry of %s into %s, which uses the same API key", entry.title, hub.title)
+    return False
+
+
+def _hub_devices(entry: ConfigEntry) -> dict[str, str]:
+    """Return an entry's inverters (deviceSN -> entity unique ID base), version 1 or 2."""
+    if entry.version == 1:
+        return {entry.data[CONF_DEVICE_SN]: entry.unique_id or entry.data[CONF_DEVICE_SN]}
+    return dict(entry.data[CONF_DEVICES])
+
+
+@callback
+def _async_update_hub(hass: HomeAssistant, hub: ConfigEntry, devices: dict[str, str]) -> None:
+    """Make an entry the version 2 hub of its API key with these inverters."""
+    api_key = hub.data[CONF_API_KEY]
+    hass.config_entries.async_update_entry(
+        hub,
+        data={CONF_API_KEY: api_key, CONF_DEVICES: devices},
+        title=hub_title(list(devices)) if len(devices) > 1 else UNDEFINED,
+        unique_id=hub_unique_id(api_key),
+        version=2,
+    )
+
+
 async def update_listener(hass: HomeAssistant, entry: ConfigEntry) -> None:
-    """Handle options update."""
+    """Handle options update.
+
+    Intervals and the variable set apply to the running coordinator, and the
+    sensor platform adds or removes entities to match; nothing is reloaded.
+    """
     _LOGGER.debug("Options updated: %s", entry.options)
-    # Reload the integration to apply changes
-    await hass.config_entries.async_reload(entry.entry_id)
+    coordinator = hass.data[DOMAIN][entry.entry_id][COORDINATOR]
+    coordinator.apply_options()
+    await coordinator.api_client.async_probe_endpoints() # The candidates may have changed
+    async_dispatcher_send(hass, SIGNAL_OPTIONS_UPDATED.format(entry.entry_id))
 
 
 async def async_unload_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
-    """Unload a config entry."""
+    """Unload a config entry.
+
+    The client is closed only once the platforms are unloaded: if that fails,
+    the entry stays loaded and its updates must keep working.
+    """
     unload_ok = await hass.config_entries.async_unload_platforms(entry, PLATFORMS)
     if unload_ok:
+        # Cancel a slow cloud call in flight rather than waiting for it
+        hass.data[DOMAIN][entry.entry_id][API_CLIENT].close()
+        coordinator = hass.data[DOMAIN][entry.entry_id][COORDINATOR]
+        if coordinator.profiler is not None:
+            coordinator.profiler.cancel()
+        _async_stop_recording(coordinator.api_client)
+
         hass.data[DOMAIN].pop(entry.entry_id)
+        if not hass.data[DOMAIN]:
+            hass.services.async_remove(DOMAIN, SERVICE_PROFILE)
+            hass.services.async_remove(DOMAIN, SERVICE_RECORD)
+            hass.services.async_remove(DOMAIN, SERVICE_ARCHIVE_QUERY)
+
+    return unload_ok
+
 
-    return unload_ok
\ No newline at end of file
+async def async_remove_entry(hass: HomeAssistant, entry: ConfigEntry) -> None:
+    """Remove the persisted cache when a config entry is deleted."""
+    await Store(hass, CACHE_STORAGE_VERSION, f"{DOMAIN}.{entry.entry_id}").async_remove()
@@ -5,17 +5,22 @@ import json
 import logging
 import time
 # import secrets # Removed nonce generation
-from datetime import datetime
+from datetime import date, datetime
+from email.utils import parsedate_to_datetime
+from typing import Any
 
 import aiohttp
 
 # API Endpoints
-_ENDPOINT_OA_DOMAIN = "https://www.foxesscloud.com"
+DEFAULT_BASE_URL = "https://www.foxesscloud.com" # Overridable in the options, e.g. for a proxy or stand-in
 _ENDPOINT_OA_BATTERY_SETTINGS = "/op/v0/device/battery/soc/get" # Removed ?sn=
+_ENDPOINT_OA_BATTERY_SETTINGS_SET = "/op/v0/device/battery/soc/set"
 _ENDPOINT_OA_REPORT = "/op/v0/device/report/query"
 _ENDPOINT_OA_DEVICE_DETAIL = "/op/v0/device/detail" # Path for URL and signature (matches old code)
 _ENDPOINT_OA_DEVICE_VARIABLES = "/op/v0/device/real/query"
 _ENDPOINT_OA_DAILY_GENERATION = "/op/v0/device/generation" # Removed ?sn=
+_ENDPOINT_OA_DEVICE_LIST = "/op/v0/device/list"
+_ENDPOINT_OA_DEVICE_VARIABLES_BATCH = "/op/v1/device/real/query" # Takes a list of serial numbers
 
 # Constants
 METHOD_POST = "POST"
@@ -23,7 +28,45 @@ METHOD_GET = "GET"
 DEFAULT_ENCODING = "UTF-8"
 # Using a fixed user agent for now, random one can be added if needed
 USER_AGENT = "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/117.0.0.0 Safari/537.36" # Match old code example
-DEFAULT_TIMEOUT = 75  # API can be slow
+DEFAULT_TIMEOUT = 75  # API can be slow; upper bound until latency is known
+MIN_TIMEOUT = 10  # Floor for adaptive timeouts, in seconds
+MIN_HEDGE_DELAY = 1.0  # Never hedge a request sooner than this, in seconds
+HEDGE_MIN_SAMPLES = 5  # Latency samples needed before hedging is trusted
+DAILY_CALL_BUDGET = 1440  # FoxESS OpenAPI allowance per inverter per day
+HEDGE_BUDGET_RESERVE = 60  # Calls kept back from hedging near the daily limit
+DEVICE_LIST_PAGE_SIZE = 100
+PATH_MIN_INTERVAL = 1.0  # Seconds between calls to one path; the cloud answers faster ones with errno 40400
+REAL_QUERY_MAX_SNS = 50  # Serial numbers accepted per batch real-time query
+PROBE_TIMEOUT = 10  # Seconds a base URL candidate gets to answer a probe
+# "Request header parameters are missing": the cloud doesn't count a timestamp outside
+# its window as present, so a clock that is off gets this rather than a timestamp error
+CLOCK_ERRNOS = frozenset({40256})
+CLOCK_OFFSET_MIN = 1.0  # Seconds; smaller offsets are within the Date header's resolution and not corrected
+CLOCK_OFFSET_STEP = 5.0  # Seconds; a sample this far from the estimate means a clock jumped, and replaces it
+CLOCK_OFFSET_ALPHA = 0.25  # Weight of a new sample in the smoothed offset
+# Energy report variables; generation comes from the much smaller generation endpoint instead
+REPORT_VARIABLES = ("feedin", "gridConsumption", "chargeEnergyToTal", "dischargeEnergyToTal", "loads")
+
+# Real-time variables queried by default (based on original code's usage)
+DEFAULT_VARIABLES = (
+    "ambientTemperation", "batChargePower", "batCurrent", "batDischargePower",
+    "batTemperature", "batVolt", "boostTemperation", "chargeTemperature",
+    "dcdcStatus", "dspStatus", "ECharge", "EChargeTotal", "EDischarge",
+    "EDischargeTotal", "EGeneration", "EGenerationTotal", "EGridCharge",
+    "EGridChargeTotal", "EGridDischarge", "EGridDischargeTotal", "EInputTotal",
+    "ELoad", "ELoadTotal", "EOutputTotal", "epsCurrentR", "epsCurrentS",
+    "epsCurrentT", "epsPower", "epsPowerR", "epsPowerS", "epsPowerT",
+    "epsVoltR", "epsVoltS", "epsVoltT", "feedinPower", "generationPower",
+    "gridConsumptionPower", "invBatCurrent", "invBatPower", "invBatVolt",
+    "invOutputCurrent", "invOutputPower", "invOutputVolt", "invStatus",
+    "invTemperation", "loadsPower", "meterPower", "meterPower2", "meterStatus",
+    "powerFactor", "pv1Current", "pv1Power", "pv1Volt", "pv2Current",
+    "pv2Power", "pv2Volt", "pv3Current", "pv3Power", "pv3Volt", "pv4Current",
+    "pv4Power", "pv4Volt", "pvPower", "RCurrent", "reactivePower", "RFreq",
+    "RPower", "RVolt", "runningStatus", "SCurrent", "SFreq", "SoC", "SPower",
+    "SVolt", "sysStatus", "TCurrent", "TFreq", "TPower", "TVolt",
+    "currentFault", # Add fault code variable
+)
 
 _LOGGER = logging.getLogger(__name__)
 
@@ -40,21 +83,259 @@ class FoxEssApiTimeoutError(FoxEssApiException):
 class FoxEssApiResponseError(FoxEssApiException):
     """Invalid API response error."""
 
+class FoxEssApiCancelledError(FoxEssApiException):
+    """API request cancelled because the client was closed."""
+
+class FoxEssApiClockError(FoxEssApiResponseError):
+    """API rejected the request timestamp, e.g. because the local clock is off."""
+
+    def __init__(self, message: str, offset_changed: bool = False) -> None:
+        super().__init__(message)
+        self.offset_changed = offset_changed # The rejection moved the clock offset requests are signed with
+
+
+def request_signature(path: str, token: str, timestamp: str) -> str:
+    """Return the signature header of a request, as the cloud checks it."""
+    return FoxEssApiClient._md5c(rf"{path}\r\n{token}\r\n{timestamp}") # Use raw f-string like old code/doc example
+
+
+class EndpointLatency:
+    """Smoothed latency estimate for one endpoint (EWMA of mean and deviation, as in RFC 6298)."""
+
+    ALPHA = 0.125
+    BETA = 0.25
+
+    def __init__(self) -> None:
+        """Initialize with no samples."""
+        self.srtt: float | None = None # Smoothed latency
+        self.rttvar: float | None = None # Smoothed mean deviation
+        self.samples = 0
+        self.timeouts = 0
+        self.response_bytes: float | None = None # Smoothed response size
+        self._backoff = 1 # Doubled on each timeout, reset on success
+
+    def record(self, seconds: float) -> None:
+        """Record the latency of a completed request."""
+        if self.srtt is None:
+            self.srtt = seconds
+            self.rttvar = seconds / 2
+        else:
+            self.rttvar = (1 - self.BETA) * self.rttvar + self.BETA * abs(self.srtt - seconds)
+            self.srtt = (1 - self.ALPHA) * self.srtt + self.ALPHA * seconds
+        self.samples += 1
+        self._backoff = 1
+
+    def record_size(self, size: int) -> None:
+        """Record the size of a response body, in bytes."""
+        if self.response_bytes is None:
+            self.response_bytes = float(size)
+        else:
+            self.response_bytes = (1 - self.ALPHA) * self.response_bytes + self.ALPHA * size
+
+    def record_timeout(self) -> None:
+        """Record a timed out request; widens the next timeout."""
+        self.timeouts += 1
+        self._backoff = min(self._backoff * 2, 8)
+
+    @property
+    def timeout(self) -> float:
+        """Return the timeout to use for the next request."""
+        if self.srtt is None:
+            return DEFAULT_TIMEOUT
+        return min(DEFAULT_TIMEOUT, max(MIN_TIMEOUT, self.srtt + 4 * self.rttvar) * self._backoff)
+
+    @property
+    def hedge_delay(self) -> float | None:
+        """Return how long to wait before hedging (roughly p95), or None if unknown."""
+        if self.samples < HEDGE_MIN_SAMPLES:
+            return None
+        return max(MIN_HEDGE_DELAY, self.srtt + 2 * self.rttvar)
+
+    def as_dict(self) -> dict:
+        """Return the estimate as a plain dict (for diagnostics)."""
+        return {
+            "srtt": self.srtt,
+            "rttvar": self.rttvar,
+            "samples": self.samples,
+            "timeouts": self.timeouts,
+            "timeout": self.timeout,
+            "hedge_delay": self.hedge_delay,
+            "response_bytes": self.response_bytes,
+        }
+
+
+class CallBudget:
+    """Counts API calls against a daily allowance (resets at midnight UTC)."""
+
+    def __init__(self, limit: int = DAILY_CALL_BUDGET) -> None:
+        """Initialize the budget."""
+        self.limit = limit
+        self.used = 0
+        self._day = datetime.utcnow().date()
+
+    def _roll(self) -> None:
+        today = datetime.utcnow().date()
+        if today != self._day:
+            self._day = today
+            self.used = 0
+
+    @property
+    def remaining(self) -> int:
+        """Return the number of calls left today."""
+        self._roll()
+        return max(0, self.limit - self.used)
+
+    def consume(self) -> None:
+        """Count one call."""
+        self._roll()
+        self.used += 1
+
 
 class FoxEssApiClient:
     """Handles all communication with the FoxESS Cloud API."""
 
+    # Set to a replay.ApiRecorder to capture every response with its timing
+    recorder = None
+
     def __init__(
         self,
         session: aiohttp.ClientSession,
         api_key: str,
-        device_sn: str,
+        device_sn: str | None = None,
+        budget: CallBudget | None = None,
     ):
-        """Initialize the API client."""
+        """Initialize the API client.
+
+        device_sn is the default inverter for per-device calls; a hub client
+        leaves it unset and passes the serial number on each call.
+        """
         self._session = session
         self._api_key = api_key
         self._device_sn = device_sn
         self._token = api_key # Use API key directly as token for signature
+        self._inflight: set[asyncio.Task] = set() # Requests currently on the wire
+        self._closed = False
+        self.budget = budget or CallBudget()
+        self._latency: dict[str, EndpointLatency] = {}
+        # Loop time before which each path takes no further call, and the lock queueing its calls
+        self._path_ready: dict[str, float] = {}
+        self._path_locks: dict[str, asyncio.Lock] = {}
+        self.hedged_requests = 0
+        # Unit and display name the cloud reports for each real-time variable seen so far
+        self.variable_info: dict[str, dict[str, str]] = {}
+        # Base URL requests go to, chosen among the candidates; see configure_endpoints()
+        self.base_url = DEFAULT_BASE_URL
+        self.proxy: str | None = None
+        self._candidates = [DEFAULT_BASE_URL]
+        self._probes: dict[str, EndpointLatency] = {} # Probe latency per candidate
+        self._unhealthy: set[str] = set() # Candidates whose last probe or request failed
+        # Server clock minus local clock in seconds, from response Date headers; see _track_clock()
+        self.clock_offset: float | None = None
+        self.clock_retries = 0 # Requests signed again after a timestamp rejection
+
+    @property
+    def latency_stats(self) -> dict[str, dict]:
+        """Return latency estimates per endpoint path."""
+        return {path: stats.as_dict() for path, stats in self._latency.items()}
+
+    @property
+    def endpoint_stats(self) -> dict[str, dict]:
+        """Return the probe latency and health of each base URL candidate."""
+        return {
+            url: {
+                **self._probes.get(url, EndpointLatency()).as_dict(),
+                "healthy": url not in self._unhealthy,
+                "active": url == self.base_url,
+            }
+            for url in self._candidates
+        }
+
+    def configure_endpoints(self, base_url: str | None = None, candidates: list[str] | tuple = (), proxy: str | None = None) -> None:
+        """Set the base URL, other candidates to fail over to, and an HTTP proxy.
+
+        The base URL stays in use until a probe finds a faster healthy
+        candidate or a request to it fails. Applying unchanged settings keeps
+        the current choice.
+        """
+        self.proxy = proxy or None
+        urls = [url.strip().rstrip("/") for url in (base_url or DEFAULT_BASE_URL, *candidates) if url and url.strip()]
+        urls = list(dict.fromkeys(urls))
+        if urls != self._candidates:
+            # New settings start from the configured base URL, with what is known of the rest
+            self._candidates = urls
+            self.base_url = urls[0]
+            self._unhealthy &= set(urls)
+
+    async def async_probe_endpoints(self) -> str:
+        """Probe every candidate and switch to the fastest healthy one; returns the base URL in use.
+
+        Probes are unauthenticated HEAD requests, so they don't count against
+        the call budget. With a single candidate there is nothing to choose.
+        """
+        if len(self._candidates) < 2 or self._closed:
+            return self.base_url
+        await asyncio.gather(*(self._probe(url) for url in self._candidates))
+        healthy = [url for url in self._candidates if url not in self._unhealthy]
+        if healthy:
+            fastest = min(healthy, key=lambda url: self._probes[url].srtt)
+            if fastest != self.base_url:
+                _LOGGER.info("Switching FoxESS API base URL from %s to %s", self.base_url, fastest)
+                self.base_url = fastest
+        return self.base_url
+
+    async def _probe(self, url: str) -> None:
+        """Time one request to a candidate; any answer below 500 counts as healthy."""
+        stats = self._probes.setdefault(url, EndpointLatency())
+        started = time.monotonic()
+        try:
+            async with self._session.head(
+                url, proxy=self.proxy, allow_redirects=False, timeout=aiohttp.ClientTimeout(total=PROBE_TIMEOUT)
+            ) as response:
+                healthy = response.status < 500
+        except (asyncio.TimeoutError, aiohttp.ClientError) as err:
+            _LOGGER.debug("Probe of %s failed: %s", url, err)
+            stats.record_timeout()
+            self._unhealthy.add(url)
+            return
+        if healthy:
+            stats.record(time.monotonic() - started)
+            self._unhealthy.discard(url)
+        else:
+            self._unhealthy.add(url)
+
+    def _fail_over(self) -> None:
+        """Mark the base URL unhealthy after a failed request and move to the best other candidate."""
+        if len(self._candidates) < 2:
+            return
+        self._unhealthy.add(self.base_url)
+        others = [url for url in self._candidates if url != self.base_url]
+        # Healthy ones first, then by probed latency (unprobed last); list order breaks ties
+        others.sort(key=lambda url: (
+            url in self._unhealthy,
+            self._probes[url].srtt if url in self._probes and self._probes[url].srtt is not None else float("inf"),
+        ))
+        _LOGGER.warning("FoxESS API at %s failed, failing over to %s", self.base_url, others[0])
+        self.base_url = others[0]
+
+    def _get_latency(self, path: str) -> EndpointLatency:
+        """Return the latency estimate for an endpoint path."""
+        if path not in self._latency:
+            self._latency[path] = EndpointLatency()
+        return self._latency[path]
+
+    @property
+    def closed(self) -> bool:
+        """Return True once the client has been closed."""
+        return self._closed
+
+    def close(self) -> None:
+        """Close the client and cancel any in-flight requests immediately.
+
+        Used on unload and shutdown so a slow cloud call does not hold them up.
+        """
+        self._closed = True
+        for task in self._inflight:
+            task.cancel()
 
     @staticmethod
     def _md5c(text="", _type="lower"):
@@ -64,14 +345,40 @@ class FoxEssApiClient:
             return md5str.upper()
         return md5str
 
+    def _track_clock(self, date_header: str | None, sent: float, received: float) -> bool:
+        """Update the server clock offset from a response's Date header.
+
+        The header has whole seconds, so half a second is added to its time and
+        it is compared with the local time halfway through the request. Returns
+        whether the time requests are signed with moved by CLOCK_OFFSET_MIN or more.
+        """
+        try:
+            server_time = parsedate_to_datetime(date_header).timestamp() + 0.5
+        except (TypeError, ValueError):
+            return False # No or malformed header
+        before = self._server_time()
+        sample = server_time - (sent + received) / 2
+        if self.clock_offset is None or abs(sample - self.clock_offset) >= CLOCK_OFFSET_STEP:
+            if abs(sample) >= CLOCK_OFFSET_STEP:
+                _LOGGER.info("Local clock is %.1fs off the FoxESS server's; signing requests with its time", -sample)
+            self.clock_offset = sample
+        else:
+            self.clock_offset += CLOCK_OFFSET_ALPHA * (sample - self.clock_offset)
+        return abs(self._server_time() - before) >= CLOCK_OFFSET_MIN
+
+    def _server_time(self) -> float:
+        """Return the current time on the server's clock, as far as it is known."""
+        if self.clock_offset is None or abs(self.clock_offset) < CLOCK_OFFSET_MIN:
+            return time.time()
+        return time.time() + self.clock_offset
+
     def _get_signature(self, path: str, lang: str = "en") -> str:
         """Generate the API request signature."""
-        timestamp = str(round(time.time() * 1000))
+        timestamp = str(round(self._server_time() * 1000))
         # Nonce is not used in hash calculation or headers in the working version
         # nonce = secrets.token_hex(16) # Removed nonce generation
         # Hash calculation matches working version (path + token + timestamp)
-        signature_plain = rf"{path}\r\n{self._token}\r\n{timestamp}" # Use raw f-string like old code/doc example
-        signature = self._md5c(signature_plain)
+        signature = request_signature(path, self._token, timestamp)
 
         # Headers match working version EXACTLY (includes token, excludes nonce, excludes Accept, includes Connection: close)
         headers = {
@@ -88,11 +395,100 @@ class FoxEssApiClient:
         return headers
 
     async def _request(self, method: str, path: str, params: dict | None = None, data: dict | None = None) -> dict:
-        """Make an API request."""
-        url = f"{_ENDPOINT_OA_DOMAIN}{path}" # URL for request uses base path
+        """Make an API request that can be cancelled by close()."""
+        if self._closed:
+            raise FoxEssApiCancelledError("API client is closed")
+
+        task = asyncio.ensure_future(self._send(method, path, params, data))
+        self._inflight.add(task)
+        started = time.monotonic()
+        try:
+            result = await task
+        except asyncio.CancelledError as err:
+            # Only translate cancellations caused by close(); propagate our caller's own
+            if self._closed and not asyncio.current_task().cancelling():
+                raise FoxEssApiCancelledError("API request cancelled") from err
+            raise
+        except FoxEssApiException as err:
+            if self.recorder is not None:
+                self.recorder.record(method, path, params, data, time.monotonic() - started, error=err)
+            raise
+        finally:
+            self._inflight.discard(task)
+
+        if self.recorder is not None:
+            self.recorder.record(method, path, params, data, time.monotonic() - started, result=result)
+        return result
+
+    async def _hedged_request(self, method: str, path: str, params: dict | None = None, data: dict | None = None) -> dict:
+        """Make a request, sending one duplicate if the first is slower than usual.
+
+        The duplicate is only sent once the endpoint's latency is known and the
+        daily budget has room for it; whichever answer arrives first wins.
+        """
+        hedge_delay = self._get_latency(path).hedge_delay
+        primary = asyncio.ensure_future(self._request(method, path, params, data))
+        pending = {primary}
+        try:
+            if hedge_delay is None or self.budget.remaining <= HEDGE_BUDGET_RESERVE:
+                return await primary
+
+            done, _ = await asyncio.wait(pending, timeout=hedge_delay)
+            if not done:
+                _LOGGER.debug("No response from %s after %.1fs, sending hedged request", path, hedge_delay)
+                self.hedged_requests += 1
+                pending.add(asyncio.ensure_future(self._request(method, path, params, data)))
+
+            error: BaseException | None = None
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    if task.exception() is None:
+                        return task.result()
+                    error = task.exception()
+            raise error
+        finally:
+            for task in pending:
+                task.cancel()
+
+    async def _send(self, method: str, path: str, params: dict | None, data: dict | None) -> dict:
+        """Send a signed request, signing it again once if the cloud rejects its timestamp.
+
+        Errno 40256 (missing request header parameters) counts as such a rejection,
+        as a timestamp outside the cloud's window is what gets it. The request is
+        only signed again if the rejection's Date header moved the clock offset;
+        otherwise the clock isn't the cause, and a second try would fail the same way.
+        """
+        try:
+            return await self._send_signed(method, path, params, data)
+        except FoxEssApiClockError as err:
+            if not err.offset_changed:
+                raise
+            self.clock_retries += 1
+            _LOGGER.warning("%s; signing again with the server clock offset (%+.1fs)", err, self.clock_offset or 0.0)
+            return await self._send_signed(method, path, params, data)
+
+    async def _pace(self, path: str) -> None:
+        """Wait until a path may take another call, at most one per PATH_MIN_INTERVAL."""
+        loop = asyncio.get_running_loop()
+        async with self._path_locks.setdefault(path, asyncio.Lock()):
+            if (wait := self._path_ready.get(path, 0.0) - loop.time()) > 0:
+                _LOGGER.debug("Waiting %.2fs before the next call to %s", wait, path)
+                await asyncio.sleep(wait)
+            self._path_ready[path] = loop.time() + PATH_MIN_INTERVAL
+
+    async def _send_signed(self, method: str, path: str, params: dict | None, data: dict | None) -> dict:
+        """Send a signed request and return the 'result' part of the response."""
+        await self._pace(path) # Before signing, so the timestamp is fresh
+        url = f"{self.base_url}{path}" # URL for request uses base path
         # Generate signature using the base path (matches old code)
         headers = self._get_signature(path)
-        _LOGGER.debug("Sending %s request to %s with params %s and data %s", method, url, params, data)
+        latency = self._get_latency(path)
+        timeout = latency.timeout
+        _LOGGER.debug("Sending %s request to %s with params %s and data %s (timeout %.1fs)", method, url, params, data, timeout)
+        self.budget.consume()
+        started = time.monotonic()
+        sent = time.time() # Wall clock, for the clock offset
 
         try:
             async with self._session.request(
@@ -101,10 +497,15 @@ class FoxEssApiClient:
                 headers=headers,
                 params=params,
                 json=data,
-                timeout=aiohttp.ClientTimeout(total=DEFAULT_TIMEOUT),
+                proxy=self.proxy,
+                timeout=aiohttp.ClientTimeout(total=timeout),
             ) as response:
+                # Error responses carry the server's time too
+                offset_changed = self._track_clock(response.headers.get("Date"), sent, time.time())
                 response.raise_for_status()  # Raise exception for 4xx/5xx status codes
                 resp_text = await response.text()
+                latency.record(time.monotonic() - started)
+                latency.record_size(len(resp_text.encode()))
                 _LOGGER.debug("API Response (%s): %s", response.status, resp_text)
 
                 # Handle potential empty responses or non-JSON responses
@@ -127,79 +528,105 @@ class FoxEssApiClient:
                     # Example: Check for specific auth error codes
                     if errno in [41800]: # Example error code for invalid token/auth
                          raise FoxEssApiAuthError(f"API Auth Error [{errno}]: {msg}")
+                    if errno in CLOCK_ERRNOS or "timestamp" in str(msg).lower():
+                        raise FoxEssApiClockError(f"API Error [{errno}]: {msg}", offset_changed)
                     raise FoxEssApiResponseError(f"API Error [{errno}]: {msg}")
 
                 return resp_json.get("result", {}) # Return the 'result' part or empty dict
 
         except asyncio.TimeoutError as err:
-            _LOGGER.error("Timeout connecting to API: %s", err)
-            raise FoxEssApiTimeoutError("API request timed out") from err
+            latency.record_timeout()
+            self._fail_over()
+            _LOGGER.error("Timeout connecting to API after %.1fs: %s", timeout, err)
+            raise FoxEssApiTimeoutError(f"API request timed out after {timeout:.1f}s") from err
         except aiohttp.ClientResponseError as err:
             _LOGGER.error("API request failed (%s): %s", err.status, err.message)
+            if err.status >= 500:
+                self._fail_over()
             if err.status in [401, 403]: # Unauthorized or Forbidden
                  raise FoxEssApiAuthError(f"API Auth Error ({err.status}): {err.message}") from err
             raise FoxEssApiException(f"API Request Error ({err.status}): {err.message}") from err
         except aiohttp.ClientError as err:
+            self._fail_over()
             _LOGGER.error("API connection error: %s", err)
             raise FoxEssApiException(f"API Connection Error: {err}") from err
 
-    async def get_device_detail(self) -> dict:
+    def _sn(self, device_sn: str | None) -> str:
+        """Return the serial number to query, defaulting to the client's own."""
+        return device_sn or self._device_sn
+
+    async def get_device_list(self) -> list[dict]:
+        """Fetch all inverters on the account, following pagination."""
+        devices: list[dict] = []
+        page = 1
+        while True:
+            payload = {"currentPage": page, "pageSize": DEVICE_LIST_PAGE_SIZE}
+            result = await self._request(METHOD_POST, _ENDPOINT_OA_DEVICE_LIST, data=payload)
+            page_data = (result.get("data") or []) if isinstance(result, dict) else []
+            devices.extend(page_data)
+            total = result.get("total", 0) if isinstance(result, dict) else 0
+            if not page_data or len(devices) >= int(total or 0):
+                break
+            page += 1
+        return devices
+
+    async def get_device_detail(self, device_sn: str | None = None) -> dict:
         """Fetch device details."""
         # Pass params to _request, which will now use them to construct the full path for signature
-        params = {"sn": self._device_sn}
+        params = {"sn": self._sn(device_sn)}
         return await self._request(METHOD_GET, _ENDPOINT_OA_DEVICE_DETAIL, params=params)
 
-    async def get_battery_settings(self) -> dict:
-        """Fetch battery settings (SoC limits)."""
-        params = {"sn": self._device_sn}
-        return await self._request(METHOD_GET, _ENDPOINT_OA_BATTERY_SETTINGS, params=params)
+    async def get_battery_settings(self, device_sn: str | None = None) -> dict:
+        """Fetch battery settings (SoC limits).
 
-    async def get_report(self) -> dict:
-        """Fetch daily, monthly, yearly energy report."""
-        today = datetime.now().strftime("%Y-%m-%d")
+        The cloud names the on-grid limit minSocOnGrid; it is returned as
+        minGridSoc, the key of its sensor and number entities.
+        """
+        params = {"sn": self._sn(device_sn)}
+        settings = await self._request(METHOD_GET, _ENDPOINT_OA_BATTERY_SETTINGS, params=params)
+        if isinstance(settings, dict) and "minSocOnGrid" in settings:
+            settings = {**settings}
+            settings["minGridSoc"] = settings.pop("minSocOnGrid")
+        return settings
+
+    async def set_battery_settings(self, min_soc: int, min_grid_soc: int, device_sn: str | None = None) -> dict:
+        """Change both battery SoC limits in one call."""
         payload = {
-            "sn": self._device_sn,
-            "year": datetime.now().year,
-            "month": datetime.now().month,
-            "day": datetime.now().day, # Add day parameter, seems required when dimension="day"
+            "sn": self._sn(device_sn),
+            "minSoc": int(min_soc),
+            "minSocOnGrid": int(min_grid_soc), # minGridSoc in get_battery_settings()' result
+        }
+        return await self._request(METHOD_POST, _ENDPOINT_OA_BATTERY_SETTINGS_SET, data=payload)
+
+    async def get_report(
+        self, device_sn: str | None = None, variables: tuple[str, ...] = REPORT_VARIABLES, day: date | None = None
+    ) -> dict:
+        """Fetch the daily energy report of the month of `day` (default: today on the local clock) for some variables."""
+        day = day or datetime.now().date()
+        payload = {
+            "sn": self._sn(device_sn),
+            "year": day.year,
+            "month": day.month,
+            "day": day.day, # Add day parameter, seems required when dimension="day"
             "dimension": "day", # Fetch daily data for current month
-            "variables": ["generation", "feedin", "gridConsumption", "chargeEnergyToTal", "dischargeEnergyToTal", "loads"]
+            "variables": list(variables),
         }
         # This endpoint seems to return data for the whole month when dimension=day
         # Or whole year when dimension=month. Let's fetch daily for current month.
         return await self._request(METHOD_POST, _ENDPOINT_OA_REPORT, data=payload)
 
 
-    async def get_report_daily_generation(self) -> dict:
-        """Fetch daily generation details."""
-        params = {"sn": self._device_sn}
-        # This endpoint might require date parameters, check API docs
-        # Assuming it defaults to today if not specified
+    async def get_report_daily_generation(self, device_sn: str | None = None) -> dict:
+        """Fetch generation today, this month and in total (kWh), as {"today", "month", "cumulative"}."""
+        params = {"sn": self._sn(device_sn)}
         return await self._request(METHOD_GET, _ENDPOINT_OA_DAILY_GENERATION, params=params)
 
-    async def get_raw_data(self, extend_pv: bool = False, variables: list | None = None) -> dict:
-        """Fetch real-time inverter data. Optionally include extended PV strings."""
+    @staticmethod
+    def _build_variables(extend_pv: bool, variables: list | None) -> list:
+        """Return the variable list to query, optionally with extended PV strings."""
         # Default variables if none provided (based on original code's usage)
         if variables is None:
-             variables = [
-                "ambientTemperation", "batChargePower", "batCurrent", "batDischargePower",
-                "batTemperature", "batVolt", "boostTemperation", "chargeTemperature",
-                "dcdcStatus", "dspStatus", "ECharge", "EChargeTotal", "EDischarge",
-                "EDischargeTotal", "EGeneration", "EGenerationTotal", "EGridCharge",
-                "EGridChargeTotal", "EGridDischarge", "EGridDischargeTotal", "EInputTotal",
-                "ELoad", "ELoadTotal", "EOutputTotal", "epsCurrentR", "epsCurrentS",
-                "epsCurrentT", "epsPower", "epsPowerR", "epsPowerS", "epsPowerT",
-                "epsVoltR", "epsVoltS", "epsVoltT", "feedinPower", "generationPower",
-                "gridConsumptionPower", "invBatCurrent", "invBatPower", "invBatVolt",
-                "invOutputCurrent", "invOutputPower", "invOutputVolt", "invStatus",
-                "invTemperation", "loadsPower", "meterPower", "meterPower2", "meterStatus",
-                "powerFactor", "pv1Current", "pv1Power", "pv1Volt", "pv2Current",
-                "pv2Power", "pv2Volt", "pv3Current", "pv3Power", "pv3Volt", "pv4Current",
-                "pv4Power", "pv4Volt", "pvPower", "RCurrent", "reactivePower", "RFreq",
-                "RPower", "RVolt", "runningStatus", "SCurrent", "SFreq", "SoC", "SPower",
-                "SVolt", "sysStatus", "TCurrent", "TFreq", "TPower", "TVolt",
-                "currentFault" # Add fault code variable
-            ]
+            variables = list(DEFAULT_VARIABLES)
         # Add extended PV strings if extend_pv is True, regardless of whether default or custom variables were used
         # Ensure variables is a list before extending
         if not isinstance(variables, list):
@@ -215,32 +642,60 @@ class FoxEssApiClient:
                 if pv_current not in variables: variables.append(pv_current)
                 if pv_power not in variables: variables.append(pv_power)
                 if pv_volt not in variables: variables.append(pv_volt)
+        return variables
+
+    def _parse_datas(self, item: Any) -> dict:
+        """Flatten one device's 'datas' list into a variable:value dictionary.
+
+        Units and names of the variables are remembered in variable_info.
+        """
+        processed_data = {}
+        if isinstance(item, dict) and 'datas' in item:
+             datas_list = item.get('datas', [])
+             if isinstance(datas_list, list):
+                  for data_item in datas_list:
+                       if isinstance(data_item, dict) and 'variable' in data_item and 'value' in data_item:
+                            processed_data[data_item['variable']] = data_item['value']
+                            if data_item['variable'] not in self.variable_info:
+                                 self.variable_info[data_item['variable']] = {
+                                      "unit": data_item.get('unit') or "",
+                                      "name": data_item.get('name') or "",
+                                 }
+        else:
+             _LOGGER.warning("Unexpected structure in real-time data response item: %s", item)
+        return processed_data
 
+    async def get_raw_data(self, extend_pv: bool = False, variables: list | None = None, device_sn: str | None = None) -> dict:
+        """Fetch real-time inverter data. Optionally include extended PV strings."""
         payload = {
-            "sn": self._device_sn,
-            "variables": variables # Pass the list directly, aiohttp will encode the payload
+            "sn": self._sn(device_sn),
+            "variables": self._build_variables(extend_pv, variables) # Pass the list directly, aiohttp will encode the payload
         }
         # The API returns a list containing one dictionary with 'datas' and 'time'
         # Process this to return just the dictionary of variable:value pairs
-        result_list = await self._request(METHOD_POST, _ENDPOINT_OA_DEVICE_VARIABLES, data=payload)
+        # Latency-sensitive, so a slow first attempt is hedged with one duplicate
+        result_list = await self._hedged_request(METHOD_POST, _ENDPOINT_OA_DEVICE_VARIABLES, data=payload)
 
-        processed_data = {}
         if result_list and isinstance(result_list, list) and len(result_list) > 0:
-            # API seems to wrap the actual data inside a list -> result -> datas
-            # Let's adjust based on the structure observed in previous debugging if needed
-            # Assuming the structure is like: [{'datas': [{'variable': 'x', 'value': 1}, ...], 'time': '...'}]
-            first_item = result_list[0]
-            if isinstance(first_item, dict) and 'datas' in first_item:
-                 datas_list = first_item.get('datas', [])
-                 if isinstance(datas_list, list):
-                      for item in datas_list:
-                           if isinstance(item, dict) and 'variable' in item and 'value' in item:
-                                processed_data[item['variable']] = item['value']
-                 # Optionally add 'time' if needed elsewhere, though sensors usually rely on HA's update time
-                 # processed_data['api_time'] = first_item.get('time')
-            else:
-                 _LOGGER.warning("Unexpected structure in get_raw_data response list item: %s", first_item)
-        else:
-             _LOGGER.warning("Unexpected or empty response structure from get_raw_data: %s", result_list)
+            return self._parse_datas(result_list[0])
+        _LOGGER.warning("Unexpected or empty response structure from get_raw_data: %s", result_list)
+        return {}
+
+    async def get_raw_data_batch(self, device_sns: list[str], extend_pv: bool = False, variables: list | None = None) -> dict[str, dict]:
+        """Fetch real-time data for many inverters, up to 50 per call (v1 endpoint).
 
-        return processed_data # Return the processed dictionary
\ No newline at end of file
+        Returns a dictionary of serial number to variable:value pairs; devices
+        missing from the response are left out.
+        """
+        variables = self._build_variables(extend_pv, variables)
+        results: dict[str, dict] = {}
+        for start in range(0, len(device_sns), REAL_QUERY_MAX_SNS):
+            payload = {"sns": device_sns[start:start + REAL_QUERY_MAX_SNS], "variables": variables}
+            result_list = await self._hedged_request(METHOD_POST, _ENDPOINT_OA_DEVICE_VARIABLES_BATCH, data=payload)
+            if not isinstance(result_list, list):
+                _LOGGER.warning("Unexpected response structure from batch real-time query: %s", result_list)
+                continue
+            for item in result_list:
+                if isinstance(item, dict) and item.get("deviceSN"):
+                    results[item["deviceSN"]] = self._parse_datas(item)
+        return results
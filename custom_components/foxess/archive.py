@@ -0,0 +1,239 @@
+"""Opt-in columnar archive of real-time samples, one directory per inverter and UTC day.
+
+<root>/<deviceSN>/<YYYY-MM-DD>/ holds a float64 `_time` column (seconds since
+the epoch) and one float32 column per variable. Columns are fixed width and
+appended together, so row i of every column belongs to the same snapshot; a
+variable first seen mid-day is back-filled with NaN, as is a value missing
+from a snapshot. Queries memory-map the columns and aggregate them in one
+vectorized pass. Closed days are gzipped and read back into memory instead.
+"""
+from __future__ import annotations
+
+from collections import deque
+from collections.abc import Callable
+from datetime import date, datetime, timedelta, timezone
+import gzip
+import logging
+import os
+import re
+import shutil
+import threading
+from typing import Any
+
+import numpy as np
+
+_LOGGER = logging.getLogger(__name__)
+
+TIME_COLUMN = "_time"
+TIME_DTYPE = np.dtype("<f8")
+VALUE_DTYPE = np.dtype("<f4")
+_VARIABLE_RE = re.compile(r"^\w+$") # Variable names become file names
+
+
+def _day(timestamp: float) -> date:
+    """Return the UTC day of a timestamp."""
+    return datetime.fromtimestamp(timestamp, timezone.utc).date()
+
+
+class DailyArchive:
+    """Append real-time snapshots to per-day column files and aggregate them.
+
+    Pass an executor (e.g. hass.async_add_executor_job) to keep file I/O off
+    the loop. Writes and compression queue up and run in order, one executor
+    job at a time, so rows stay sorted by time for samples()' binary search.
+    """
+
+    def __init__(self, root: str, executor: Callable[[Callable[[], None]], Any] | None = None) -> None:
+        """Initialize the archive."""
+        self.root = root
+        self._executor = executor
+        self._lock = threading.Lock()
+        # (deviceSN, day) -> (rows, columns) of the day being appended to
+        self._open_days: dict[tuple[str, date], tuple[int, set[str]]] = {}
+        self._last_day: date | None = None
+        self._jobs: deque[Callable[[], None]] = deque() # File I/O waiting for the worker
+        self._jobs_lock = threading.Lock()
+        self._draining = False # A worker job is running, or submitted
+
+    def _run(self, job: Callable[[], None]) -> None:
+        """Run a file job, or queue it behind the ones before it."""
+        if self._executor is None:
+            job()
+            return
+        with self._jobs_lock:
+            self._jobs.append(job)
+            if self._draining:
+                return # The running worker picks it up
+            self._draining = True
+        self._executor(self._drain).add_done_callback(self._log_failure)
+
+    def _drain(self) -> None:
+        """Run queued file jobs in order until the queue is empty."""
+        while True:
+            with self._jobs_lock:
+                if not self._jobs:
+                    self._draining = False
+                    return
+                job = self._jobs.popleft()
+            try:
+                job()
+            except Exception:
+                # One failed write mustn't stop the ones queued behind it
+                _LOGGER.exception("Archive write failed")
+
+    def _log_failure(self, future: Any) -> None:
+        """Log a worker job that failed outside its jobs."""
+        if not future.cancelled() and (err := future.exception()) is not None:
+            _LOGGER.error("Archive worker failed: %s", err, exc_info=err)
+
+    def _day_dir(self, device_sn: str, day: date) -> str:
+        return os.path.join(self.root, device_sn, day.isoformat())
+
+    def append(self, device_sn: str, timestamp: float, raw: dict[str, Any]) -> None:
+        """Archive the numeric values of one real-time snapshot."""
+        values = {
+            variable: float(value)
+            for variable, value in raw.items()
+            if isinstance(value, (int, float)) and not isinstance(value, bool) and _VARIABLE_RE.match(variable)
+        }
+        day = _day(timestamp)
+        self._run(lambda: self._write(device_sn, day, timestamp, values))
+        if self._last_day is not None and day != self._last_day:
+            self.compress_closed_days(day) # First snapshot of a new day closes the previous one
+        self._last_day = day
+
+    def _write(self, device_sn: str, day: date, timestamp: float, values: dict[str, float]) -> None:
+        """Append one row to every column of the day, adding new columns as needed."""
+        with self._lock:
+            day_dir = self._day_dir(device_sn, day)
+            if (device_sn, day) not in self._open_days:
+                if os.path.exists(os.path.join(day_dir, f"{TIME_COLUMN}.gz")):
+                    _LOGGER.debug("Not archiving a late sample of %s for closed day %s", device_sn, day)
+                    return
+                os.makedirs(day_dir, exist_ok=True)
+                self._open_days[(device_sn, day)] = _scan_day(day_dir)
+            rows, columns = self._open_days[(device_sn, day)]
+
+            for variable in columns | values.keys():
+                path = os.path.join(day_dir, variable)
+                if variable not in columns:
+                    # Earlier rows of a new column are unknown
+                    with open(path, "wb") as column:
+                        column.write(np.full(rows, np.nan, VALUE_DTYPE).tobytes())
+                with open(path, "ab") as column:
+                    column.write(VALUE_DTYPE.type(values.get(variable, np.nan)).tobytes())
+            # Time goes last: it defines how many rows are complete
+            with open(os.path.join(day_dir, TIME_COLUMN), "ab") as column:
+                column.write(TIME_DTYPE.type(timestamp).tobytes())
+            self._open_days[(device_sn, day)] = (rows + 1, columns | values.keys())
+
+    def compress_closed_days(self, today: date | None = None) -> None:
+        """Gzip the columns of every day before `today` (default: the current UTC day)."""
+        today = today or datetime.now(timezone.utc).date()
+        self._run(lambda: self._compress(today))
+
+    def _compress(self, today: date) -> None:
+        with self._lock:
+            for device_sn, day, day_dir in self._days():
+                if day >= today:
+                    continue
+                self._open_days.pop((device_sn, day), None)
+                for name in os.listdir(day_dir):
+                    if name.endswith(".gz"):
+                        continue
+                    path = os.path.join(day_dir, name)
+                    with open(path, "rb") as source, gzip.open(f"{path}.gz", "wb") as target:
+                        shutil.copyfileobj(source, target)
+                    os.remove(path)
+                _LOGGER.debug("Compressed archive of %s for %s", device_sn, day)
+
+    def _days(self):
+        """Yield (deviceSN, day, directory) of everything archived."""
+        if not os.path.isdir(self.root):
+            return
+        for device_sn in os.listdir(self.root):
+            device_dir = os.path.join(self.root, device_sn)
+            for name in os.listdir(device_dir):
+                try:
+                    day = date.fromisoformat(name)
+                except ValueError:
+                    continue
+                yield device_sn, day, os.path.join(device_dir, name)
+
+    def samples(self, device_sn: str, variables: list[str], start: datetime, end: datetime) -> tuple[np.ndarray, np.ndarray]:
+        """Return the sample times between two aware times and a (variables x samples) float64 matrix.
+
+        Values a snapshot lacked, or a variable never reported that day, are NaN.
+        """
+        start_ts, end_ts = start.timestamp(), end.timestamp()
+        times: list[np.ndarray] = []
+        blocks: list[np.ndarray] = []
+        day = _day(start_ts)
+        while day <= _day(end_ts):
+            day_dir = self._day_dir(device_sn, day)
+            day += timedelta(days=1)
+            time_column = _load(day_dir, TIME_COLUMN, TIME_DTYPE)
+            if time_column is None:
+                continue
+            first = int(np.searchsorted(time_column, start_ts, side="left"))
+            last = int(np.searchsorted(time_column, end_ts, side="right"))
+            times.append(np.array(time_column[first:last]))
+            block = np.full((len(variables), last - first), np.nan)
+            for row, variable in enumerate(variables):
+                column = _load(day_dir, variable, VALUE_DTYPE)
+                if column is not None and len(column) >= last:
+                    block[row] = column[first:last]
+            blocks.append(block)
+
+        if not times:
+            return np.empty(0), np.empty((len(variables), 0))
+        return np.concatenate(times), np.concatenate(blocks, axis=1)
+
+    def query(self, device_sn: str, variables: list[str], start: datetime, end: datetime) -> dict[str, dict]:
+        """Return min, max, mean, energy and sample count per variable between two aware times.
+
+        Energy integrates the values over time in hours (trapezoidal), so it is
+        in kWh for variables in kW. Variables without samples get None values.
+        """
+        all_times, matrix = self.samples(device_sn, variables, start, end)
+        result = {}
+        for variable, values in zip(variables, matrix):
+            valid = ~np.isnan(values)
+            if not valid.any():
+                result[variable] = {"min": None, "max": None, "mean": None, "energy": None, "samples": 0}
+                continue
+            values, valid_times = values[valid], all_times[valid]
+            result[variable] = {
+                "min": float(values.min()),
+                "max": float(values.max()),
+                "mean": float(values.mean()),
+                "energy": float(np.sum((values[1:] + values[:-1]) * np.diff(valid_times)) / 2 / 3600),
+                "samples": int(values.size),
+            }
+        return result
+
+
+def _scan_day(day_dir: str) -> tuple[int, set[str]]:
+    """Return the complete rows and the columns of a day being reopened."""
+    columns = set(os.listdir(day_dir)) - {TIME_COLUMN}
+    time_path = os.path.join(day_dir, TIME_COLUMN)
+    rows = os.path.getsize(time_path) // TIME_DTYPE.itemsize if os.path.exists(time_path) else 0
+    # Drop any row half-written before a restart, so the columns line up again
+    for name, dtype in ((TIME_COLUMN, TIME_DTYPE), *((column, VALUE_DTYPE) for column in columns)):
+        path = os.path.join(day_dir, name)
+        if os.path.exists(path) and os.path.getsize(path) > rows * dtype.itemsize:
+            os.truncate(path, rows * dtype.itemsize)
+    return rows, columns
+
+
+def _load(day_dir: str, name: str, dtype: np.dtype) -> np.ndarray | None:
+    """Memory-map a column of an open day, or decompress one of a closed day."""
+    path = os.path.join(day_dir, name)
+    if os.path.exists(path):
+        if os.path.getsize(path) < dtype.itemsize:
+            return np.empty(0, dtype)
+        return np.memmap(path, dtype=dtype, mode="r")
+    if os.path.exists(f"{path}.gz"):
+        with gzip.open(f"{path}.gz", "rb") as column:
+            return np.frombuffer(column.read(), dtype=dtype)
+    return None
@@ -1,4 +1,5 @@
 """Config flow for FoxESS Cloud integration."""
+import hashlib
 import logging
 import voluptuous as vol
 
@@ -6,17 +7,59 @@ from homeassistant import config_entries
 from homeassistant.const import CONF_NAME # Needed for title, though not configurable here
 from homeassistant.core import callback
 from homeassistant.helpers import selector
-from .const import DOMAIN, CONF_DEVICE_SN, CONF_API_KEY, CONF_EXTPV, CONF_DEVICE_ID # Combined imports
+from homeassistant.helpers.aiohttp_client import async_get_clientsession
+from .api import DEFAULT_BASE_URL, DEFAULT_VARIABLES, FoxEssApiClient, FoxEssApiAuthError, FoxEssApiException
+from .hourly import STATISTICS_GROUPS
+from .const import DOMAIN, CONF_DEVICE_SN, CONF_DEVICES, CONF_API_KEY, CONF_EXTPV, CONF_DEVICE_ID, CONF_ROLLING_STATS, CONF_ARCHIVE, CONF_LOCAL_API # Combined imports
+from .const import (
+    CONF_BASE_URL,
+    CONF_STATISTICS_ONLY,
+    CONF_BATTERY_INTERVAL,
+    CONF_CANDIDATE_URLS,
+    CONF_DETAIL_INTERVAL,
+    CONF_PROXY,
+    CONF_REPORT_INTERVAL,
+    CONF_SCAN_INTERVAL,
+    CONF_VARIABLES,
+    BATTERY_SETTINGS_INTERVAL_MINUTES,
+    DEVICE_DETAIL_INTERVAL_MINUTES,
+    MAX_INTERVAL_MINUTES,
+    REPORT_INTERVAL_MINUTES,
+    SCAN_INTERVAL_MINUTES,
+)
 
 _LOGGER = logging.getLogger(__name__)
 
 DATA_SCHEMA = vol.Schema(
     {
         vol.Required(CONF_API_KEY): str,
-        vol.Required(CONF_DEVICE_SN): str,
     }
 )
 
+
+def hub_unique_id(api_key: str) -> str:
+    """Return a stable unique ID for a hub entry without exposing the API key."""
+    return hashlib.sha256(api_key.encode()).hexdigest()[:16]
+
+
+def hub_title(device_sns: list[str]) -> str:
+    """Return the entry title for a set of inverters."""
+    if len(device_sns) == 1:
+        return f"FoxESS Inverter {device_sns[0]}"
+    return f"FoxESS Cloud ({len(device_sns)} inverters)"
+
+def _interval_selector() -> vol.All:
+    """Return a whole-minutes interval field; the API allows about one call per minute."""
+    return vol.All(
+        selector.NumberSelector(
+            selector.NumberSelectorConfig(
+                min=1, max=MAX_INTERVAL_MINUTES, step=1, unit_of_measurement="min", mode=selector.NumberSelectorMode.BOX
+            )
+        ),
+        vol.Coerce(int),
+    )
+
+
 # Define Options Flow Handler FIRST
 class FoxESSOptionsFlowHandler(config_entries.OptionsFlow):
     """Handle FoxESS options."""
@@ -32,11 +75,44 @@ class FoxESSOptionsFlowHandler(config_entries.OptionsFlow):
             return self.async_create_entry(title="", data=user_input)
 
         # Get current options or defaults
-        extend_pv = self.config_entry.options.get(CONF_EXTPV, False)
+        options = self.config_entry.options
+        extend_pv = options.get(CONF_EXTPV, False)
+        rolling_stats = options.get(CONF_ROLLING_STATS, False)
+        archive = options.get(CONF_ARCHIVE, False)
+        local_api = options.get(CONF_LOCAL_API, False)
+        variables = list(options.get(CONF_VARIABLES) or DEFAULT_VARIABLES)
+        # Offer the default set; other variables the API knows can be typed in
+        variable_options = sorted({*DEFAULT_VARIABLES, *variables})
 
         options_schema = vol.Schema(
             {
                 vol.Optional(CONF_EXTPV, default=extend_pv): selector.BooleanSelector(),
+                vol.Optional(CONF_ROLLING_STATS, default=rolling_stats): selector.BooleanSelector(),
+                vol.Optional(CONF_ARCHIVE, default=archive): selector.BooleanSelector(),
+                vol.Optional(CONF_LOCAL_API, default=local_api): selector.BooleanSelector(),
+                vol.Optional(CONF_STATISTICS_ONLY, default=list(options.get(CONF_STATISTICS_ONLY) or [])): selector.SelectSelector(
+                    selector.SelectSelectorConfig(
+                        options=[selector.SelectOptionDict(value=group, label=label) for group, label in STATISTICS_GROUPS.items()],
+                        multiple=True,
+                    )
+                ),
+                vol.Optional(CONF_SCAN_INTERVAL, default=options.get(CONF_SCAN_INTERVAL, SCAN_INTERVAL_MINUTES)): _interval_selector(),
+                vol.Optional(CONF_DETAIL_INTERVAL, default=options.get(CONF_DETAIL_INTERVAL, DEVICE_DETAIL_INTERVAL_MINUTES)): _interval_selector(),
+                vol.Optional(CONF_BATTERY_INTERVAL, default=options.get(CONF_BATTERY_INTERVAL, BATTERY_SETTINGS_INTERVAL_MINUTES)): _interval_selector(),
+                vol.Optional(CONF_REPORT_INTERVAL, default=options.get(CONF_REPORT_INTERVAL, REPORT_INTERVAL_MINUTES)): _interval_selector(),
+                vol.Optional(CONF_VARIABLES, default=variables): selector.SelectSelector(
+                    selector.SelectSelectorConfig(options=variable_options, multiple=True, custom_value=True)
+                ),
+                vol.Optional(CONF_BASE_URL, default=options.get(CONF_BASE_URL, DEFAULT_BASE_URL)): selector.TextSelector(
+                    selector.TextSelectorConfig(type=selector.TextSelectorType.URL)
+                ),
+                # Left empty when unused, so suggested rather than defaulted (a default can't be cleared)
+                vol.Optional(CONF_CANDIDATE_URLS, description={"suggested_value": options.get(CONF_CANDIDATE_URLS)}): selector.TextSelector(
+                    selector.TextSelectorConfig(type=selector.TextSelectorType.URL, multiple=True)
+                ),
+                vol.Optional(CONF_PROXY, description={"suggested_value": options.get(CONF_PROXY)}): selector.TextSelector(
+                    selector.TextSelectorConfig(type=selector.TextSelectorType.URL)
+                ),
             }
         )
 
@@ -44,27 +120,88 @@ class FoxESSOptionsFlowHandler(config_entries.OptionsFlow):
 
 # Define Config Flow Handler SECOND
 class FoxESSConfigFlow(config_entries.ConfigFlow, domain=DOMAIN):
-    """Handle a config flow for FoxESS Cloud."""
+    """Handle a config flow for FoxESS Cloud.
 
-    VERSION = 1
+    One entry per API key; the inverters are picked from the account's device list.
+    """
+
+    VERSION = 2
     CONNECTION_CLASS = config_entries.CONN_CLASS_CLOUD_POLL
 
+    def __init__(self) -> None:
+        """Initialize the flow."""
+        self._api_key: str | None = None
+        self._available: dict[str, str] = {} # deviceSN -> label, not configured yet
+
     async def async_step_user(self, user_input=None):
-        """Handle the initial step."""
+        """Handle the initial step: validate the API key and list its inverters."""
         errors = {}
         if user_input is not None:
-            # TODO: Add validation here to test API key and SN if possible
-            # For now, assume valid input
-            await self.async_set_unique_id(user_input[CONF_DEVICE_SN])
-            self._abort_if_unique_id_configured()
+            api_key = user_input[CONF_API_KEY]
+            client = FoxEssApiClient(async_get_clientsession(self.hass), api_key)
+            try:
+                devices = await client.get_device_list()
+            except FoxEssApiAuthError:
+                errors["base"] = "invalid_auth"
+            except FoxEssApiException:
+                errors["base"] = "cannot_connect"
+            else:
+                configured = {
+                    device_sn
+                    for entry in self._async_current_entries(include_ignore=False)
+                    for device_sn in entry.data.get(CONF_DEVICES, {})
+                }
+                self._available = {
+                    device["deviceSN"]: f"{device['deviceSN']} ({device.get('stationName') or device.get('deviceType', 'FoxESS')})"
+                    for device in devices
+                    if device.get("deviceSN") and device["deviceSN"] not in configured
+                }
+                if not self._available:
+                    return self.async_abort(reason="already_configured" if devices else "no_devices")
+                self._api_key = api_key
+                return await self.async_step_devices()
 
+        return self.async_show_form(
+            step_id="user", data_schema=DATA_SCHEMA, errors=errors
+        )
+
+    async def async_step_devices(self, user_input=None):
+        """Let the user pick which inverters to add."""
+        if user_input is not None:
+            device_sns = user_input[CONF_DEVICES]
+            # A key has one hub entry (migrated ones included); new inverters of the key join it
+            await self.async_set_unique_id(hub_unique_id(self._api_key))
+            if (entry := self.hass.config_entries.async_entry_for_domain_unique_id(DOMAIN, self.unique_id)) is not None:
+                devices = {**entry.data[CONF_DEVICES], **{device_sn: device_sn for device_sn in device_sns}}
+                return self.async_update_reload_and_abort(
+                    entry,
+                    data={**entry.data, CONF_DEVICES: devices},
+                    title=hub_title(list(devices)),
+                    reason="devices_added",
+                )
             return self.async_create_entry(
-                title=f"FoxESS Inverter {user_input[CONF_DEVICE_SN]}", data=user_input
+                title=hub_title(device_sns),
+                data={
+                    CONF_API_KEY: self._api_key,
+                    # New inverters use their serial number as the entity unique ID base
+                    CONF_DEVICES: {device_sn: device_sn for device_sn in device_sns},
+                },
             )
 
-        return self.async_show_form(
-            step_id="user", data_schema=DATA_SCHEMA, errors=errors
+        schema = vol.Schema(
+            {
+                vol.Required(CONF_DEVICES, default=list(self._available)): selector.SelectSelector(
+                    selector.SelectSelectorConfig(
+                        options=[
+                            selector.SelectOptionDict(value=device_sn, label=label)
+                            for device_sn, label in self._available.items()
+                        ],
+                        multiple=True,
+                    )
+                ),
+            }
         )
+        return self.async_show_form(step_id="devices", data_schema=schema)
 
     # TODO: Add async_step_reauth if API key changes require re-authentication
 
@@ -92,12 +229,14 @@ class FoxESSConfigFlow(config_entries.ConfigFlow, domain=DOMAIN):
              # Returning abort might be better if HA handles this gracefully
              return self.async_abort(reason="import_missing_data")
 
-        await self.async_set_unique_id(legacy_device_id)
-        self._abort_if_unique_id_configured(updates={
-             CONF_API_KEY: api_key,
-             CONF_DEVICE_SN: device_sn,
-             # Don't store legacy deviceID in data, only use for unique_id
-        })
+        # The legacy deviceID stays the entity unique ID base to preserve history
+        devices = {device_sn: legacy_device_id}
+        data = {CONF_API_KEY: api_key, CONF_DEVICES: devices}
+        # Same hub unique ID as the config flow's: an inverter of a configured key joins its entry
+        await self.async_set_unique_id(hub_unique_id(api_key))
+        if (entry := self.hass.config_entries.async_entry_for_domain_unique_id(DOMAIN, self.unique_id)) is not None:
+            devices = {**devices, **entry.data[CONF_DEVICES]} # Inverters already there keep their unique ID base
+            self._abort_if_unique_id_configured(updates={CONF_DEVICES: devices})
 
         # Extract options from YAML if they exist
         options = {}
@@ -110,10 +249,6 @@ class FoxESSConfigFlow(config_entries.ConfigFlow, domain=DOMAIN):
 
         return self.async_create_entry(
             title=title,
-            data={
-                CONF_API_KEY: api_key,
-                CONF_DEVICE_SN: device_sn,
-                # Do not store legacy deviceID here, unique_id handles it
-            },
+            data=data,
             options=options,
-        )
\ No newline at end of file
+        )
@@ -6,17 +6,72 @@ DOMAIN = "foxess"
 CONF_DEVICE_SN = "deviceSN"
 CONF_API_KEY = "apiKey"
 CONF_DEVICE_ID = "deviceID" # Legacy ID, used for import unique_id
+CONF_DEVICES = "devices" # deviceSN -> entity unique ID base, one entry per API key
 CONF_EXTPV = "extendPV" # Option for extended PV sensors
+CONF_ROLLING_STATS = "rollingStats" # Option for rolling statistics attributes
+CONF_ARCHIVE = "archive" # Option for the columnar archive of real-time samples
+CONF_LOCAL_API = "localApi" # Option serving the entry's inverters on the local OpenAPI endpoints
+CONF_STATISTICS_ONLY = "statisticsOnly" # Option, sensor groups kept as hourly statistics instead of entities
+CONF_VARIABLES = "variables" # Option for the real-time variable set
+CONF_BASE_URL = "baseUrl" # Option, FoxESS API base URL
+CONF_CANDIDATE_URLS = "candidateUrls" # Option, other base URLs to probe and fail over to
+CONF_PROXY = "proxy" # Option, HTTP proxy URL for API requests
+CONF_SCAN_INTERVAL = "scanInterval" # Option, minutes
+CONF_DETAIL_INTERVAL = "deviceDetailInterval" # Option, minutes
+CONF_BATTERY_INTERVAL = "batteryInterval" # Option, minutes
+CONF_REPORT_INTERVAL = "reportInterval" # Option, minutes
 # Default Values
 DEFAULT_NAME = "FoxESS"
 
 # Platforms
-PLATFORMS = ["sensor"]
+PLATFORMS = ["sensor", "number"]
 
 # Coordinator Data Keys (Optional, but good practice)
 COORDINATOR = "coordinator"
 API_CLIENT = "api_client"
 DEVICE_INFO_DATA = "device_info_data" # To store data needed for device_info
+METRICS = "metrics" # Rendered Prometheus samples of the entry, None until the next scrape; see metrics.py
+DATA_METRICS_VIEW = f"{DOMAIN}_metrics_view" # hass.data flag, the view is registered once per run
+METRICS_URL = "/api/foxess/metrics"
+SNAPSHOT_STREAM = "snapshot_stream" # Deltas for WebSocket subscribers, see websocket.py
+WS_SUBSCRIBE = "foxess/subscribe"
+DATA_LOCAL_API_VIEWS = f"{DOMAIN}_local_api_views" # hass.data flag, the views are registered once per run
+LOCAL_API_URL = "/api/foxess" # Prefix of the OpenAPI paths served locally, see local_api.py
+DATA_PROFILE_LOCK = f"{DOMAIN}_profile_lock" # hass.data lock, profiled phases of all entries take turns
+
+# Services
+SERVICE_PROFILE = "profile"
+SERVICE_RECORD = "record"
+SERVICE_ARCHIVE_QUERY = "archive_query"
+ATTR_CYCLES = "cycles"
+ATTR_DURATION = "duration" # Minutes
+ATTR_ENTRY_ID = "entry_id"
+ATTR_DEVICE_SN = "device_sn"
+ATTR_VARIABLES = "variables"
+ATTR_START = "start"
+ATTR_END = "end"
+
+# Events fired on transitions, see events.py
+EVENT_FAULT = "foxess_fault"
+EVENT_STATUS_CHANGED = "foxess_status_changed"
+
+# Dispatcher signal sent after options are applied, formatted with the entry ID
+SIGNAL_OPTIONS_UPDATED = "foxess_options_updated_{}"
 
 # Other constants can be added here as needed
-SCAN_INTERVAL_MINUTES = 1 # Default scan interval
\ No newline at end of file
+SCAN_INTERVAL_MINUTES = 1 # Default scan interval
+DEVICE_DETAIL_INTERVAL_MINUTES = 15 # Default device detail refresh interval
+BATTERY_SETTINGS_INTERVAL_MINUTES = 60 # Default battery settings refresh interval
+REPORT_INTERVAL_MINUTES = 60 # Default report refresh interval
+MAX_INTERVAL_MINUTES = 1440
+ENDPOINT_PROBE_INTERVAL_MINUTES = 30 # Base URL candidates are probed again this often
+STRING_ANALYSIS_INTERVAL_MINUTES = 60 # PV strings are analyzed from the archive this often, see strings.py
+ARCHIVE_DIR = "foxess_archive" # Under the config directory, see archive.py
+ROLLING_WINDOW_SECONDS = 3600 # Time span of the samples kept per variable for rolling stats, whatever the interval
+BATTERY_WRITE_DELAY = 5 # Seconds without further changes before battery settings are written
+BATTERY_VERIFY_DELAY = 60 # Seconds after a write before it is confirmed with one read
+OPTIONAL_SENSOR_TIMEOUT_HOURS = 24 # Optional sensors (PV5-18, undescribed variables) without a value this long are removed
+
+# Persisted identity/snapshot cache, so setup needs no cloud I/O
+CACHE_STORAGE_VERSION = 2 # Keyed by deviceSN since version 2
+CACHE_SAVE_DELAY = 600 # Seconds; coalesces writes to at most one per 10 minutes
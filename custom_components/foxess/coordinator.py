@@ -0,0 +1,797 @@
+"""Data update coordinator for the FoxESS Cloud integration."""
+from __future__ import annotations
+
+import asyncio
+import calendar
+import logging
+import math
+from dataclasses import dataclass, field
+from datetime import date, timedelta, datetime
+from typing import TYPE_CHECKING, Any
+
+from homeassistant.components.sensor import SensorEntityDescription
+from homeassistant.config_entries import ConfigEntry
+from homeassistant.core import CALLBACK_TYPE, HomeAssistant, callback
+from homeassistant.exceptions import HomeAssistantError
+from homeassistant.helpers import issue_registry as ir
+from homeassistant.helpers.device_registry import DeviceInfo
+from homeassistant.helpers.event import async_call_later
+from homeassistant.helpers.storage import Store
+from homeassistant.helpers.update_coordinator import DataUpdateCoordinator, UpdateFailed
+from homeassistant.util import dt as dt_util
+
+from .api import (
+    DEFAULT_VARIABLES,
+    REAL_QUERY_MAX_SNS,
+    REPORT_VARIABLES,
+    CallBudget,
+    FoxEssApiClient,
+    FoxEssApiException,
+    FoxEssApiAuthError,
+    FoxEssApiCancelledError,
+    FoxEssApiTimeoutError,
+    FoxEssApiResponseError,
+)
+from .const import (
+    ARCHIVE_DIR,
+    BATTERY_VERIFY_DELAY,
+    BATTERY_WRITE_DELAY,
+    CACHE_SAVE_DELAY,
+    CACHE_STORAGE_VERSION,
+    CONF_ARCHIVE,
+    CONF_BASE_URL,
+    CONF_BATTERY_INTERVAL,
+    CONF_CANDIDATE_URLS,
+    CONF_DETAIL_INTERVAL,
+    CONF_DEVICES,
+    CONF_EXTPV,
+    CONF_PROXY,
+    CONF_REPORT_INTERVAL,
+    CONF_ROLLING_STATS,
+    CONF_SCAN_INTERVAL,
+    CONF_VARIABLES,
+    BATTERY_SETTINGS_INTERVAL_MINUTES,
+    DEVICE_DETAIL_INTERVAL_MINUTES,
+    DEVICE_INFO_DATA,
+    DOMAIN,
+    EVENT_FAULT,
+    EVENT_STATUS_CHANGED,
+    REPORT_INTERVAL_MINUTES,
+    ROLLING_WINDOW_SECONDS,
+    SCAN_INTERVAL_MINUTES,
+)
+from .archive import DailyArchive
+from .derived import compute_derived
+from .events import status_snapshot, transitions
+from .hourly import HourlyAggregate, async_write_hour
+from .stats import RollingWindow
+from .strings import analyze as analyze_strings, string_sensors
+
+if TYPE_CHECKING:
+    from .profiler import CycleProfiler
+
+_LOGGER = logging.getLogger(__name__)
+SCAN_INTERVAL = timedelta(minutes=SCAN_INTERVAL_MINUTES)
+
+# Default intervals for less frequent updates, overridable in the options
+DEVICE_DETAIL_INTERVAL = timedelta(minutes=DEVICE_DETAIL_INTERVAL_MINUTES)
+BATTERY_SETTINGS_INTERVAL = timedelta(minutes=BATTERY_SETTINGS_INTERVAL_MINUTES)
+REPORT_INTERVAL = timedelta(minutes=REPORT_INTERVAL_MINUTES)
+
+BUDGET_RESERVE = 10 # Calls kept back from pacing, for slow sections that fall due together
+
+# Sections of the coordinator data persisted between restarts
+CACHED_SECTIONS = ("raw", "battery", "report", "report_daily", "device_detail")
+
+# Sections refreshed on their own intervals, with the DeviceState field holding their last success
+SLOW_SECTIONS = {
+    "device_detail": "last_update_detail",
+    "battery": "last_update_battery",
+    "report": "last_update_report",
+}
+
+# Report values taken from the generation endpoint (a few bytes) rather than the month report
+# (a value per day of the month per variable): response field -> report variable
+GENERATION_VARIABLES = {"today": "generation", "month": "generationMonth", "cumulative": "generationTotal"}
+REPORT_CALLS = 2 # A report refresh queries both endpoints
+
+# Real-time variables that change slowly, queried only when their tier is due. A due
+# tier's variables join the every-update query, so this never costs an extra call;
+# everything not listed (power, SoC, status and fault codes) is queried every update.
+VARIABLE_TIERS = {
+    timedelta(minutes=5): frozenset({
+        "ambientTemperation", "batTemperature", "batTemperature_2", "boostTemperation",
+        "chargeTemperature", "invTemperation",
+    }),
+    timedelta(minutes=15): frozenset({
+        "EChargeTotal", "EDischargeTotal", "EGenerationTotal", "EGridChargeTotal",
+        "EGridDischargeTotal", "EInputTotal", "ELoadTotal", "EOutputTotal",
+        "SOH", "dcdcStatus", "meterStatus",
+    }),
+}
+
+
+@dataclass
+class DeviceState:
+    """Per-inverter bookkeeping kept by the coordinator."""
+
+    unique_base: str # Prefix of entity unique IDs (legacy deviceID or SN)
+    # Timestamps (UTC) of the last successful fetch of each slow section
+    last_update_detail: datetime | None = None
+    last_update_battery: datetime | None = None
+    last_update_report: datetime | None = None
+    report_date: date | None = None # Local day the report values were taken for
+    # Confirmed battery settings while a change is in flight (the section shows the new values)
+    battery_before: dict | None = None
+    # Pending debounced write and read-back of a battery settings change
+    unsub_battery_write: CALLBACK_TYPE | None = None
+    unsub_battery_verify: CALLBACK_TYPE | None = None
+    # Slow sections whose last fetch failed; their entities are unavailable until one succeeds
+    failed_sections: set[str] = field(default_factory=set)
+    # Recent samples per raw variable, filled only when rolling stats are enabled
+    rolling: dict[str, RollingWindow] = field(default_factory=dict)
+    # Status fields and active faults, compared after each update to fire events (see events.py)
+    status: dict[str, Any] = field(default_factory=dict)
+    # Repair issue IDs raised by the last PV string analysis (see strings.py)
+    string_issues: set[str] = field(default_factory=set)
+    # Variables kept as hourly statistics instead of entities, set by the sensor platform (see hourly.py)
+    statistics_only: dict[str, SensorEntityDescription] = field(default_factory=dict)
+    hourly: HourlyAggregate = field(default_factory=HourlyAggregate)
+
+
+class _CacheStore(Store):
+    """Snapshot cache, keyed by serial number since version 2."""
+
+    def __init__(self, hass: HomeAssistant, key: str, device_sns: list[str]) -> None:
+        """Initialize the store."""
+        super().__init__(hass, CACHE_STORAGE_VERSION, key)
+        self._device_sns = device_sns
+
+    async def _async_migrate_func(self, old_major_version: int, old_minor_version: int, old_data: dict) -> dict:
+        """Wrap a version 1 single-inverter cache under its serial number."""
+        if old_major_version == 1 and len(self._device_sns) == 1:
+            return {self._device_sns[0]: old_data}
+        return {}
+
+
+class FoxEssDataUpdateCoordinator(DataUpdateCoordinator[dict[str, Any]]):
+    """Coordinator fetching all data sections for every inverter of a config entry.
+
+    Data is keyed by serial number, each value holding that inverter's sections.
+    Entities subscribe with a (serial number, section) context and are only
+    notified when that section of that inverter was fetched, or failed.
+    """
+
+    def __init__(
+        self,
+        hass: HomeAssistant,
+        entry: ConfigEntry,
+        api_client: FoxEssApiClient,
+        budget: CallBudget | None = None,
+    ) -> None:
+        """Initialize the coordinator."""
+        self.api_client = api_client
+        # Daily allowance the client counts calls against; updates are paced to fit it
+        self.budget = budget if budget is not None else api_client.budget
+        self._budget_credit = 0.0
+        self._budget_day: date | None = None # UTC day the credit was earned on
+        self._budget_paced_day: date | None = None # UTC day updates were last thinned out on, logged once a day
+        self.entry = entry
+        self.devices: dict[str, DeviceState] = {
+            device_sn: DeviceState(unique_base)
+            for device_sn, unique_base in entry.data[CONF_DEVICES].items()
+        }
+        # Last known identity/snapshot, persisted so setup needs no cloud I/O
+        self._store = _CacheStore(hass, f"{DOMAIN}.{entry.entry_id}", list(self.devices))
+        # Set while the foxess.profile service is profiling this coordinator's cycles
+        self.profiler: CycleProfiler | None = None
+        # Slow section intervals, set from the options by apply_options()
+        self.detail_interval = DEVICE_DETAIL_INTERVAL
+        self.battery_interval = BATTERY_SETTINGS_INTERVAL
+        self.report_interval = REPORT_INTERVAL
+        # Columnar archive of real-time samples, set by apply_options() when enabled
+        self.archive: DailyArchive | None = None
+        # UTC time each slow variable tier was last queried for every inverter
+        self._tier_fetched: dict[timedelta, datetime] = {}
+        # Device info per inverter with the device detail it was built from, see device_info()
+        self._device_infos: dict[str, tuple[dict, DeviceInfo]] = {}
+        # Listener contexts touched by the running update; None notifies everyone
+        self._updated_contexts: set[tuple[str, str]] | None = None
+
+        super().__init__(
+            hass,
+            _LOGGER,
+            name=f"{DOMAIN}_{entry.entry_id}",
+            update_interval=SCAN_INTERVAL,
+        )
+        self.apply_options()
+
+    @property
+    def variables(self) -> list[str]:
+        """Return the real-time variables to query."""
+        return list(self.entry.options.get(CONF_VARIABLES) or DEFAULT_VARIABLES)
+
+    def apply_options(self) -> None:
+        """Apply the entry's options to the running coordinator, without a reload."""
+        options = self.entry.options
+        self.detail_interval = timedelta(minutes=options.get(CONF_DETAIL_INTERVAL, DEVICE_DETAIL_INTERVAL_MINUTES))
+        self.battery_interval = timedelta(minutes=options.get(CONF_BATTERY_INTERVAL, BATTERY_SETTINGS_INTERVAL_MINUTES))
+        self.report_interval = timedelta(minutes=options.get(CONF_REPORT_INTERVAL, REPORT_INTERVAL_MINUTES))
+        self.api_client.configure_endpoints(
+            options.get(CONF_BASE_URL), options.get(CONF_CANDIDATE_URLS) or (), options.get(CONF_PROXY)
+        )
+
+        update_interval = timedelta(minutes=options.get(CONF_SCAN_INTERVAL, SCAN_INTERVAL_MINUTES))
+        if update_interval != self.update_interval:
+            self.update_interval = update_interval
+            if self._unsub_refresh:
+                # Re-arm the pending timer so the new interval applies now, not after the old one
+                self._schedule_refresh()
+        self._tier_fetched.clear() # The variable list may have changed; query every tier once
+
+        if not options.get(CONF_ROLLING_STATS, False):
+            for state in self.devices.values():
+                state.rolling.clear() # Free the windows; attributes disappear with them
+
+        if not options.get(CONF_ARCHIVE, False):
+            self.archive = None
+            for device_sn in self.devices:
+                self._async_set_string_issues(device_sn, {}) # Nothing analyzes them any more
+        elif self.archive is None:
+            self.archive = DailyArchive(self.hass.config.path(ARCHIVE_DIR), executor=self.hass.async_add_executor_job)
+            self.archive.compress_closed_days() # Catch up on days closed while it was off
+
+    def section_available(self, device_sn: str, section: str) -> bool:
+        """Return True if a section of an inverter holds live data.
+
+        Real-time data follows the coordinator's own update state and the
+        inverter being online; slow sections only their own last fetch. The
+        status section is available with the device detail it starts from.
+        """
+        if section == "status":
+            section = "device_detail"
+        if section == "strings":
+            return self.archive is not None # Analyses hold between runs, whatever the real-time updates do
+        if section not in SLOW_SECTIONS:
+            return self.last_update_success and bool((self.data or {}).get(device_sn, {}).get("online"))
+        state = self.devices[device_sn]
+        return getattr(state, SLOW_SECTIONS[section]) is not None and section not in state.failed_sections
+
+    @callback
+    def async_update_listeners(self) -> None:
+        """Notify the listeners of the sections the last update touched."""
+        contexts, self._updated_contexts = self._updated_contexts, None
+        if contexts is None:
+            super().async_update_listeners()
+            return
+        self._async_notify(contexts)
+
+    @callback
+    def _async_notify(self, contexts: set[tuple[str, str]]) -> None:
+        """Call the listeners of some sections, and those without a context."""
+        for update_callback, context in list(self._listeners.values()):
+            if context is None or context in contexts:
+                update_callback()
+
+    @callback
+    def async_set_battery_setting(self, device_sn: str, key: str, value: int) -> None:
+        """Change a battery setting, optimistically, and write it after BATTERY_WRITE_DELAY.
+
+        The battery section shows the new value straight away. Further changes
+        within the delay (e.g. while dragging a slider) restart it, so they end
+        up in a single write of both limits, which one read-back confirms
+        BATTERY_VERIFY_DELAY later instead of polling.
+        """
+        state = self.devices[device_sn]
+        battery = (self.data or {}).get(device_sn, {}).get("battery")
+        if not battery or "minSoc" not in battery or "minGridSoc" not in battery:
+            raise HomeAssistantError(f"Battery settings of {device_sn} are not known yet")
+        if state.battery_before is None:
+            state.battery_before = dict(battery)
+        battery[key] = value # In place, so an update that is running keeps it too
+        self._async_notify({(device_sn, "battery")})
+
+        if state.unsub_battery_write is not None:
+            state.unsub_battery_write()
+
+        async def _async_write(_now: datetime) -> None:
+            state.unsub_battery_write = None
+            await self._async_write_battery_settings(device_sn)
+
+        state.unsub_battery_write = async_call_later(self.hass, BATTERY_WRITE_DELAY, _async_write)
+
+    async def _async_write_battery_settings(self, device_sn: str) -> None:
+        """Write the battery section of an inverter, then schedule its read-back."""
+        state = self.devices[device_sn]
+        battery = self.data[device_sn]["battery"]
+        try:
+            await self.api_client.set_battery_settings(battery["minSoc"], battery["minGridSoc"], device_sn)
+        except FoxEssApiException as err:
+            _LOGGER.error("Failed to change battery settings of %s: %s", device_sn, err)
+            self._async_end_battery_change(device_sn, state.battery_before or {})
+            return
+        _LOGGER.debug("Wrote battery settings of %s: %s", device_sn, battery)
+
+        async def _async_verify(_now: datetime) -> None:
+            state.unsub_battery_verify = None
+            await self._async_verify_battery_settings(device_sn)
+
+        if state.unsub_battery_verify is not None:
+            state.unsub_battery_verify()
+        state.unsub_battery_verify = async_call_later(self.hass, BATTERY_VERIFY_DELAY, _async_verify)
+
+    async def _async_verify_battery_settings(self, device_sn: str) -> None:
+        """Read the battery settings back once after a write."""
+        expected = dict(self.data[device_sn]["battery"])
+        try:
+            settings = await self.api_client.get_battery_settings(device_sn)
+        except FoxEssApiException as err:
+            # The write succeeded, so keep showing it; the scheduled read catches up later
+            _LOGGER.warning("Could not confirm battery settings of %s: %s", device_sn, err)
+            if self.devices[device_sn].unsub_battery_write is None:
+                self.devices[device_sn].battery_before = None
+            return
+        if any(settings.get(key) != value for key, value in expected.items()):
+            _LOGGER.warning("Battery settings of %s read back as %s instead of %s", device_sn, settings, expected)
+        state = self.devices[device_sn]
+        state.last_update_battery = self._utcnow().replace(tzinfo=None)
+        state.failed_sections.discard("battery") # A good read, like a scheduled one
+        self._async_end_battery_change(device_sn, settings)
+
+    @callback
+    def _async_end_battery_change(self, device_sn: str, settings: dict) -> None:
+        """Show the battery settings the cloud has, ending an in-flight change."""
+        if self.devices[device_sn].unsub_battery_write is not None:
+            return # Changed again meanwhile; that change's own write and read-back follow
+        self.devices[device_sn].battery_before = None
+        battery = self.data[device_sn]["battery"]
+        battery.clear()
+        battery.update(settings)
+        self._async_notify({(device_sn, "battery")})
+
+    async def async_shutdown(self) -> None:
+        """Cancel scheduled refreshes and battery writes, and ignore new runs."""
+        for state in self.devices.values():
+            for unsub in (state.unsub_battery_write, state.unsub_battery_verify):
+                if unsub is not None:
+                    unsub()
+            state.unsub_battery_write = state.unsub_battery_verify = None
+        await super().async_shutdown()
+
+    def calls_per_update(self) -> float:
+        """Return the average number of API calls an update costs."""
+        calls = float(math.ceil(len(self.devices) / REAL_QUERY_MAX_SNS)) # Batched real-time query
+        for device_sn in self.devices:
+            calls += self.update_interval / self.detail_interval + REPORT_CALLS * self.update_interval / self.report_interval
+            if self.device_detail(device_sn).get("hasBattery"):
+                calls += self.update_interval / self.battery_interval
+        return calls
+
+    def _budget_allows_update(self, current_time: datetime) -> bool:
+        """Return False if this update should be skipped to stay within the daily call budget.
+
+        The budget resets at midnight UTC. When the calls left can't pay for an
+        update every interval until then, updates are thinned out evenly (each
+        one earns the affordable share of an update as credit) so the allowance
+        lasts the day instead of running out in the evening.
+        """
+        if current_time.date() != self._budget_day:
+            # A fresh allowance pays for the first update of the day at once
+            self._budget_day = current_time.date()
+            self._budget_credit = max(self._budget_credit, 1.0)
+        midnight = datetime.combine(current_time.date() + timedelta(days=1), datetime.min.time())
+        updates_left = max(1.0, (midnight - current_time) / self.update_interval)
+        affordable = max(0, self.budget.remaining - BUDGET_RESERVE) / self.calls_per_update()
+        self._budget_credit += min(1.0, affordable / updates_left)
+        if self._budget_credit < 1.0:
+            return False
+        self._budget_credit -= 1.0
+        return True
+
+    def _utcnow(self) -> datetime:
+        """Return the time updates are scheduled by; a replay substitutes the recorded clock."""
+        return dt_util.utcnow()
+
+    def _due_variables(self, current_time: datetime) -> tuple[list[str], list[timedelta], frozenset[str]]:
+        """Return the real-time variables to query now, the slow tiers among them, and the configured variables left out."""
+        due_tiers = [
+            interval
+            for interval in VARIABLE_TIERS
+            if (last := self._tier_fetched.get(interval)) is None
+            # Half an update of slack, so timer jitter doesn't push a tier to the next update
+            or current_time - last + self.update_interval / 2 >= interval
+        ]
+        variables = self.variables
+        skipped = frozenset(variables) & frozenset().union(
+            *(tier for interval, tier in VARIABLE_TIERS.items() if interval not in due_tiers)
+        )
+        return [variable for variable in variables if variable not in skipped], due_tiers, skipped
+
+    def device_detail(self, device_sn: str) -> dict:
+        """Return the latest known device detail of an inverter."""
+        return self.hass.data[DOMAIN][self.entry.entry_id][DEVICE_INFO_DATA].get(device_sn) or {}
+
+    def device_info(self, device_sn: str) -> DeviceInfo:
+        """Return an inverter's device info, one object shared by its entities until the detail changes."""
+        device_detail = self.device_detail(device_sn)
+        cached = self._device_infos.get(device_sn)
+        if cached is not None and cached[0] is device_detail:
+            return cached[1]
+        device_info = DeviceInfo(
+            identifiers={(DOMAIN, device_sn)},
+            name=device_detail.get("plantName", f"FoxESS {device_sn}"), # Use plantName if available
+            manufacturer="FoxESS",
+            model=device_detail.get("deviceType", "Unknown"),
+            sw_version=f"Master: {device_detail.get('masterVersion', 'N/A')}, "
+                       f"Slave: {device_detail.get('slaveVersion', 'N/A')}, "
+                       f"Manager: {device_detail.get('managerVersion', 'N/A')}",
+        )
+        self._device_infos[device_sn] = (device_detail, device_info)
+        return device_info
+
+    def _set_device_detail(self, device_sn: str, device_detail: dict) -> None:
+        """Store device detail where entities look it up."""
+        self.hass.data[DOMAIN][self.entry.entry_id][DEVICE_INFO_DATA][device_sn] = device_detail
+
+    async def async_load_cache(self) -> bool:
+        """Seed the coordinator from the persisted snapshot.
+
+        Returns True if a cached identity was found for every inverter. The
+        seeded data is marked offline, so entities stay unavailable until the
+        first live refresh.
+        """
+        cached = await self._store.async_load() or {}
+        if not all((cached.get(device_sn) or {}).get("device_detail") for device_sn in self.devices):
+            return False
+
+        data = {}
+        for device_sn in self.devices:
+            self._set_device_detail(device_sn, cached[device_sn]["device_detail"])
+            device_data = self._empty_device_data(device_sn, {})
+            for section in CACHED_SECTIONS:
+                device_data[section] = cached[device_sn].get(section) or {}
+            device_data["derived"] = compute_derived(device_data["raw"])
+            data[device_sn] = device_data
+            self.devices[device_sn].hourly = HourlyAggregate.from_dict(cached[device_sn].get("hourly"))
+            # Transitions that happened while Home Assistant was down aren't reported again
+            self.devices[device_sn].status = status_snapshot({}, device_data["raw"], device_data["device_detail"])
+        self.data = data
+        _LOGGER.debug("Loaded cached identity and snapshot for %s", ", ".join(self.devices))
+        return True
+
+    @property
+    def _cache_payload(self) -> dict:
+        """Return the part of the coordinator data worth persisting, and the hour being aggregated."""
+        return {
+            device_sn: {
+                **{section: device_data.get(section) or {} for section in CACHED_SECTIONS},
+                "hourly": self.devices[device_sn].hourly.as_dict(),
+            }
+            for device_sn, device_data in (self.data or {}).items()
+        }
+
+    def _empty_device_data(self, device_sn: str, previous: dict) -> dict[str, Any]:
+        """Return a data skeleton carrying over the last known slow sections."""
+        state = self.devices[device_sn]
+        return {
+            "raw": {},
+            "derived": {},
+            "battery": previous.get("battery", {}),
+            "report": previous.get("report", {}),
+            "report_daily": previous.get("report_daily", {}),
+            "strings": previous.get("strings", {}),
+            "device_detail": self.device_detail(device_sn), # Start with last known detail
+            "online": False, # Assume offline until successful raw data fetch
+            "last_update_raw": None,
+            "last_update_detail": state.last_update_detail,
+            "last_update_battery": state.last_update_battery,
+            "last_update_report": state.last_update_report,
+        }
+
+    async def _async_update_data(self) -> dict[str, Any]:
+        """Fetch data for all inverters, refreshing slow sections on their own intervals."""
+        previous = self.data or {}
+        data = {
+            device_sn: self._empty_device_data(device_sn, previous.get(device_sn, {}))
+            for device_sn in self.devices
+        }
+        now = self._utcnow()
+        # Report days follow Home Assistant's time zone, not the host's (often UTC in a container)
+        now_local = dt_util.as_local(now)
+        current_time = now.replace(tzinfo=None) # Naive UTC for interval comparisons, like all coordinator timestamps
+        extend_pv = self.entry.options.get(CONF_EXTPV, False)
+        rolling_stats = self.entry.options.get(CONF_ROLLING_STATS, False)
+        if previous and not self._budget_allows_update(current_time):
+            if self._budget_paced_day != current_time.date():
+                self._budget_paced_day = current_time.date()
+                _LOGGER.info(
+                    "Thinning out updates of %s until midnight UTC to stay within the daily API call budget "
+                    "(%d calls left, %.2f per update); a longer update interval avoids this",
+                    self.entry.title,
+                    self.budget.remaining,
+                    self.calls_per_update(),
+                )
+            _LOGGER.debug("Skipping update of %s to stay within the daily API call budget", self.entry.title)
+            self._updated_contexts = set() # Nothing changed, nobody to notify
+            return previous
+
+        # Real-time entities hear about every update, successful or not
+        self._updated_contexts = {(device_sn, "raw") for device_sn in self.devices}
+
+        if not all(previous.get(device_sn, {}).get("online") for device_sn in self.devices):
+            # An inverter has no values to carry over, so it needs every tier
+            self._tier_fetched.clear()
+        variables, due_tiers, skipped = self._due_variables(current_time)
+
+        try:
+            # --- Fetch Raw Data (Every Update) ---
+            # One batched call covers every inverter; timeouts are adaptive and enforced by the API client
+            raw_by_sn = await self.api_client.get_raw_data_batch(
+                list(self.devices), extend_pv=extend_pv, variables=variables
+            )
+        except FoxEssApiException as err:
+            raise self._update_failed(err) from err
+
+        if all(device_sn in raw_by_sn for device_sn in self.devices):
+            self._tier_fetched.update(dict.fromkeys(due_tiers, current_time))
+        for device_sn, device_data in data.items():
+            if device_sn not in raw_by_sn:
+                _LOGGER.debug("No real-time data returned for %s", device_sn)
+                continue
+            # Slow variables that weren't due keep their last values; dropped ones go
+            device_data["raw"] = {
+                variable: value
+                for variable, value in previous.get(device_sn, {}).get("raw", {}).items()
+                if variable in skipped
+            }
+            device_data["raw"].update(raw_by_sn[device_sn])
+            device_data["derived"] = compute_derived(device_data["raw"]) # One pass, no extra calls
+            device_data["online"] = True # Mark as online if raw data fetch succeeds
+            device_data["last_update_raw"] = current_time
+            if rolling_stats:
+                self._update_rolling(
+                    self.devices[device_sn], now.timestamp(), now_local.date(), raw_by_sn[device_sn]
+                ) # Fresh samples only
+            if self.archive is not None:
+                self.archive.append(device_sn, now.timestamp(), raw_by_sn[device_sn])
+            self._aggregate_hourly(device_sn, now.timestamp(), raw_by_sn[device_sn])
+
+        # --- Slow sections, one inverter after another ---
+        # Each is the same call per inverter, and the cloud takes one call per second per path
+        for device_sn in self.devices:
+            try:
+                await self._async_update_slow_sections(device_sn, data[device_sn], current_time, now_local)
+            except FoxEssApiException as err:
+                raise self._update_failed(err) from err
+
+        for device_sn, device_data in data.items():
+            self._async_track_status(device_sn, device_data)
+
+        _LOGGER.debug(
+            "Coordinator update successful. Online: %s",
+            {device_sn: device_data["online"] for device_sn, device_data in data.items()},
+        )
+        self._store.async_delay_save(lambda: self._cache_payload, CACHE_SAVE_DELAY)
+        return data
+
+    async def _async_update_slow_sections(
+        self, device_sn: str, data: dict, current_time: datetime, now_local: datetime
+    ) -> None:
+        """Refresh device detail, battery settings and report of one inverter when due.
+
+        Each section fails on its own: its last known data is kept, its entities
+        become unavailable and it is retried on the next update. Only errors that
+        concern the whole entry (authentication, cancellation, or no identity yet
+        for the inverter) are raised.
+        """
+        state = self.devices[device_sn]
+        intervals = {
+            "device_detail": self.detail_interval,
+            "battery": self.battery_interval,
+            "report": self.report_interval,
+        }
+        # Device detail goes first, it tells whether a battery is fitted
+        for section, timestamp_field in SLOW_SECTIONS.items():
+            last_update = getattr(state, timestamp_field)
+            # Today's report values start at midnight, whatever the interval
+            new_day = section == "report" and state.report_date != now_local.date()
+            if last_update is not None and current_time - last_update < intervals[section] and not new_day:
+                continue
+            if section == "battery" and not data["device_detail"].get("hasBattery"):
+                continue
+            if section == "battery" and state.battery_before is not None:
+                continue # A change is in flight, its read-back refreshes the section
+            try:
+                if section == "report":
+                    data["report"], data["report_daily"] = await self._async_fetch_report(
+                        device_sn, now_local, data["report_daily"]
+                    )
+                else:
+                    data[section] = await self._async_fetch_section(section, device_sn)
+            except (FoxEssApiAuthError, FoxEssApiCancelledError):
+                raise
+            except FoxEssApiException as err:
+                if not self.device_detail(device_sn):
+                    raise # Entities can't be set up for an inverter whose identity is unknown
+                _LOGGER.warning("Failed to refresh %s for %s: %s", section, device_sn, err)
+                if section not in state.failed_sections:
+                    state.failed_sections.add(section)
+                    self._updated_contexts.add((device_sn, section))
+                    if section == "device_detail":
+                        self._updated_contexts.add((device_sn, "status")) # Its availability follows the detail
+                continue
+            if section == "device_detail" and (last_update is None or section in state.failed_sections):
+                self._updated_contexts.add((device_sn, "status"))
+            setattr(state, timestamp_field, current_time)
+            data[timestamp_field] = current_time
+            if section == "report":
+                state.report_date = now_local.date()
+            state.failed_sections.discard(section)
+            self._updated_contexts.add((device_sn, section))
+            _LOGGER.debug("Successfully fetched %s for %s", section, device_sn)
+
+    @callback
+    def _async_track_status(self, device_sn: str, device_data: dict) -> None:
+        """Fire events for status and fault transitions, and notify the status entities of them.
+
+        Nothing happens while the snapshot stays the same, so steady state
+        costs neither events nor state writes.
+        """
+        state = self.devices[device_sn]
+        snapshot = status_snapshot(state.status, device_data["raw"], device_data["device_detail"])
+        if snapshot == state.status:
+            return
+        status_events, fault_events = transitions(state.status, snapshot)
+        state.status = snapshot
+        self._updated_contexts.add((device_sn, "status"))
+        base = {"device_sn": device_sn, "plant": self.device_detail(device_sn).get("plantName")}
+        for event_data in status_events:
+            _LOGGER.debug("%s of %s changed: %s", event_data["field"], device_sn, event_data)
+            self.hass.bus.async_fire(EVENT_STATUS_CHANGED, {**base, **event_data})
+        for event_data in fault_events:
+            _LOGGER.info(
+                "Fault %s (%s) of %s %s",
+                event_data["code"], event_data["description"], device_sn, "raised" if event_data["active"] else "cleared",
+            )
+            self.hass.bus.async_fire(EVENT_FAULT, {**base, **event_data})
+
+    async def _async_fetch_section(self, section: str, device_sn: str) -> dict:
+        """Fetch the device detail or battery settings of an inverter."""
+        if section == "device_detail":
+            device_detail = await self.api_client.get_device_detail(device_sn)
+            self._set_device_detail(device_sn, device_detail) # Update stored info
+            return device_detail
+        return await self.api_client.get_battery_settings(device_sn)
+
+    async def _async_fetch_report(self, device_sn: str, now_local: datetime, report_daily: dict) -> tuple[dict, dict]:
+        """Fetch today's report values of an inverter, and the month's values per day."""
+        # Generation has its own small endpoint; the month report is only asked for the rest
+        generation, report_result = await asyncio.gather(
+            self.api_client.get_report_daily_generation(device_sn),
+            self.api_client.get_report(device_sn, REPORT_VARIABLES, now_local.date()),
+        )
+        report = self._process_report(report_result, now_local.day - 1)
+        if isinstance(generation, dict):
+            for field, variable in GENERATION_VARIABLES.items():
+                if (value := generation.get(field)) is not None:
+                    report[variable] = round(value, 3)
+        return report, self._process_report_daily(report_result, report, now_local.date(), report_daily)
+
+    def _update_failed(self, err: FoxEssApiException) -> UpdateFailed:
+        """Log an API error and return the UpdateFailed to raise for it."""
+        name = self.entry.title
+        if isinstance(err, FoxEssApiAuthError):
+            # Re-authentication might involve updating the API key via UI flow
+            # For now, just log and fail update. Re-auth flow needs config_flow changes.
+            _LOGGER.error("Authentication error connecting to FoxESS API for %s: %s", name, err)
+            return UpdateFailed(f"Authentication error: {err}")
+        if isinstance(err, FoxEssApiCancelledError):
+            _LOGGER.debug("Update cancelled for %s: %s", name, err)
+            return UpdateFailed(f"Update cancelled: {err}")
+        if isinstance(err, FoxEssApiTimeoutError):
+            _LOGGER.warning("Timeout connecting to FoxESS API for %s: %s", name, err)
+            return UpdateFailed(f"Timeout error: {err}")
+        if isinstance(err, FoxEssApiResponseError):
+            _LOGGER.warning("Invalid response from FoxESS API for %s: %s", name, err)
+            return UpdateFailed(f"Invalid response error: {err}")
+        _LOGGER.error("Unknown API error connecting to FoxESS API for %s: %s", name, err)
+        return UpdateFailed(f"Unknown API error: {err}")
+
+    async def async_analyze_strings(self, _now: datetime | None = None) -> None:
+        """Analyze the PV strings of every inverter from the archive, off the event loop."""
+        if self.archive is None or not self.data:
+            return
+        end = dt_util.utcnow()
+        contexts = set()
+        for device_sn in self.devices:
+            health = await self.hass.async_add_executor_job(analyze_strings, self.archive, device_sn, end)
+            if device_sn not in (self.data or {}):
+                continue
+            self.data[device_sn]["strings"] = string_sensors(health)
+            self._async_set_string_issues(device_sn, health)
+            contexts.add((device_sn, "strings"))
+        self._async_notify(contexts)
+
+    @callback
+    def _async_set_string_issues(self, device_sn: str, health: dict[str, dict]) -> None:
+        """Raise a repair issue for each problem found with a string, and delete those that cleared."""
+        state = self.devices[device_sn]
+        plant = self.device_detail(device_sn).get("plantName") or device_sn
+        raised = set()
+        for string, string_health in health.items():
+            for issue, value in string_health["issues"].items():
+                issue_id = f"{issue}_{device_sn}_{string}"
+                raised.add(issue_id)
+                ir.async_create_issue(
+                    self.hass,
+                    DOMAIN,
+                    issue_id,
+                    is_fixable=False,
+                    severity=ir.IssueSeverity.WARNING,
+                    translation_key=issue,
+                    translation_placeholders={
+                        "string": string.upper(), "plant": plant, "device_sn": device_sn, "value": str(value),
+                    },
+                )
+        for issue_id in state.string_issues - raised:
+            ir.async_delete_issue(self.hass, DOMAIN, issue_id)
+        state.string_issues = raised
+
+    def _aggregate_hourly(self, device_sn: str, timestamp: float, raw: dict) -> None:
+        """Add the statistics-only variables of a snapshot to the hour, and write the hour once it's over."""
+        state = self.devices[device_sn]
+        if not state.statistics_only and state.hourly.hour is None:
+            return
+        samples = {
+            key: float(value)
+            for key, value in raw.items()
+            if key in state.statistics_only and isinstance(value, (int, float)) and not isinstance(value, bool)
+        }
+        if (finished := state.hourly.add(timestamp, samples)) is not None:
+            plant = self.device_detail(device_sn).get("plantName") or device_sn
+            written = async_write_hour(self.hass, device_sn, *finished, state.statistics_only, plant)
+            _LOGGER.debug("Wrote %d hourly statistics of %s", written, device_sn)
+
+    @staticmethod
+    def _update_rolling(state: DeviceState, timestamp: float, day: date, raw: dict) -> None:
+        """Push the numeric raw values into the inverter's ring buffers (day in Home Assistant's time zone)."""
+        for variable, value in raw.items():
+            if isinstance(value, bool) or not isinstance(value, (int, float)):
+                continue
+            window = state.rolling.get(variable)
+            if window is None:
+                window = state.rolling[variable] = RollingWindow(ROLLING_WINDOW_SECONDS)
+            window.append(timestamp, value, day)
+
+    @staticmethod
+    def _process_report(report_result: list, today_index: int) -> dict:
+        """Extract today's values from the monthly report (matches old code logic)."""
+        processed_report = {}
+        for item in report_result:
+            variable = item.get("variable")
+            values = item.get("values")
+            if variable and values and isinstance(values, list) and len(values) > today_index:
+                today_value = values[today_index]
+                processed_report[variable] = round(today_value, 3) if today_value is not None else 0
+            else:
+                processed_report[variable] = 0 # Default if data missing
+        return processed_report
+
+    @staticmethod
+    def _process_report_daily(report_result: list, report: dict, today: date, previous: dict) -> dict:
+        """Return the value per day of the month of the month report's variables and of generation.
+
+        The month report has every day; generation comes from its own endpoint,
+        which only tells today's, so its other days are those seen this month.
+        """
+        month = today.strftime("%Y-%m")
+        days = calendar.monthrange(today.year, today.month)[1]
+        values = dict(previous.get("values", {})) if previous.get("month") == month else {}
+        for item in report_result:
+            if (variable := item.get("variable")) and isinstance(item.get("values"), list):
+                day_values = [round(value, 3) if isinstance(value, (int, float)) else None for value in item["values"]]
+                values[variable] = (day_values + [None] * days)[:days]
+        if (generation := report.get("generation")) is not None:
+            values["generation"] = list(values.get("generation") or [None] * days)
+            values["generation"][today.day - 1] = generation
+        return {"month": month, "day": today.isoformat(), "values": values}
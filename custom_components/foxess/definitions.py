@@ -1,5 +1,6 @@
 """Sensor entity descriptions for the FoxESS Cloud integration."""
 
+from homeassistant.components.number import NumberEntityDescription, NumberMode
 from homeassistant.components.sensor import (
     SensorDeviceClass,
     SensorEntityDescription,
@@ -14,6 +15,7 @@ from homeassistant.const import (
     UnitOfPower,
     UnitOfTemperature,
     UnitOfReactivePower,
+    EntityCategory,
 )
 
 # --- Sensor Entity Descriptions ---
@@ -91,7 +93,7 @@ BATTERY_SETTING_SENSORS: tuple[SensorEntityDescription, ...] = (
 )
 
 # Sensors that need data from the 'report' part of coordinator data
-# Keys here must match the structure returned by get_report in api.py
+# Keys here must match REPORT_VARIABLES in api.py and GENERATION_VARIABLES in coordinator.py
 REPORT_SENSORS: tuple[SensorEntityDescription, ...] = (
     SensorEntityDescription(key="generation", name="Energy Generated Today", native_unit_of_measurement=UnitOfEnergy.KILO_WATT_HOUR, device_class=SensorDeviceClass.ENERGY, state_class=SensorStateClass.TOTAL_INCREASING),
     SensorEntityDescription(key="feedin", name="Energy FeedIn Today", native_unit_of_measurement=UnitOfEnergy.KILO_WATT_HOUR, device_class=SensorDeviceClass.ENERGY, state_class=SensorStateClass.TOTAL_INCREASING),
@@ -99,7 +101,65 @@ REPORT_SENSORS: tuple[SensorEntityDescription, ...] = (
     SensorEntityDescription(key="chargeEnergyToTal", name="Energy Battery Charge Today", native_unit_of_measurement=UnitOfEnergy.KILO_WATT_HOUR, device_class=SensorDeviceClass.ENERGY, state_class=SensorStateClass.TOTAL_INCREASING),
     SensorEntityDescription(key="dischargeEnergyToTal", name="Energy Battery Discharge Today", native_unit_of_measurement=UnitOfEnergy.KILO_WATT_HOUR, device_class=SensorDeviceClass.ENERGY, state_class=SensorStateClass.TOTAL_INCREASING),
     SensorEntityDescription(key="loads", name="Energy Load Today", native_unit_of_measurement=UnitOfEnergy.KILO_WATT_HOUR, device_class=SensorDeviceClass.ENERGY, state_class=SensorStateClass.TOTAL_INCREASING),
-    # Add Month / Cumulative if API provides them consistently
+    # From the generation endpoint, see GENERATION_VARIABLES in coordinator.py
+    SensorEntityDescription(key="generationMonth", name="Energy Generated This Month", native_unit_of_measurement=UnitOfEnergy.KILO_WATT_HOUR, device_class=SensorDeviceClass.ENERGY, state_class=SensorStateClass.TOTAL_INCREASING),
+    SensorEntityDescription(key="generationTotal", name="Energy Generated Total", native_unit_of_measurement=UnitOfEnergy.KILO_WATT_HOUR, device_class=SensorDeviceClass.ENERGY, state_class=SensorStateClass.TOTAL_INCREASING),
 )
 
-# EXTENDED_PV_SENSOR_DESCRIPTIONS removed - Sensors will be created directly in sensor.py
\ No newline at end of file
+# Sensors computed by the coordinator from the 'raw' snapshot (see derived.py)
+# Keys here must match those returned by compute_derived
+DERIVED_SENSORS: tuple[SensorEntityDescription, ...] = (
+    SensorEntityDescription(key="selfConsumption", name="Self Consumption", native_unit_of_measurement=PERCENTAGE, state_class=SensorStateClass.MEASUREMENT, icon="mdi:home-lightning-bolt"),
+    SensorEntityDescription(key="selfSufficiency", name="Self Sufficiency", native_unit_of_measurement=PERCENTAGE, state_class=SensorStateClass.MEASUREMENT, icon="mdi:home-battery"),
+    SensorEntityDescription(key="netGridPower", name="Net Grid Power", native_unit_of_measurement=UnitOfPower.WATT, device_class=SensorDeviceClass.POWER, state_class=SensorStateClass.MEASUREMENT),
+    SensorEntityDescription(key="netBatteryPower", name="Net Battery Power", native_unit_of_measurement=UnitOfPower.WATT, device_class=SensorDeviceClass.POWER, state_class=SensorStateClass.MEASUREMENT),
+    SensorEntityDescription(key="houseLoadWithoutBattery", name="House Load Without Battery", native_unit_of_measurement=UnitOfPower.WATT, device_class=SensorDeviceClass.POWER, state_class=SensorStateClass.MEASUREMENT),
+    SensorEntityDescription(key="dcAcEfficiency", name="DC-AC Efficiency", native_unit_of_measurement=PERCENTAGE, state_class=SensorStateClass.MEASUREMENT, icon="mdi:sine-wave"),
+) + tuple(
+    SensorEntityDescription(key=f"pv{i}Share", name=f"PV{i} Share", native_unit_of_measurement=PERCENTAGE, state_class=SensorStateClass.MEASUREMENT, icon="mdi:solar-panel")
+    for i in range(1, 19)
+)
+
+# Diagnostic sensors of the PV string analysis, in the 'strings' part of coordinator data (see strings.py)
+# Keys here must match those returned by string_sensors
+STRING_HEALTH_SENSORS: tuple[SensorEntityDescription, ...] = tuple(
+    description
+    for i in range(1, 19)
+    for description in (
+        SensorEntityDescription(key=f"pv{i}NormalizedYield", name=f"PV{i} Normalized Yield", native_unit_of_measurement=PERCENTAGE, state_class=SensorStateClass.MEASUREMENT, entity_category=EntityCategory.DIAGNOSTIC, icon="mdi:solar-panel"),
+        SensorEntityDescription(key=f"pv{i}YieldTrend", name=f"PV{i} Yield Trend", native_unit_of_measurement=PERCENTAGE, state_class=SensorStateClass.MEASUREMENT, entity_category=EntityCategory.DIAGNOSTIC, icon="mdi:chart-line"), # Per 30 days
+        SensorEntityDescription(key=f"pv{i}VoltageDeviation", name=f"PV{i} Voltage Deviation", native_unit_of_measurement=PERCENTAGE, state_class=SensorStateClass.MEASUREMENT, entity_category=EntityCategory.DIAGNOSTIC, icon="mdi:sine-wave"),
+        SensorEntityDescription(key=f"pv{i}CurrentDeviation", name=f"PV{i} Current Deviation", native_unit_of_measurement=PERCENTAGE, state_class=SensorStateClass.MEASUREMENT, entity_category=EntityCategory.DIAGNOSTIC, icon="mdi:current-dc"),
+    )
+)
+
+# EXTENDED_PV_SENSOR_DESCRIPTIONS removed - Sensors will be created directly in sensor.py
+# Device and state class for the units the cloud reports, for variables without a description above
+UNIT_DEVICE_CLASSES: dict[str, tuple[str, SensorDeviceClass | None, SensorStateClass]] = {
+    "W": (UnitOfPower.WATT, SensorDeviceClass.POWER, SensorStateClass.MEASUREMENT),
+    "kW": (UnitOfPower.KILO_WATT, SensorDeviceClass.POWER, SensorStateClass.MEASUREMENT),
+    "V": (UnitOfElectricPotential.VOLT, SensorDeviceClass.VOLTAGE, SensorStateClass.MEASUREMENT),
+    "A": (UnitOfElectricCurrent.AMPERE, SensorDeviceClass.CURRENT, SensorStateClass.MEASUREMENT),
+    "Hz": (UnitOfFrequency.HERTZ, SensorDeviceClass.FREQUENCY, SensorStateClass.MEASUREMENT),
+    "℃": (UnitOfTemperature.CELSIUS, SensorDeviceClass.TEMPERATURE, SensorStateClass.MEASUREMENT),
+    "°C": (UnitOfTemperature.CELSIUS, SensorDeviceClass.TEMPERATURE, SensorStateClass.MEASUREMENT),
+    "%": (PERCENTAGE, None, SensorStateClass.MEASUREMENT),
+    "kWh": (UnitOfEnergy.KILO_WATT_HOUR, SensorDeviceClass.ENERGY, SensorStateClass.TOTAL_INCREASING),
+}
+
+
+def generated_description(key: str, value, unit: str = "", name: str = "") -> SensorEntityDescription:
+    """Build a description for a real-time variable from what the cloud reports about it."""
+    if unit in UNIT_DEVICE_CLASSES:
+        native_unit, device_class, state_class = UNIT_DEVICE_CLASSES[unit]
+        return SensorEntityDescription(key=key, name=name or key, native_unit_of_measurement=native_unit, device_class=device_class, state_class=state_class)
+    if isinstance(value, (int, float)) and not isinstance(value, bool):
+        # Numeric with an unknown (or no) unit: keep the cloud's unit as is
+        return SensorEntityDescription(key=key, name=name or key, native_unit_of_measurement=unit or None, state_class=SensorStateClass.MEASUREMENT)
+    return SensorEntityDescription(key=key, name=name or key) # Text, e.g. status strings
+
+# Battery settings that can be changed, as number entities writing the 'battery' section
+BATTERY_SETTING_NUMBERS: tuple[NumberEntityDescription, ...] = (
+    NumberEntityDescription(key="minSoc", name="Min SoC (Off Grid)", native_min_value=10, native_max_value=100, native_step=1, native_unit_of_measurement=PERCENTAGE, mode=NumberMode.SLIDER, icon="mdi:battery-arrow-down"),
+    NumberEntityDescription(key="minGridSoc", name="Min SoC (On Grid)", native_min_value=10, native_max_value=100, native_step=1, native_unit_of_measurement=PERCENTAGE, mode=NumberMode.SLIDER, icon="mdi:battery-arrow-down-outline"),
+)
@@ -0,0 +1,72 @@
+"""Power-flow and efficiency values derived from the raw FoxESS snapshot."""
+from __future__ import annotations
+
+from typing import Any
+
+MAX_PV_STRINGS = 18
+
+
+def _num(raw: dict, key: str) -> float | None:
+    """Return raw[key] as a float, or None if missing or not numeric."""
+    value = raw.get(key)
+    if value is None:
+        return None
+    try:
+        return float(value)
+    except (ValueError, TypeError):
+        return None
+
+
+def _percent(part: float, whole: float) -> float | None:
+    """Return part/whole as a percentage clamped to 0-100, or None if whole is not positive."""
+    if whole <= 0:
+        return None
+    return round(min(100.0, max(0.0, part / whole * 100)), 1)
+
+
+def compute_derived(raw: dict[str, Any]) -> dict[str, float | None]:
+    """Compute all derived values in one pass over a raw snapshot.
+
+    Powers keep the unit of their sources. A value is only present when all of
+    its inputs are, so sensors stay unavailable rather than showing made-up zeros;
+    ratios are None while undefined (e.g. shares of PV power at night).
+    """
+    derived: dict[str, float | None] = {}
+    pv = _num(raw, "pvPower")
+    generation = _num(raw, "generationPower")
+    load = _num(raw, "loadsPower")
+    feedin = _num(raw, "feedinPower")
+    grid = _num(raw, "gridConsumptionPower")
+    charge = _num(raw, "batChargePower")
+    discharge = _num(raw, "batDischargePower")
+
+    if grid is not None and feedin is not None:
+        # Positive when importing, negative when exporting
+        derived["netGridPower"] = round(grid - feedin, 3)
+
+    if charge is not None and discharge is not None:
+        # Positive when discharging, negative when charging
+        net_battery = discharge - charge
+        derived["netBatteryPower"] = round(net_battery, 3)
+        if load is not None:
+            # Load that PV and grid have to cover, i.e. without the battery's help
+            derived["houseLoadWithoutBattery"] = round(max(0.0, load - net_battery), 3)
+        if generation is not None and pv is not None:
+            # AC output over DC input (PV plus net battery discharge)
+            derived["dcAcEfficiency"] = _percent(generation, pv + net_battery)
+
+    if pv is not None and feedin is not None:
+        # Share of PV production used on site instead of exported
+        derived["selfConsumption"] = _percent(pv - feedin, pv)
+
+    if load is not None and grid is not None:
+        # Share of the load covered without importing from the grid
+        derived["selfSufficiency"] = _percent(load - grid, load)
+
+    if pv is not None:
+        for i in range(1, MAX_PV_STRINGS + 1):
+            string_power = _num(raw, f"pv{i}Power")
+            if string_power is not None:
+                derived[f"pv{i}Share"] = _percent(string_power, pv)
+
+    return derived
@@ -0,0 +1,39 @@
+"""Diagnostics support for FoxESS Cloud."""
+from __future__ import annotations
+
+from typing import Any
+
+from homeassistant.components.diagnostics import async_redact_data
+from homeassistant.config_entries import ConfigEntry
+from homeassistant.core import HomeAssistant
+
+from .const import CONF_API_KEY, CONF_PROXY, COORDINATOR, DOMAIN
+
+# The proxy URL may carry credentials
+TO_REDACT = {CONF_API_KEY, CONF_PROXY}
+
+
+async def async_get_config_entry_diagnostics(hass: HomeAssistant, entry: ConfigEntry) -> dict[str, Any]:
+    """Return diagnostics for a config entry: settings, API health and the latest data."""
+    coordinator = hass.data[DOMAIN][entry.entry_id][COORDINATOR]
+    api_client = coordinator.api_client
+    return {
+        "entry": {
+            "data": async_redact_data(dict(entry.data), TO_REDACT),
+            "options": async_redact_data(dict(entry.options), TO_REDACT),
+        },
+        "api": {
+            "base_url": api_client.base_url,
+            "proxy": api_client.proxy is not None,
+            # Probe latency and health of each base URL candidate
+            "endpoints": api_client.endpoint_stats,
+            # Request latency per API path
+            "latency": api_client.latency_stats,
+            "hedged_requests": api_client.hedged_requests,
+            # Server clock minus local clock (seconds) that signatures are corrected by
+            "clock_offset": api_client.clock_offset,
+            "clock_retries": api_client.clock_retries,
+            "budget": {"limit": coordinator.budget.limit, "used": coordinator.budget.used},
+        },
+        "data": coordinator.data,
+    }
@@ -0,0 +1,155 @@
+"""Fault and status transitions of an inverter, decoded from its latest data.
+
+The coordinator keeps a small status snapshot per inverter and fires events
+only when it changes, so automations can trigger on events instead of
+re-evaluating templates on every update.
+"""
+from __future__ import annotations
+
+import re
+from typing import Any
+
+# Real-time variables whose changes fire status events, plus the device detail's status
+RAW_STATUS_FIELDS = ("runningStatus", "invStatus", "dspStatus", "sysStatus")
+STATUS_FIELDS = ("status", *RAW_STATUS_FIELDS)
+FAULT_FIELD = "currentFault"
+SNAPSHOT_FAULTS = "faults" # Snapshot key holding the active fault codes
+
+DEVICE_STATUSES = {1: "online", 2: "alarm", 3: "offline"}
+RUNNING_STATES = {
+    160: "self-test",
+    161: "waiting",
+    162: "checking",
+    163: "on-grid",
+    164: "off-grid",
+    165: "fault",
+    166: "permanent-fault",
+    167: "standby",
+    168: "upgrading",
+    169: "fct",
+    170: "illegal",
+}
+# Decoders for the fields that have a code table
+STATUS_TABLES = {"status": DEVICE_STATUSES, "runningStatus": RUNNING_STATES}
+
+# Fault codes as numbered in the inverter manuals (H1/AC/KH series)
+FAULT_CODES = {
+    1: "Grid lost",
+    2: "Grid voltage",
+    3: "Grid frequency",
+    4: "10 min average grid voltage",
+    5: "Inverter current (software)",
+    6: "DC injection",
+    7: "Inverter current (hardware)",
+    8: "Bus voltage (software)",
+    9: "Battery voltage",
+    10: "Battery current (software)",
+    11: "Isolation",
+    12: "Residual current",
+    13: "PV voltage",
+    14: "PV current (software)",
+    15: "Temperature",
+    16: "Ground",
+    17: "Overload",
+    18: "EPS overload",
+    19: "Battery power low",
+    20: "Bus voltage (hardware)",
+    21: "PV current (hardware)",
+    22: "Battery current (hardware)",
+    23: "SCI communication",
+    24: "Master DSP SPI communication",
+    25: "Master DSP sampling",
+    26: "Residual current device",
+    27: "Inverter EEPROM",
+    28: "PV connection direction",
+    29: "Battery relay open",
+    30: "Battery relay short circuit",
+    31: "Battery buck",
+    32: "Battery boost",
+    33: "EPS relay",
+    34: "Battery reversed",
+    35: "Grid relay",
+    36: "Grid relay short circuit",
+    37: "Meter",
+    38: "Fan",
+    39: "BMS lost",
+    40: "BMS external",
+}
+_FAULT_SEPARATORS = re.compile(r"\s*[,;|]\s*")
+_NO_FAULT = {"", "0", "none", "normal", "no fault"}
+
+
+def decode_faults(value: Any) -> dict[str, str]:
+    """Return the active faults of a currentFault value, as code -> description.
+
+    The cloud reports nothing, one code, or several separated by commas;
+    codes outside the table and plain-text faults are passed through.
+    """
+    if value is None or isinstance(value, bool):
+        return {}
+    faults = {}
+    for token in _FAULT_SEPARATORS.split(str(value).strip()):
+        if token.lower() in _NO_FAULT:
+            continue
+        try:
+            code = int(float(token))
+        except ValueError:
+            faults[token] = token
+            continue
+        if code:
+            faults[str(code)] = FAULT_CODES.get(code, f"Fault {code}")
+    return faults
+
+
+def describe_status(field: str, value: Any) -> str | None:
+    """Return the description of a status code, if its field has a table."""
+    table = STATUS_TABLES.get(field)
+    if table is None or value is None:
+        return None
+    try:
+        return table.get(int(float(value)))
+    except (TypeError, ValueError):
+        return None
+
+
+def status_snapshot(previous: dict, raw: dict, device_detail: dict) -> dict:
+    """Return an inverter's status snapshot, carrying over fields the latest data lacks."""
+    snapshot = dict(previous)
+    if "status" in device_detail:
+        snapshot["status"] = device_detail["status"]
+    for field in RAW_STATUS_FIELDS:
+        if field in raw:
+            snapshot[field] = raw[field]
+    if FAULT_FIELD in raw:
+        snapshot[SNAPSHOT_FAULTS] = decode_faults(raw[FAULT_FIELD])
+    return snapshot
+
+
+def transitions(previous: dict, snapshot: dict) -> tuple[list[dict], list[dict]]:
+    """Return the status changes and fault changes between two snapshots, as event data.
+
+    Fields seen for the first time set the baseline and produce no events.
+    """
+    status_events = [
+        {
+            "field": field,
+            "from": previous[field],
+            "to": snapshot[field],
+            "description": describe_status(field, snapshot[field]),
+        }
+        for field in STATUS_FIELDS
+        if field in previous and field in snapshot and previous[field] != snapshot[field]
+    ]
+    fault_events = []
+    if SNAPSHOT_FAULTS in previous and SNAPSHOT_FAULTS in snapshot:
+        before, after = previous[SNAPSHOT_FAULTS], snapshot[SNAPSHOT_FAULTS]
+        fault_events = [
+            {"code": code, "description": description, "active": True}
+            for code, description in after.items()
+            if code not in before
+        ] + [
+            {"code": code, "description": description, "active": False}
+            for code, description in before.items()
+            if code not in after
+        ]
+    return status_events, fault_events
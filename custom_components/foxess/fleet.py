@@ -0,0 +1,299 @@
+"""Headless fleet poller for FoxESS Cloud, built on FoxEssApiClient.
+
+Polls many inverters across many API keys without Home Assistant:
+
+    python custom_components/foxess/fleet.py inventory.json --output out.jsonl
+
+Run as a script, it imports the API client beside it on its own: importing the
+integration package would need Home Assistant. Only aiohttp is required.
+
+The inventory is a JSON list of API keys and their devices:
+
+    [{"api_key": "...", "devices": ["SN1", "SN2"], "daily_budget": 2880}]
+
+``daily_budget`` is optional and defaults to DAILY_CALL_BUDGET per device.
+Each key's devices are queried in batches of up to REAL_QUERY_MAX_SNS, one
+call at a time and at most one per second (the cloud's limit per key).
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+from collections.abc import Callable
+from contextlib import ExitStack
+import csv
+import json
+import logging
+import os
+import statistics
+import sys
+import time
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from typing import Any
+
+import aiohttp
+
+if __package__:
+    from .api import CallBudget, DAILY_CALL_BUDGET, REAL_QUERY_MAX_SNS, FoxEssApiClient, FoxEssApiException
+else: # Run as a script, with this directory first on sys.path
+    from api import CallBudget, DAILY_CALL_BUDGET, REAL_QUERY_MAX_SNS, FoxEssApiClient, FoxEssApiException
+
+_LOGGER = logging.getLogger(__name__)
+
+DEFAULT_CONCURRENCY = 20 # API keys polled at the same time
+OUTPUT_FORMATS = ("jsonl", "csv", "parquet")
+
+
+@dataclass
+class FleetKey:
+    """One API key of the fleet, its inverters and the client polling them."""
+
+    device_sns: list[str]
+    client: FoxEssApiClient
+    budget: CallBudget
+
+
+@dataclass
+class FleetStats:
+    """Counters and latencies collected over a run."""
+
+    polls: int = 0 # Batch calls made
+    failures: int = 0
+    budget_skips: int = 0 # Batch calls not made for want of budget
+    latencies: list[float] = field(default_factory=list)
+    elapsed: float = 0.0
+
+    def summary(self) -> dict:
+        """Return throughput and latency figures for the run."""
+        latencies = sorted(self.latencies)
+        summary = {
+            "polls": self.polls,
+            "successes": len(latencies),
+            "failures": self.failures,
+            "budget_skips": self.budget_skips,
+            "elapsed_s": round(self.elapsed, 3),
+            "throughput_per_s": round(self.polls / self.elapsed, 2) if self.elapsed else 0.0,
+        }
+        if latencies:
+            summary["latency_mean_s"] = round(statistics.fmean(latencies), 3)
+            summary["latency_p50_s"] = round(statistics.median(latencies), 3)
+            summary["latency_p95_s"] = round(latencies[min(len(latencies) - 1, int(len(latencies) * 0.95))], 3)
+            summary["latency_max_s"] = round(latencies[-1], 3)
+        return summary
+
+
+def load_inventory(path: str, session: aiohttp.ClientSession) -> list[FleetKey]:
+    """Build one client and call budget per API key."""
+    with open(path, encoding="utf-8") as inventory_file:
+        inventory = json.load(inventory_file)
+
+    keys = []
+    for key_entry in inventory:
+        device_sns = list(key_entry.get("devices", []))
+        budget = CallBudget(key_entry.get("daily_budget", DAILY_CALL_BUDGET * len(device_sns)))
+        keys.append(FleetKey(device_sns, FoxEssApiClient(session, key_entry["api_key"], budget=budget), budget))
+    return keys
+
+
+async def _poll_key(key: FleetKey, semaphore: asyncio.Semaphore, stats: FleetStats, extend_pv: bool) -> list[dict]:
+    """Poll the real-time data of one key's devices in batches and return a snapshot record per device.
+
+    The batches go one after another; the client spaces calls to the batch
+    endpoint PATH_MIN_INTERVAL apart, so a key makes at most one query a second.
+    """
+    records = []
+    async with semaphore:
+        for start in range(0, len(key.device_sns), REAL_QUERY_MAX_SNS):
+            device_sns = key.device_sns[start:start + REAL_QUERY_MAX_SNS]
+            polled = datetime.now(timezone.utc).isoformat()
+            batch = [{"sn": device_sn, "time": polled} for device_sn in device_sns]
+            records.extend(batch)
+            if key.budget.remaining <= 0:
+                stats.budget_skips += 1
+                for record in batch:
+                    record["error"] = "daily call budget exhausted"
+                continue
+
+            stats.polls += 1
+            started = time.monotonic()
+            try:
+                data = await key.client.get_raw_data_batch(device_sns, extend_pv=extend_pv)
+            except FoxEssApiException as err:
+                stats.failures += 1
+                _LOGGER.warning("Polling %s failed: %s", ", ".join(device_sns), err)
+                for record in batch:
+                    record["error"] = str(err)
+                continue
+            latency = time.monotonic() - started
+            stats.latencies.append(latency)
+            for record in batch:
+                record["latency_s"] = round(latency, 3)
+                if record["sn"] in data:
+                    record["data"] = data[record["sn"]]
+                else:
+                    record["error"] = "no data returned"
+    return records
+
+
+async def poll_fleet(
+    keys: list[FleetKey],
+    rounds: int = 1,
+    interval: float = 60.0,
+    concurrency: int = DEFAULT_CONCURRENCY,
+    extend_pv: bool = False,
+    on_round: Callable[[list[dict]], None] | None = None,
+) -> FleetStats:
+    """Poll every device once per round, with up to `concurrency` keys at a time.
+
+    Each round's records are handed to `on_round` as soon as the round is over
+    and not kept, so memory doesn't grow with the number of rounds.
+    """
+    semaphore = asyncio.Semaphore(concurrency)
+    stats = FleetStats()
+    started = time.monotonic()
+    for round_index in range(rounds):
+        round_started = time.monotonic()
+        records = [
+            record
+            for key_records in await asyncio.gather(*(_poll_key(key, semaphore, stats, extend_pv) for key in keys))
+            for record in key_records
+        ]
+        if on_round is not None:
+            on_round(records)
+        if round_index < rounds - 1:
+            await asyncio.sleep(max(0.0, interval - (time.monotonic() - round_started)))
+    stats.elapsed = time.monotonic() - started
+    return stats
+
+
+def _number(value: Any) -> float | None:
+    """Return a value as a float for a Parquet column, or None if it isn't a number."""
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return None
+
+
+class RecordWriter:
+    """Write snapshot records round by round, as JSON lines or one column per variable (CSV/Parquet).
+
+    Every format replaces what the output held before the run, and each round
+    is flushed once written, so an interrupted run keeps the rounds before it.
+    The columns are the variables queried. Parquet goes to a directory of one
+    file per round, readable as one dataset: a file cut short has no footer.
+    """
+
+    def __init__(self, path: str, output_format: str, variables: list[str]) -> None:
+        """Open the output."""
+        self.path = path
+        self.output_format = output_format
+        self.columns = ["sn", "time", "latency_s", "error", *variables]
+        self._rounds = 0
+        self._file = None
+        self._csv = None
+        if output_format == "jsonl":
+            self._file = open(path, "w", encoding="utf-8")  # pylint: disable=consider-using-with
+        elif output_format == "csv":
+            self._file = open(path, "w", encoding="utf-8", newline="")  # pylint: disable=consider-using-with
+            self._csv = csv.DictWriter(self._file, fieldnames=self.columns, extrasaction="ignore")
+            self._csv.writeheader()
+        else:
+            try:
+                import pyarrow  # pylint: disable=import-outside-toplevel
+                import pyarrow.parquet  # pylint: disable=import-outside-toplevel,unused-import
+            except ImportError as err:
+                raise SystemExit("Parquet output requires the 'pyarrow' package") from err
+            self._pyarrow = pyarrow
+            self._schema = pyarrow.schema([
+                ("sn", pyarrow.string()),
+                ("time", pyarrow.string()),
+                ("latency_s", pyarrow.float64()),
+                ("error", pyarrow.string()),
+                *((variable, pyarrow.float64()) for variable in variables),
+            ])
+            os.makedirs(path, exist_ok=True)
+            for name in os.listdir(path):
+                if name.startswith("round-") and name.endswith(".parquet"):
+                    os.remove(os.path.join(path, name))
+
+    def write(self, records: list[dict]) -> None:
+        """Write one round's records."""
+        self._rounds += 1
+        if self.output_format == "jsonl":
+            for record in records:
+                self._file.write(json.dumps(record, separators=(",", ":")) + "\n")
+            self._file.flush()
+            return
+
+        rows = [
+            {**{column: record.get(column) for column in self.columns[:4]}, **record.get("data", {})}
+            for record in records
+        ]
+        if self._csv is not None:
+            self._csv.writerows(rows)
+            self._file.flush()
+            return
+
+        table = self._pyarrow.table(
+            {
+                column: [row.get(column) if index < 4 else _number(row.get(column)) for row in rows]
+                for index, column in enumerate(self.columns)
+            },
+            schema=self._schema,
+        )
+        self._pyarrow.parquet.write_table(table, os.path.join(self.path, f"round-{self._rounds:05d}.parquet"))
+
+    def close(self) -> None:
+        """Close the output file."""
+        if self._file is not None:
+            self._file.close()
+
+    def __enter__(self) -> RecordWriter:
+        return self
+
+    def __exit__(self, *exc_info: Any) -> None:
+        self.close()
+
+
+async def _async_main(args: argparse.Namespace) -> dict:
+    """Run the poller with parsed arguments and return the run summary."""
+    with ExitStack() as stack:
+        on_round = None
+        if args.output:
+            variables = FoxEssApiClient._build_variables(args.extend_pv, None)
+            on_round = stack.enter_context(RecordWriter(args.output, args.format, variables)).write
+        async with aiohttp.ClientSession() as session:
+            keys = load_inventory(args.inventory, session)
+            _LOGGER.info(
+                "Polling %d devices of %d keys, %d round(s), concurrency %d",
+                sum(len(key.device_sns) for key in keys), len(keys), args.rounds, args.concurrency,
+            )
+            stats = await poll_fleet(
+                keys, args.rounds, args.interval, args.concurrency, args.extend_pv, on_round
+            )
+    return stats.summary()
+
+
+def main(argv: list[str] | None = None) -> int:
+    """Command line entry point."""
+    parser = argparse.ArgumentParser(description="Poll a fleet of FoxESS inverters.")
+    parser.add_argument("inventory", help="JSON inventory of API keys and device serial numbers")
+    parser.add_argument("--output", help="File (Parquet: directory) to write snapshots to, replacing its contents")
+    parser.add_argument("--format", choices=OUTPUT_FORMATS, default="jsonl", help="Output file format")
+    parser.add_argument("--rounds", type=int, default=1, help="Number of polling rounds")
+    parser.add_argument("--interval", type=float, default=60.0, help="Seconds between round starts")
+    parser.add_argument("--concurrency", type=int, default=DEFAULT_CONCURRENCY, help="API keys polled at the same time")
+    parser.add_argument("--extend-pv", action="store_true", help="Include PV strings 5-18")
+    parser.add_argument("--verbose", action="store_true", help="Enable debug logging")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.DEBUG if args.verbose else logging.INFO)
+    summary = asyncio.run(_async_main(args))
+    json.dump(summary, sys.stdout, indent=2)
+    sys.stdout.write("\n")
+    return 0 if summary["failures"] == 0 else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
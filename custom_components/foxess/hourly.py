@@ -0,0 +1,129 @@
+"""Statistics-only mode: hourly mean/min/max of real-time variables as external statistics.
+
+Variables of the groups picked in the options get no entity, so the recorder
+stores neither a state row per sample nor 5-minute statistics for them.
+Their samples are aggregated in memory instead, and each finished hour is
+written to the recorder as long-term statistics ``foxess:<serial>_<variable>``,
+which statistics graph cards can show.
+"""
+from __future__ import annotations
+
+from datetime import datetime, timezone
+import re
+from typing import Any
+
+from homeassistant.components.sensor import SensorDeviceClass, SensorEntityDescription, SensorStateClass
+from homeassistant.core import HomeAssistant, callback
+from homeassistant.util import slugify
+
+from .const import DOMAIN
+
+HOUR = 3600
+
+# Groups that can be switched to statistics-only -> label in the options
+STATISTICS_GROUPS = {
+    "pv_strings": "PV strings (power, voltage, current)",
+    "voltage": "Voltages",
+    "current": "Currents",
+    "frequency": "Frequencies",
+    "temperature": "Temperatures",
+}
+_GROUP_DEVICE_CLASSES = {
+    SensorDeviceClass.VOLTAGE: "voltage",
+    SensorDeviceClass.CURRENT: "current",
+    SensorDeviceClass.FREQUENCY: "frequency",
+    SensorDeviceClass.TEMPERATURE: "temperature",
+}
+_PV_STRING_RE = re.compile(r"^pv\d+(Power|Volt|Current)$")
+
+
+def statistics_group(description: SensorEntityDescription) -> str | None:
+    """Return the statistics-only group of a measurement sensor, if it has one."""
+    if description.state_class != SensorStateClass.MEASUREMENT:
+        return None
+    if _PV_STRING_RE.match(description.key):
+        return "pv_strings"
+    return _GROUP_DEVICE_CLASSES.get(description.device_class)
+
+
+def statistic_id(device_sn: str, key: str) -> str:
+    """Return the external statistic ID of an inverter's variable."""
+    return f"{DOMAIN}:{slugify(device_sn)}_{slugify(key)}"
+
+
+class HourlyAggregate:
+    """Sum, count, min and max of the current hour's samples, per variable."""
+
+    __slots__ = ("hour", "values")
+
+    def __init__(self, hour: float | None = None, values: dict[str, list[float]] | None = None) -> None:
+        """Initialize, optionally with an hour restored from the cache."""
+        self.hour = hour # Start of the hour being aggregated (seconds since the epoch)
+        self.values: dict[str, list[float]] = values or {} # variable -> [sum, count, min, max]
+
+    def add(self, timestamp: float, samples: dict[str, float]) -> tuple[float, dict[str, list[float]]] | None:
+        """Add one update's samples; returns the previous hour and its values once a new hour starts."""
+        hour = timestamp - timestamp % HOUR
+        finished = None
+        if hour != self.hour:
+            if self.hour is not None and self.values:
+                finished = (self.hour, self.values)
+            self.hour, self.values = hour, {}
+        for key, value in samples.items():
+            if (aggregate := self.values.get(key)) is None:
+                self.values[key] = [value, 1, value, value]
+            else:
+                aggregate[0] += value
+                aggregate[1] += 1
+                aggregate[2] = min(aggregate[2], value)
+                aggregate[3] = max(aggregate[3], value)
+        return finished
+
+    def as_dict(self) -> dict[str, Any]:
+        """Return the aggregate for the cache, so a restart keeps the hour's samples."""
+        return {"hour": self.hour, "values": self.values}
+
+    @classmethod
+    def from_dict(cls, data: dict[str, Any] | None) -> HourlyAggregate:
+        """Restore an aggregate from the cache."""
+        data = data or {}
+        return cls(data.get("hour"), {key: list(values) for key, values in (data.get("values") or {}).items()})
+
+
+@callback
+def async_write_hour(
+    hass: HomeAssistant,
+    device_sn: str,
+    hour: float,
+    values: dict[str, list[float]],
+    descriptions: dict[str, SensorEntityDescription],
+    plant: str,
+) -> int:
+    """Queue one finished hour of an inverter's variables with the recorder; returns the statistics written.
+
+    Does nothing without the recorder, e.g. when it's excluded from the configuration.
+    """
+    if "recorder" not in hass.config.components:
+        return 0
+    # Imported here: the recorder is optional, and importing it loads the database stack
+    from homeassistant.components.recorder.models import StatisticData, StatisticMetaData
+    from homeassistant.components.recorder.statistics import async_add_external_statistics
+
+    start = datetime.fromtimestamp(hour, tz=timezone.utc)
+    written = 0
+    for key, (total, count, minimum, maximum) in values.items():
+        if (description := descriptions.get(key)) is None:
+            continue # Its group was switched back to entities meanwhile
+        metadata = StatisticMetaData(
+            has_mean=True,
+            has_sum=False,
+            name=f"{plant} {description.name}",
+            source=DOMAIN,
+            statistic_id=statistic_id(device_sn, key),
+            unit_of_measurement=description.native_unit_of_measurement,
+        )
+        async_add_external_statistics(
+            hass, metadata, [StatisticData(start=start, mean=total / count, min=minimum, max=maximum)]
+        )
+        written += 1
+    return written
@@ -0,0 +1,278 @@
+"""Local, FoxESS OpenAPI compatible endpoints answering from the coordinator's cached sections.
+
+Node-RED flows and scripts written against the cloud can point at Home
+Assistant instead, e.g. ``/api/foxess/op/v0/device/detail?sn=...``, signing
+requests with the entry's API key as for the cloud, or sending a long-lived
+access token instead. Answers use the cloud's errno/result envelope and cost
+no API calls; only inverters of entries with the Local API option enabled are
+served.
+"""
+from __future__ import annotations
+
+import calendar
+from datetime import timezone
+import hmac
+from json import JSONDecodeError
+import time
+from typing import TYPE_CHECKING, Any
+
+from aiohttp import web
+
+from homeassistant.components.http import KEY_AUTHENTICATED, HomeAssistantView
+from homeassistant.core import HomeAssistant
+from homeassistant.util import dt as dt_util
+
+from .api import request_signature
+from .const import CONF_API_KEY, CONF_LOCAL_API, COORDINATOR, DOMAIN, LOCAL_API_URL
+
+if TYPE_CHECKING:
+    from .coordinator import FoxEssDataUpdateCoordinator
+
+# Error numbers as the cloud uses them
+ERRNO_MISSING_HEADERS = 40256
+ERRNO_INVALID_BODY = 40257
+ERRNO_INVALID_TOKEN = 41809
+ERRNO_UNKNOWN_DEVICE = 41930
+
+REPORT_UNIT = "kWh"
+SIGNATURE_MAX_AGE = 300 # Seconds a signed request's timestamp may be off the local clock
+
+
+def find_coordinator(hass: HomeAssistant, device_sn: str | None) -> FoxEssDataUpdateCoordinator | None:
+    """Return the coordinator serving an inverter, if its entry has the local API enabled."""
+    for entry_data in hass.data.get(DOMAIN, {}).values():
+        coordinator = entry_data.get(COORDINATOR)
+        if (
+            coordinator is not None
+            and device_sn in coordinator.devices
+            and coordinator.entry.options.get(CONF_LOCAL_API, False)
+        ):
+            return coordinator
+    return None
+
+
+def real_query_result(coordinator: FoxEssDataUpdateCoordinator, device_sn: str, variables: list | None) -> dict:
+    """Return one inverter's item of a real-time query response; offline inverters have no datas."""
+    device_data = (coordinator.data or {}).get(device_sn, {})
+    raw = device_data.get("raw") or {}
+    variable_info = coordinator.api_client.variable_info
+    datas = [
+        {
+            "variable": variable,
+            "unit": variable_info.get(variable, {}).get("unit", ""),
+            "name": variable_info.get(variable, {}).get("name", ""),
+            "value": value,
+        }
+        for variable, value in raw.items()
+        if not variables or variable in variables
+    ]
+    item: dict[str, Any] = {"datas": datas, "deviceSN": device_sn}
+    if (last_update := device_data.get("last_update_raw")) is not None:
+        # Naive UTC, like all coordinator timestamps; the cloud reports local time with its offset
+        item["time"] = dt_util.as_local(last_update.replace(tzinfo=timezone.utc)).strftime("%Y-%m-%d %H:%M:%S %Z%z")
+    return item
+
+
+def report_result(coordinator: FoxEssDataUpdateCoordinator, device_sn: str, variables: list) -> list[dict]:
+    """Return a day-dimension report of the current month from the cached values per day.
+
+    Days the coordinator has no value for are null: generation before Home
+    Assistant started, and all but today for variables outside the month report.
+    Today is Home Assistant's, as are the days the coordinator keys the cached
+    values by; until it has fetched the new day's report, today is null.
+    """
+    device_data = (coordinator.data or {}).get(device_sn, {})
+    report = device_data.get("report") or {}
+    report_daily = device_data.get("report_daily") or {}
+    today = dt_util.now().date()
+    days = calendar.monthrange(today.year, today.month)[1]
+    month_values = report_daily.get("values", {}) if report_daily.get("month") == today.strftime("%Y-%m") else {}
+    result = []
+    for variable in variables:
+        values: list[float | None] = list(month_values.get(variable) or [])
+        if not values:
+            values = [None] * days
+            if report_daily.get("day") == today.isoformat():
+                values[today.day - 1] = report.get(variable)
+        result.append({"variable": variable, "unit": REPORT_UNIT, "values": values})
+    return result
+
+
+class _LocalApiView(HomeAssistantView):
+    """Base of the local endpoints: authorization, envelopes and request parsing.
+
+    Home Assistant's authentication is optional here, so clients of the cloud
+    can sign requests with an entry's API key instead; see _authorized().
+    """
+
+    requires_auth = False
+
+    @staticmethod
+    def _envelope(result: Any, errno: int = 0, msg: str = "success") -> web.Response:
+        """Return a response in the cloud's envelope (errors are HTTP 200 there too)."""
+        return HomeAssistantView.json({"errno": errno, "msg": msg, "result": result})
+
+    def _unknown(self, device_sn: Any) -> web.Response:
+        return self._envelope(None, ERRNO_UNKNOWN_DEVICE, f"Inverter {device_sn} isn't served locally")
+
+    @staticmethod
+    def _authorized(request: web.Request, coordinator: FoxEssDataUpdateCoordinator) -> bool:
+        """Return whether a request may read an entry's inverters.
+
+        Requests authenticated by Home Assistant may, as may those carrying the
+        entry's API key with a signature built like the client's own, whose
+        timestamp is within SIGNATURE_MAX_AGE of the local clock.
+        """
+        if request.get(KEY_AUTHENTICATED):
+            return True
+        token, timestamp, signature = (request.headers.get(name, "") for name in ("token", "timestamp", "signature"))
+        try:
+            if abs(time.time() - int(timestamp) / 1000) > SIGNATURE_MAX_AGE:
+                return False
+        except ValueError:
+            return False
+        # Signed for the cloud's path, without the local prefix
+        path = request.path.removeprefix(LOCAL_API_URL)
+        return hmac.compare_digest(token.encode(), coordinator.entry.data[CONF_API_KEY].encode()) and hmac.compare_digest(
+            signature.lower().encode(), request_signature(path, token, timestamp).encode()
+        )
+
+    def _missing_headers(self, request: web.Request) -> web.Response | None:
+        """Return the error for a request with neither Home Assistant authentication nor signature headers."""
+        if request.get(KEY_AUTHENTICATED) or all(
+            request.headers.get(name) for name in ("token", "timestamp", "signature")
+        ):
+            return None
+        return self._envelope(None, ERRNO_MISSING_HEADERS, "Request header parameters are missing")
+
+    def _invalid_token(self) -> web.Response:
+        return self._envelope(None, ERRNO_INVALID_TOKEN, "Invalid token or signature")
+
+    def _find(
+        self, request: web.Request, device_sn: Any
+    ) -> tuple[FoxEssDataUpdateCoordinator | None, web.Response | None]:
+        """Return the coordinator serving an inverter to this request, or the error response to send.
+
+        Signed requests get the same error for unknown inverters as for a wrong
+        key, so they can't tell which serial numbers are served.
+        """
+        if (error := self._missing_headers(request)) is not None:
+            return None, error
+        coordinator = find_coordinator(request.app["hass"], device_sn)
+        if coordinator is not None and self._authorized(request, coordinator):
+            return coordinator, None
+        if request.get(KEY_AUTHENTICATED):
+            return None, self._unknown(device_sn)
+        return None, self._invalid_token()
+
+    async def _body(self, request: web.Request) -> dict | None:
+        """Return the JSON object posted, or None if it isn't one."""
+        try:
+            body = await request.json()
+        except (JSONDecodeError, ValueError):
+            return None
+        return body if isinstance(body, dict) else None
+
+
+class FoxEssLocalRealQueryView(_LocalApiView):
+    """Real-time data of one inverter, like /op/v0/device/real/query."""
+
+    url = f"{LOCAL_API_URL}/op/v0/device/real/query"
+    name = "api:foxess:op:v0:device:real:query"
+
+    async def post(self, request: web.Request) -> web.Response:
+        """Return the latest real-time values."""
+        if (body := await self._body(request)) is None:
+            return self._envelope(None, ERRNO_INVALID_BODY, "Invalid request body")
+        device_sn = body.get("sn")
+        coordinator, error = self._find(request, device_sn)
+        if error is not None:
+            return error
+        return self._envelope([real_query_result(coordinator, device_sn, body.get("variables"))])
+
+
+class FoxEssLocalRealQueryBatchView(_LocalApiView):
+    """Real-time data of several inverters, like /op/v1/device/real/query."""
+
+    url = f"{LOCAL_API_URL}/op/v1/device/real/query"
+    name = "api:foxess:op:v1:device:real:query"
+
+    async def post(self, request: web.Request) -> web.Response:
+        """Return the latest real-time values of the inverters served locally."""
+        if (body := await self._body(request)) is None or not isinstance(body.get("sns"), list):
+            return self._envelope(None, ERRNO_INVALID_BODY, "Invalid request body")
+        if (error := self._missing_headers(request)) is not None:
+            return error
+        hass = request.app["hass"]
+        found = [(device_sn, find_coordinator(hass, device_sn)) for device_sn in body["sns"]]
+        result = [
+            real_query_result(coordinator, device_sn, body.get("variables"))
+            for device_sn, coordinator in found
+            if coordinator is not None and self._authorized(request, coordinator)
+        ]
+        if not result:
+            if request.get(KEY_AUTHENTICATED):
+                return self._unknown(", ".join(map(str, body["sns"])))
+            return self._invalid_token() # As _find(), whether or not any inverter is served
+        return self._envelope(result)
+
+
+class FoxEssLocalDeviceDetailView(_LocalApiView):
+    """Device detail, like /op/v0/device/detail."""
+
+    url = f"{LOCAL_API_URL}/op/v0/device/detail"
+    name = "api:foxess:op:v0:device:detail"
+
+    async def get(self, request: web.Request) -> web.Response:
+        """Return the last known device detail."""
+        device_sn = request.query.get("sn")
+        coordinator, error = self._find(request, device_sn)
+        if error is not None:
+            return error
+        return self._envelope(coordinator.device_detail(device_sn))
+
+
+class FoxEssLocalBatterySocView(_LocalApiView):
+    """Battery SoC limits, like /op/v0/device/battery/soc/get."""
+
+    url = f"{LOCAL_API_URL}/op/v0/device/battery/soc/get"
+    name = "api:foxess:op:v0:device:battery:soc:get"
+
+    async def get(self, request: web.Request) -> web.Response:
+        """Return the last known battery settings, under the cloud's key names."""
+        device_sn = request.query.get("sn")
+        coordinator, error = self._find(request, device_sn)
+        if error is not None:
+            return error
+        battery = (coordinator.data or {}).get(device_sn, {}).get("battery") or {}
+        return self._envelope({"minSocOnGrid" if key == "minGridSoc" else key: value for key, value in battery.items()})
+
+
+class FoxEssLocalReportView(_LocalApiView):
+    """Energy report, like /op/v0/device/report/query, for the current month by day only."""
+
+    url = f"{LOCAL_API_URL}/op/v0/device/report/query"
+    name = "api:foxess:op:v0:device:report:query"
+
+    async def post(self, request: web.Request) -> web.Response:
+        """Return the month's cached report values."""
+        if (body := await self._body(request)) is None or not isinstance(body.get("variables"), list):
+            return self._envelope(None, ERRNO_INVALID_BODY, "Invalid request body")
+        device_sn = body.get("sn")
+        coordinator, error = self._find(request, device_sn)
+        if error is not None:
+            return error
+        today = dt_util.now()
+        requested = (str(body.get("year")), str(body.get("month"))) # Numbers, or numeric strings
+        if body.get("dimension", "day") != "day" or requested != (str(today.year), str(today.month)):
+            return self._envelope(None, ERRNO_INVALID_BODY, "Only the current month by day is served locally")
+        return self._envelope(report_result(coordinator, device_sn, body["variables"]))
+
+
+LOCAL_API_VIEWS = (
+    FoxEssLocalRealQueryView,
+    FoxEssLocalRealQueryBatchView,
+    FoxEssLocalDeviceDetailView,
+    FoxEssLocalBatterySocView,
+    FoxEssLocalReportView,
+)
@@ -0,0 +1,113 @@
+"""Prometheus exposition of the latest coordinator snapshots.
+
+An entry's samples are rendered by the first scrape after each coordinator
+update and cached until the next one, so scrapes cost no API calls and don't
+go through the state machine, and updates nobody scrapes cost nothing.
+"""
+from __future__ import annotations
+
+from collections.abc import Callable
+from datetime import timezone
+from typing import TYPE_CHECKING, Any
+
+from aiohttp import web
+
+from homeassistant.components.http import HomeAssistantView
+from homeassistant.core import HomeAssistant, callback
+
+from .const import COORDINATOR, DOMAIN, METRICS, METRICS_URL
+
+if TYPE_CHECKING:
+    from .coordinator import FoxEssDataUpdateCoordinator
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+# Metric families: name -> (help text, section of the device data with variable:value pairs)
+SECTION_FAMILIES = {
+    "foxess_realtime": ("Latest real-time value of a FoxESS variable", "raw"),
+    "foxess_derived": ("Value derived from the latest real-time data", "derived"),
+    "foxess_battery_setting": ("Battery setting of a FoxESS inverter", "battery"),
+    "foxess_report_today": ("Energy report value of a FoxESS inverter in kWh, today's unless the variable says otherwise", "report"),
+}
+DEVICE_FAMILIES = {
+    "foxess_online": "1 if the inverter returned real-time data in the last update",
+    "foxess_last_update_timestamp_seconds": "Time of the last successful real-time update",
+}
+
+
+def _escape(value: Any) -> str:
+    """Escape a label value."""
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _sample(value: Any) -> str | None:
+    """Return a sample value, or None for non-numeric values."""
+    if isinstance(value, bool):
+        return "1" if value else "0"
+    if isinstance(value, (int, float)):
+        return repr(float(value))
+    return None
+
+
+def render_entry(coordinator: FoxEssDataUpdateCoordinator) -> dict[str, list[str]]:
+    """Return the sample lines of one entry's inverters, per metric family."""
+    families: dict[str, list[str]] = {name: [] for name in (*SECTION_FAMILIES, *DEVICE_FAMILIES)}
+    for device_sn, device_data in (coordinator.data or {}).items():
+        plant = coordinator.device_detail(device_sn).get("plantName", "")
+        labels = f'serial="{_escape(device_sn)}",plant="{_escape(plant)}"'
+        for name, (_, section) in SECTION_FAMILIES.items():
+            for variable, value in sorted((device_data.get(section) or {}).items()):
+                if (sample := _sample(value)) is not None:
+                    families[name].append(f'{name}{{{labels},variable="{_escape(variable)}"}} {sample}')
+        families["foxess_online"].append(f"foxess_online{{{labels}}} {int(bool(device_data.get('online')))}")
+        if (last_update := device_data.get("last_update_raw")) is not None:
+            timestamp = last_update.replace(tzinfo=timezone.utc).timestamp() # Naive UTC, like all coordinator timestamps
+            families["foxess_last_update_timestamp_seconds"].append(
+                f"foxess_last_update_timestamp_seconds{{{labels}}} {timestamp}"
+            )
+    return families
+
+
+def render(entries: list[dict[str, list[str]]]) -> str:
+    """Join rendered entries into one exposition, with each family's header once."""
+    lines = []
+    for name in (*SECTION_FAMILIES, *DEVICE_FAMILIES):
+        help_text = SECTION_FAMILIES[name][0] if name in SECTION_FAMILIES else DEVICE_FAMILIES[name]
+        lines.append(f"# HELP {name} {help_text}")
+        lines.append(f"# TYPE {name} gauge")
+        for families in entries:
+            lines.extend(families.get(name, ()))
+    return "\n".join(lines) + "\n"
+
+
+@callback
+def async_track_metrics(hass: HomeAssistant, coordinator: FoxEssDataUpdateCoordinator) -> Callable[[], None]:
+    """Drop an entry's rendered metrics after every coordinator update; returns the unsubscribe."""
+    entry_data = hass.data[DOMAIN][coordinator.entry.entry_id]
+    entry_data[METRICS] = None # Rendered by the next scrape
+
+    @callback
+    def _async_invalidate() -> None:
+        entry_data[METRICS] = None
+
+    # No context, so this hears about every update of every section
+    return coordinator.async_add_listener(_async_invalidate)
+
+
+class FoxEssMetricsView(HomeAssistantView):
+    """Serve the cached snapshots of all loaded entries in Prometheus format."""
+
+    url = METRICS_URL
+    name = "api:foxess:metrics"
+
+    async def get(self, request: web.Request) -> web.Response:
+        """Return the metrics."""
+        hass: HomeAssistant = request.app["hass"]
+        entries = []
+        for entry_data in hass.data.get(DOMAIN, {}).values():
+            if METRICS not in entry_data:
+                continue
+            if entry_data[METRICS] is None:
+                entry_data[METRICS] = render_entry(entry_data[COORDINATOR])
+            entries.append(entry_data[METRICS])
+        return web.Response(body=render(entries).encode(), headers={"Content-Type": CONTENT_TYPE})
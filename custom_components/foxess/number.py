@@ -0,0 +1,85 @@
+"""Number platform for FoxESS Cloud integration (battery SoC limits)."""
+from __future__ import annotations
+
+import logging
+
+from homeassistant.components.number import NumberEntity, NumberEntityDescription
+from homeassistant.config_entries import ConfigEntry
+from homeassistant.core import HomeAssistant, callback
+from homeassistant.exceptions import HomeAssistantError
+from homeassistant.helpers.device_registry import DeviceInfo
+from homeassistant.helpers.entity_platform import AddEntitiesCallback
+from homeassistant.helpers.update_coordinator import CoordinatorEntity
+
+from .const import COORDINATOR, DOMAIN
+from .definitions import BATTERY_SETTING_NUMBERS
+
+_LOGGER = logging.getLogger(__name__)
+
+
+async def async_setup_entry(
+    hass: HomeAssistant,
+    entry: ConfigEntry,
+    async_add_entities: AddEntitiesCallback,
+) -> None:
+    """Set up FoxESS Cloud battery setting numbers based on a config entry."""
+    coordinator = hass.data[DOMAIN][entry.entry_id][COORDINATOR]
+    created: set[tuple[str, str]] = set()
+
+    @callback
+    def _async_add_numbers() -> None:
+        """Add numbers for the battery settings inverters report, once they do."""
+        new_entities = []
+        for device_sn, device_data in (coordinator.data or {}).items():
+            battery = device_data.get("battery") or {}
+            for description in BATTERY_SETTING_NUMBERS:
+                if description.key in battery and (device_sn, description.key) not in created:
+                    created.add((device_sn, description.key))
+                    new_entities.append(FoxEssBatterySettingNumber(coordinator, description, device_sn))
+        if new_entities:
+            async_add_entities(new_entities)
+
+    _async_add_numbers()
+    entry.async_on_unload(coordinator.async_add_listener(_async_add_numbers))
+
+
+class FoxEssBatterySettingNumber(CoordinatorEntity, NumberEntity):
+    """A battery SoC limit, written through the coordinator's battery section."""
+
+    _attr_has_entity_name = True
+
+    def __init__(self, coordinator, description: NumberEntityDescription, device_sn: str) -> None:
+        """Initialize the number."""
+        super().__init__(coordinator, (device_sn, "battery"))
+        self.entity_description = description
+        self._device_sn = device_sn
+        unique_base = coordinator.devices[device_sn].unique_base
+        self._attr_unique_id = f"{unique_base}_{description.key}"
+        # The sensor platform fills in the rest of the device
+        self._attr_device_info = DeviceInfo(identifiers={(DOMAIN, device_sn)})
+
+    @property
+    def _battery(self) -> dict:
+        """Return this inverter's battery settings."""
+        return ((self.coordinator.data or {}).get(self._device_sn) or {}).get("battery") or {}
+
+    @property
+    def available(self) -> bool:
+        """Return True if the battery settings are known."""
+        return (
+            self.coordinator.section_available(self._device_sn, "battery")
+            and self.entity_description.key in self._battery
+        )
+
+    @property
+    def native_value(self) -> float | None:
+        """Return the current (or pending) limit."""
+        value = self._battery.get(self.entity_description.key)
+        return float(value) if value is not None else None
+
+    async def async_set_native_value(self, value: float) -> None:
+        """Change the limit; the coordinator debounces and writes it."""
+        battery = {**self._battery, self.entity_description.key: int(value)}
+        if battery.get("minGridSoc", 100) < battery.get("minSoc", 0):
+            raise HomeAssistantError("Min SoC (On Grid) can't be lower than Min SoC (Off Grid)")
+        self.coordinator.async_set_battery_setting(self._device_sn, self.entity_description.key, int(value))
@@ -0,0 +1,170 @@
+"""On-demand profiling of coordinator update cycles (foxess.profile service)."""
+from __future__ import annotations
+
+import asyncio
+import cProfile
+import io
+import logging
+import pstats
+import time
+from collections.abc import Callable
+from typing import TYPE_CHECKING, Any
+
+from homeassistant.core import HomeAssistant, callback
+from homeassistant.util import dt as dt_util
+
+from .const import DATA_PROFILE_LOCK
+
+if TYPE_CHECKING:
+    from .coordinator import FoxEssDataUpdateCoordinator
+
+_LOGGER = logging.getLogger(__name__)
+
+PHASES = ("update", "write")
+SUMMARY_FUNCTIONS = 15 # Functions listed per phase in the logged summary
+
+
+class CycleProfiler:
+    """Profile the next update cycles of a coordinator.
+
+    Only while active are the coordinator's update (API calls, decoding, report
+    processing) and listener (entity state writes) phases wrapped with cProfile
+    and wall/CPU timers; afterwards the wrappers are removed again, so normal
+    cycles pay nothing. cProfile sees everything the event loop runs during a
+    phase, including other integrations' work interleaved with our awaits.
+
+    Only one cProfile profiler can be active in a process (Python 3.12 raises,
+    3.11 silently hands over to the newer one), so the profiled update phases
+    of all entries take turns on a lock shared through hass.data, and a phase
+    another profiling tool holds the profiler during just runs unprofiled.
+    """
+
+    def __init__(self, hass: HomeAssistant, coordinator: FoxEssDataUpdateCoordinator, cycles: int) -> None:
+        """Initialize the profiler."""
+        self.hass = hass
+        self.coordinator = coordinator
+        self.cycles = cycles
+        self.timings: list[dict[str, float]] = []
+        self._profiles = {phase: cProfile.Profile() for phase in PHASES}
+        self._lock: asyncio.Lock = hass.data.setdefault(DATA_PROFILE_LOCK, asyncio.Lock())
+        self._path_prefix = hass.config.path(
+            f"foxess_profile_{coordinator.entry.entry_id}_{dt_util.now().strftime('%Y%m%d_%H%M%S')}"
+        )
+
+    @property
+    def active(self) -> bool:
+        """Return True while cycles are being profiled."""
+        return self.coordinator.profiler is self
+
+    def start(self) -> None:
+        """Wrap the coordinator phases until the requested cycles have run."""
+        coordinator = self.coordinator
+        # Instance attributes shadow the class methods and are simply deleted on finish
+        coordinator._async_update_data = self._wrap_update(coordinator._async_update_data)
+        coordinator.async_update_listeners = self._wrap_write(coordinator.async_update_listeners)
+        coordinator.profiler = self
+        _LOGGER.info("Profiling the next %d update cycle(s) of %s", self.cycles, coordinator.entry.title)
+
+    def _wrap_update(self, update: Callable) -> Callable:
+        """Return the update phase wrapped with the profiler and timers."""
+        profile = self._profiles["update"]
+
+        async def _profiled_update() -> dict[str, Any]:
+            timing = {"update_wall": 0.0, "update_cpu": 0.0}
+            self.timings.append(timing)
+            try:
+                # Another entry's profiled update stays enabled across its awaits; wait for it
+                async with self._lock:
+                    wall, cpu = time.perf_counter(), time.thread_time()
+                    enabled = self._enable(profile)
+                    try:
+                        return await update()
+                    finally:
+                        if enabled:
+                            profile.disable()
+                        timing["update_wall"] = time.perf_counter() - wall
+                        timing["update_cpu"] = time.thread_time() - cpu
+            finally:
+                if len(self.timings) >= self.cycles:
+                    # Listeners run right after this returns; finish once they have
+                    self.hass.loop.call_soon(self._finish)
+
+        return _profiled_update
+
+    def _wrap_write(self, update_listeners: Callable) -> Callable:
+        """Return the listener phase wrapped with the profiler and timers."""
+        profile = self._profiles["write"]
+
+        @callback
+        def _profiled_update_listeners() -> None:
+            wall, cpu = time.perf_counter(), time.thread_time()
+            # Timed but not profiled while another entry's update phase holds the profiler
+            enabled = not self._lock.locked() and self._enable(profile)
+            try:
+                update_listeners()
+            finally:
+                if enabled:
+                    profile.disable()
+                if self.timings:
+                    self.timings[-1]["write_wall"] = time.perf_counter() - wall
+                    self.timings[-1]["write_cpu"] = time.thread_time() - cpu
+
+        return _profiled_update_listeners
+
+    def _enable(self, profile: cProfile.Profile) -> bool:
+        """Enable a phase's profiler; False if another profiling tool holds the process's."""
+        try:
+            profile.enable()
+        except ValueError as err: # Python 3.12+: "Another profiling tool is already active"
+            _LOGGER.warning("Not profiling this phase of %s: %s", self.coordinator.entry.title, err)
+            return False
+        return True
+
+    @callback
+    def _finish(self) -> None:
+        """Restore the coordinator, then log and save the results."""
+        if not self.active:
+            return
+        coordinator = self.coordinator
+        del coordinator._async_update_data
+        del coordinator.async_update_listeners
+        coordinator.profiler = None
+        _LOGGER.info("Profile of %s:\n%s", coordinator.entry.title, self.summary())
+        self.hass.async_add_executor_job(self._dump)
+
+    def cancel(self) -> None:
+        """Stop profiling without saving results (e.g. on unload)."""
+        if self.active:
+            del self.coordinator._async_update_data
+            del self.coordinator.async_update_listeners
+            self.coordinator.profiler = None
+
+    def summary(self) -> str:
+        """Return per-cycle timings and the costliest functions of each phase."""
+        lines = ["cycle  update_wall  update_cpu  write_wall  write_cpu"]
+        for index, timing in enumerate(self.timings, 1):
+            lines.append(
+                f"{index:5d}  {timing['update_wall']:11.4f}  {timing['update_cpu']:10.4f}  "
+                f"{timing.get('write_wall', 0.0):10.4f}  {timing.get('write_cpu', 0.0):9.4f}"
+            )
+        for phase, profile in self._profiles.items():
+            stream = io.StringIO()
+            try:
+                stats = pstats.Stats(profile, stream=stream)
+            except TypeError:
+                continue # Phase never ran, e.g. no listener call after failed updates
+            stats.sort_stats(pstats.SortKey.CUMULATIVE).print_stats(SUMMARY_FUNCTIONS)
+            lines.append(f"--- {phase} phase ---")
+            lines.append(stream.getvalue().strip())
+        return "\n".join(lines)
+
+    def _dump(self) -> None:
+        """Write one pstats file per phase to the config directory."""
+        for phase, profile in self._profiles.items():
+            path = f"{self._path_prefix}_{phase}.prof"
+            try:
+                profile.dump_stats(path)
+            except OSError as err:
+                _LOGGER.warning("Could not write profile %s: %s", path, err)
+            else:
+                _LOGGER.info("Wrote %s phase profile to %s", phase, path)
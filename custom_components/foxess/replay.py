@@ -0,0 +1,215 @@
+"""Record FoxESS Cloud API traffic and replay it for deterministic benchmarks.
+
+ApiRecorder captures every response of a FoxEssApiClient, with its latency,
+as gzip-compressed JSON lines. ReplayApiClient serves such a log back in place
+of the cloud, and async_replay() drives a coordinator through the recorded
+update cycles at accelerated speed, without network access or budget use.
+The coordinator's clock follows the recording meanwhile, so slow sections
+and variable tiers fall due in the same cycles as they did when recorded.
+"""
+from __future__ import annotations
+
+import asyncio
+import gzip
+import json
+import logging
+import threading
+import time
+from collections import deque
+from collections.abc import Callable, Iterable
+from datetime import timedelta
+from typing import TYPE_CHECKING, Any
+
+from homeassistant.util import dt as dt_util
+
+from .api import (
+    _ENDPOINT_OA_DEVICE_VARIABLES,
+    _ENDPOINT_OA_DEVICE_VARIABLES_BATCH,
+    CallBudget,
+    FoxEssApiAuthError,
+    FoxEssApiClient,
+    FoxEssApiClockError,
+    FoxEssApiException,
+    FoxEssApiResponseError,
+    FoxEssApiTimeoutError,
+)
+
+if TYPE_CHECKING:
+    from .coordinator import FoxEssDataUpdateCoordinator
+
+_LOGGER = logging.getLogger(__name__)
+
+RECORD_FLUSH_EVERY = 60 # Records buffered in memory between writes
+RAW_PATHS = (_ENDPOINT_OA_DEVICE_VARIABLES, _ENDPOINT_OA_DEVICE_VARIABLES_BATCH)
+
+# Exceptions a recorded error is replayed as, by class name
+_ERRORS = {
+    cls.__name__: cls
+    for cls in (FoxEssApiException, FoxEssApiAuthError, FoxEssApiTimeoutError, FoxEssApiResponseError, FoxEssApiClockError)
+}
+
+
+class ApiRecorder:
+    """Buffer API responses and append them to a gzip JSON lines file.
+
+    Writes happen every RECORD_FLUSH_EVERY records and on flush(); pass an
+    executor (e.g. hass.async_add_executor_job) to keep file I/O off the loop.
+    """
+
+    def __init__(
+        self,
+        path: str,
+        executor: Callable[[Callable[[], None]], Any] | None = None,
+        flush_every: int = RECORD_FLUSH_EVERY,
+    ) -> None:
+        """Initialize the recorder."""
+        self.path = path
+        self.records = 0
+        self._executor = executor
+        self._flush_every = flush_every
+        self._pending: list[str] = []
+        self._lock = threading.Lock() # Writes may run in executor threads
+
+    def record(
+        self,
+        method: str,
+        path: str,
+        params: dict | None,
+        data: dict | None,
+        latency: float,
+        result: Any = None,
+        error: Exception | None = None,
+    ) -> None:
+        """Buffer one request and its outcome."""
+        entry = {
+            "ts": round(time.time(), 3),
+            "method": method,
+            "path": path,
+            "params": params,
+            "data": data,
+            "latency": round(latency, 4),
+        }
+        if error is not None:
+            entry["error"] = {"type": type(error).__name__, "message": str(error)}
+        else:
+            entry["result"] = result
+        with self._lock:
+            self._pending.append(json.dumps(entry, separators=(",", ":")))
+            due = len(self._pending) >= self._flush_every
+        self.records += 1
+        if due:
+            self.flush()
+
+    def flush(self) -> None:
+        """Write the buffered records."""
+        if self._executor is not None:
+            self._executor(self._write_pending)
+        else:
+            self._write_pending()
+
+    def _write_pending(self) -> None:
+        """Append everything buffered so far, in order."""
+        with self._lock:
+            lines, self._pending = self._pending, []
+            if lines:
+                # Appending adds a gzip member; readers treat the file as one stream
+                with gzip.open(self.path, "at", encoding="utf-8") as log_file:
+                    log_file.write("\n".join(lines) + "\n")
+
+
+def load_records(path: str) -> list[dict]:
+    """Read a recorded log."""
+    with gzip.open(path, "rt", encoding="utf-8") as log_file:
+        return [json.loads(line) for line in log_file if line.strip()]
+
+
+def _record_key(method: str, path: str, params: dict | None, data: dict | None) -> tuple:
+    """Return what identifies a request for replay (dates in payloads are ignored)."""
+    device_sn = (params or {}).get("sn") or (data or {}).get("sn")
+    return (method, path, device_sn)
+
+
+class ReplayApiClient(FoxEssApiClient):
+    """FoxEssApiClient answering from a recording instead of the cloud.
+
+    Each kind of request gets the recorded responses in their original order,
+    delayed by the recorded latency divided by `speed`; once they run out, the
+    last one is repeated.
+    """
+
+    def __init__(self, records: Iterable[dict], speed: float = 60.0) -> None:
+        """Initialize the client from recorded entries."""
+        super().__init__(None, "replay", budget=CallBudget(limit=1 << 30))
+        self.speed = speed
+        self.records = list(records)
+        self._queues: dict[tuple, deque[dict]] = {}
+        self._last: dict[tuple, dict] = {}
+        for record in self.records:
+            key = _record_key(record["method"], record["path"], record.get("params"), record.get("data"))
+            self._queues.setdefault(key, deque()).append(record)
+
+    @classmethod
+    def from_file(cls, path: str, speed: float = 60.0) -> ReplayApiClient:
+        """Create a client from a recorded log file."""
+        return cls(load_records(path), speed)
+
+    @property
+    def cycle_times(self) -> list[float]:
+        """Return the recorded start of each real-time query (an update cycle), in seconds since the epoch."""
+        return [record["ts"] - record["latency"] for record in self.records if record["path"] in RAW_PATHS]
+
+    @property
+    def cycle_gaps(self) -> list[float]:
+        """Return the recorded seconds before each real-time query (an update cycle)."""
+        times = self.cycle_times
+        return [later - earlier for earlier, later in zip([times[0], *times], times)] if times else []
+
+    async def _hedged_request(self, method: str, path: str, params: dict | None = None, data: dict | None = None) -> Any:
+        """Send requests once; a hedge would consume the next recorded response."""
+        return await self._request(method, path, params, data)
+
+    async def _send(self, method: str, path: str, params: dict | None, data: dict | None) -> Any:
+        """Return the next recorded response for this request."""
+        key = _record_key(method, path, params, data)
+        queue = self._queues.get(key)
+        if queue:
+            record = self._last[key] = queue.popleft()
+        elif key in self._last:
+            record = self._last[key]
+        else:
+            raise FoxEssApiResponseError(f"No recorded response for {method} {path}")
+
+        if self.speed:
+            await asyncio.sleep(record["latency"] / self.speed)
+        self._get_latency(path).record(record["latency"])
+        if "error" in record:
+            raise _ERRORS.get(record["error"]["type"], FoxEssApiException)(record["error"]["message"])
+        return record["result"]
+
+
+async def async_replay(coordinator: FoxEssDataUpdateCoordinator, client: ReplayApiClient) -> int:
+    """Run one coordinator refresh per recorded update cycle, at the client's speed.
+
+    The coordinator's clock starts at the time of the call and advances by the
+    recorded gaps rather than the accelerated ones, so it decides on the same
+    calls as the recorded cycles did. It paces itself to the replay client's
+    unlimited budget meanwhile: every recorded cycle did run. Returns the
+    number of cycles replayed.
+    """
+    times = client.cycle_times
+    start = dt_util.utcnow()
+    clock = start
+    # An instance attribute shadows the coordinator's clock until the replay is over
+    coordinator._utcnow = lambda: clock
+    budget, coordinator.budget = coordinator.budget, client.budget
+    try:
+        for recorded, gap in zip(times, client.cycle_gaps):
+            if client.speed:
+                await asyncio.sleep(gap / client.speed)
+            clock = start + timedelta(seconds=recorded - times[0])
+            await coordinator.async_refresh()
+    finally:
+        del coordinator._utcnow
+        coordinator.budget = budget
+    _LOGGER.debug("Replayed %d update cycles", len(times))
+    return len(times)
@@ -1,7 +1,9 @@
 """Sensor platform for FoxESS Cloud integration."""
 from __future__ import annotations
 
+import dataclasses
 import logging
+from datetime import datetime, timedelta
 from typing import Any
 
 from homeassistant.components.sensor import (
@@ -20,50 +22,50 @@ from homeassistant.const import (
     UnitOfPower,
     UnitOfTemperature,
     UnitOfReactivePower,
+    Platform,
 )
-from homeassistant.core import HomeAssistant
+from homeassistant.core import HomeAssistant, callback
+from homeassistant.helpers import entity_registry as er
 from homeassistant.helpers.device_registry import DeviceInfo
+from homeassistant.helpers.dispatcher import async_dispatcher_connect
 from homeassistant.helpers.entity_platform import AddEntitiesCallback
 from homeassistant.helpers.update_coordinator import CoordinatorEntity
+from homeassistant.util import dt as dt_util
 
-from .const import COORDINATOR, DOMAIN, CONF_DEVICE_SN, DEVICE_INFO_DATA, CONF_EXTPV # Added CONF_EXTPV
-from .api import FoxEssApiClient # Although not used directly here, good for context
+from .const import COORDINATOR, DOMAIN, CONF_EXTPV, CONF_STATISTICS_ONLY, OPTIONAL_SENSOR_TIMEOUT_HOURS, SIGNAL_OPTIONS_UPDATED
+from .api import DEFAULT_VARIABLES, FoxEssApiClient # Client for its variable list, see async_options_updated
 # EXTENDED_PV_SENSOR_DESCRIPTIONS removed from import
-from .definitions import SENSOR_DESCRIPTIONS, BATTERY_SETTING_SENSORS, REPORT_SENSORS
+from .events import SNAPSHOT_FAULTS, describe_status
+from .hourly import statistics_group
+from .definitions import (
+    SENSOR_DESCRIPTIONS,
+    BATTERY_SETTING_SENSORS,
+    REPORT_SENSORS,
+    DERIVED_SENSORS,
+    STRING_HEALTH_SENSORS,
+    generated_description,
+)
 
 _LOGGER = logging.getLogger(__name__)
 
 # (Definitions moved to definitions.py)
 
 
-def _create_sensors(
-    coordinator,
-    descriptions: list[SensorEntityDescription],
-    sensor_class: type[FoxEssEntity],
-    device_sn: str,
-    data_source_key: str,
-    data_sub_key: str | None = None, # Optional sub-key (e.g., "today" for report)
-) -> list[FoxEssEntity]:
-    """Helper to create sensor entities from descriptions."""
-    entities = []
-    source_data = coordinator.data.get(data_source_key, {})
-    if data_sub_key:
-        source_data = source_data.get(data_sub_key, {}) # Dive into sub-key if provided
-
-    if not isinstance(source_data, dict):
-        _LOGGER.warning("Expected dictionary for source '%s' (sub-key: %s), got %s",
-                        data_source_key, data_sub_key, type(source_data))
-        return [] # Cannot proceed if data structure is wrong
-
-    for description in descriptions:
-        if description.key in source_data:
-            entities.append(sensor_class(coordinator, description, device_sn))
-        else:
-            _LOGGER.debug(
-                "Skipping sensor %s for %s as key not found in initial data source '%s' (sub-key: %s)",
-                description.key, device_sn, data_source_key, data_sub_key
-            )
-    return entities
+# Real-time variables with an entity description; anything else the cloud returns gets a generated one
+RAW_DESCRIPTIONS = {description.key: description for description in SENSOR_DESCRIPTIONS}
+
+# Descriptions of the sensors following the other sections of the coordinator data
+SECTION_DESCRIPTIONS = {
+    "derived": {description.key: description for description in DERIVED_SENSORS},
+    "battery": {description.key: description for description in BATTERY_SETTING_SENSORS},
+    "report": {description.key: description for description in REPORT_SENSORS},
+    "strings": {description.key: description for description in STRING_HEALTH_SENSORS},
+}
+
+# Keys of PV strings 5-18, which most inverters don't have
+EXTENDED_PV_KEYS = frozenset(
+    f"pv{i}{suffix}" for i in range(5, 19) for suffix in ("Power", "Volt", "Current", "Share")
+)
 
 
 async def async_setup_entry(
@@ -73,72 +75,213 @@ async def async_setup_entry(
 ) -> None:
     """Set up FoxESS Cloud sensor entities based on a config entry."""
     coordinator = hass.data[DOMAIN][entry.entry_id][COORDINATOR]
-    device_info_data = hass.data[DOMAIN][entry.entry_id][DEVICE_INFO_DATA]
-    device_sn = entry.data[CONF_DEVICE_SN]
-
-    entities = []
-
-    # Create entities using the helper function
-    entities.extend(_create_sensors(coordinator, SENSOR_DESCRIPTIONS, FoxEssRawSensor, device_sn, "raw"))
-
-    has_battery = bool(device_info_data.get("hasBattery"))
-    if has_battery:
-        entities.extend(_create_sensors(coordinator, BATTERY_SETTING_SENSORS, FoxEssBatterySettingSensor, device_sn, "battery"))
+    sensors = _DynamicSensors(hass, entry, coordinator, async_add_entities)
+
+    # The status sensor always exists; the rest follow the data, starting with what is known now
+    async_add_entities(FoxEssInverterStatusSensor(coordinator, device_sn) for device_sn in coordinator.devices)
+    sensors.async_update()
+
+    # Without a context, this listener hears about every update of every section
+    entry.async_on_unload(coordinator.async_add_listener(sensors.async_update))
+    entry.async_on_unload(
+        async_dispatcher_connect(hass, SIGNAL_OPTIONS_UPDATED.format(entry.entry_id), sensors.async_options_updated)
+    )
+
+
+def _extended_pv_descriptions() -> list[SensorEntityDescription]:
+    """Return the extended PV sensor descriptions (PV5-18)."""
+    descriptions = []
+    # Create extended PV sensors directly, mirroring old code structure
+    for i in range(5, 19): # Assuming max 18 strings like old code
+        # Create Power Sensor
+        descriptions.append(SensorEntityDescription(key=f"pv{i}Power", name=f"PV{i} Power", native_unit_of_measurement=UnitOfPower.WATT, device_class=SensorDeviceClass.POWER, state_class=SensorStateClass.MEASUREMENT))
+        # Create Volt Sensor
+        descriptions.append(SensorEntityDescription(key=f"pv{i}Volt", name=f"PV{i} Voltage", native_unit_of_measurement=UnitOfElectricPotential.VOLT, device_class=SensorDeviceClass.VOLTAGE, state_class=SensorStateClass.MEASUREMENT))
+        # Create Current Sensor
+        descriptions.append(SensorEntityDescription(key=f"pv{i}Current", name=f"PV{i} Current", native_unit_of_measurement=UnitOfElectricCurrent.AMPERE, device_class=SensorDeviceClass.CURRENT, state_class=SensorStateClass.MEASUREMENT))
+    return descriptions
+
+
+RAW_DESCRIPTIONS.update((description.key, description) for description in _extended_pv_descriptions())
+# Generated descriptions must not take over another section's unique IDs
+RESERVED_KEYS = frozenset(key for descriptions in SECTION_DESCRIPTIONS.values() for key in descriptions) | {"inverter_status"}
+
+
+class _DynamicSensors:
+    """Create sensors as their values arrive, and remove optional ones that stay empty.
+
+    A sensor is added the first time its key holds a value, so inverters that
+    are asleep at startup get their sensors once they wake up, without a reload.
+    Optional sensors (PV strings 5-18 and variables without a description) that
+    have had no value for OPTIONAL_SENSOR_TIMEOUT_HOURS of online updates are
+    removed along with their registry entries, so unused hardware costs nothing.
+    """
+
+    def __init__(self, hass: HomeAssistant, entry: ConfigEntry, coordinator, async_add_entities: AddEntitiesCallback) -> None:
+        """Initialize the tracker."""
+        self.hass = hass
+        self.entry = entry
+        self.coordinator = coordinator
+        self._async_add_entities = async_add_entities
+        self.entities: dict[tuple[str, str], FoxEssEntity] = {}
+        # Optional keys with an entity or leftover registry entry -> section and start of their empty spell
+        self._optional: dict[tuple[str, str], str] = {}
+        self._empty_since: dict[tuple[str, str], datetime] = {}
+        self._track_registry_leftovers()
+
+    def _track_registry_leftovers(self) -> None:
+        """Watch optional sensors registered by earlier runs, so they can expire too."""
+        registry = er.async_get(self.hass)
+        for registry_entry in er.async_entries_for_config_entry(registry, self.entry.entry_id):
+            for device_sn, state in self.coordinator.devices.items():
+                prefix = f"{state.unique_base}_"
+                if not registry_entry.unique_id.startswith(prefix):
+                    continue
+                key = registry_entry.unique_id[len(prefix):]
+                if _is_optional(key):
+                    self._optional[(device_sn, key)] = "derived" if key in SECTION_DESCRIPTIONS["derived"] else "raw"
 
-    # Report data for today is now processed by the coordinator and stored directly under "report"
-    entities.extend(_create_sensors(coordinator, REPORT_SENSORS, FoxEssReportSensor, device_sn, "report"))
-
-    # Conditionally add extended PV sensors based on options
-    extend_pv = entry.options.get(CONF_EXTPV, False)
-    if extend_pv:
-        _LOGGER.debug("Adding extended PV sensors (PV5-18) directly based on options")
-        # Create extended PV sensors directly, mirroring old code structure
-        for i in range(5, 19): # Assuming max 18 strings like old code
-            # Create Power Sensor
-            power_desc = SensorEntityDescription(key=f"pv{i}Power", name=f"PV{i} Power", native_unit_of_measurement=UnitOfPower.WATT, device_class=SensorDeviceClass.POWER, state_class=SensorStateClass.MEASUREMENT)
-            entities.append(FoxEssRawSensor(coordinator, power_desc, device_sn))
-            # Create Volt Sensor
-            volt_desc = SensorEntityDescription(key=f"pv{i}Volt", name=f"PV{i} Voltage", native_unit_of_measurement=UnitOfElectricPotential.VOLT, device_class=SensorDeviceClass.VOLTAGE, state_class=SensorStateClass.MEASUREMENT)
-            entities.append(FoxEssRawSensor(coordinator, volt_desc, device_sn))
-            # Create Current Sensor
-            current_desc = SensorEntityDescription(key=f"pv{i}Current", name=f"PV{i} Current", native_unit_of_measurement=UnitOfElectricCurrent.AMPERE, device_class=SensorDeviceClass.CURRENT, state_class=SensorStateClass.MEASUREMENT)
-            entities.append(FoxEssRawSensor(coordinator, current_desc, device_sn))
-
-    # Add inverter status sensor (example of a custom entity)
-    entities.append(FoxEssInverterStatusSensor(coordinator, device_sn))
-
-    async_add_entities(entities)
+    @property
+    def _statistics_groups(self) -> set[str]:
+        """Return the groups kept as hourly statistics instead of entities."""
+        return set(self.entry.options.get(CONF_STATISTICS_ONLY) or ())
+
+    def _description(self, section: str, key: str, value: Any) -> SensorEntityDescription | None:
+        """Return the description to create a sensor for a key with, if any."""
+        if section != "raw":
+            return SECTION_DESCRIPTIONS[section].get(key)
+        if key in RAW_DESCRIPTIONS:
+            return RAW_DESCRIPTIONS[key]
+        if key in RESERVED_KEYS:
+            return None
+        info = self.coordinator.api_client.variable_info.get(key, {})
+        description = generated_description(key, value, info.get("unit", ""), info.get("name", ""))
+        if key in DEFAULT_VARIABLES:
+            # Queried by default but never described: available, but off unless the user enables it
+            description = dataclasses.replace(description, entity_registry_enabled_default=False)
+        return description
+
+    @callback
+    def async_update(self) -> None:
+        """Add sensors for new values and expire optional sensors that stay empty."""
+        data = self.coordinator.data or {}
+        now = dt_util.utcnow()
+        timeout = timedelta(hours=OPTIONAL_SENSOR_TIMEOUT_HOURS)
+        statistics_groups = self._statistics_groups
+        new_entities = []
+        expired = []
+        for device_sn, device_data in data.items():
+            if device_sn not in self.coordinator.devices:
+                continue
+            statistics_only = self.coordinator.devices[device_sn].statistics_only
+            for section, sensor_class in SECTION_SENSOR_CLASSES.items():
+                source = device_data.get(section)
+                if not isinstance(source, dict):
+                    continue
+                for key, value in source.items():
+                    if value is None or (device_sn, key) in self.entities or key in statistics_only:
+                        continue
+                    description = self._description(section, key, value)
+                    if description is None:
+                        continue
+                    if section == "raw" and statistics_group(description) in statistics_groups:
+                        # No entity, so no recorder states; the coordinator keeps hourly statistics of it
+                        statistics_only[key] = description
+                        continue
+                    entity = self.entities[(device_sn, key)] = sensor_class(self.coordinator, description, device_sn)
+                    new_entities.append(entity)
+                    if section in ("raw", "derived") and _is_optional(key):
+                        self._optional[(device_sn, key)] = section
+
+            if not device_data.get("online"):
+                continue # An offline inverter says nothing about which values exist
+            for (optional_sn, key), section in list(self._optional.items()):
+                if optional_sn != device_sn:
+                    continue
+                if (device_data.get(section) or {}).get(key) is not None:
+                    self._empty_since.pop((device_sn, key), None)
+                elif now - self._empty_since.setdefault((device_sn, key), now) > timeout:
+                    expired.append((device_sn, key))
+
+        if new_entities:
+            self._async_add_entities(new_entities)
+        for device_sn, key in expired:
+            self._async_remove(device_sn, key, keep_registry_entry=False)
+
+    @callback
+    def async_options_updated(self) -> None:
+        """Remove real-time sensors whose variable is no longer queried, or is now statistics-only.
+
+        Nothing is reloaded and no API calls are made. Newly queried variables,
+        and those of groups no longer statistics-only, get their sensors with
+        the next update that returns them.
+        """
+        queried = set(FoxEssApiClient._build_variables(self.entry.options.get(CONF_EXTPV, False), self.coordinator.variables))
+        statistics_groups = self._statistics_groups
+        for state in self.coordinator.devices.values():
+            for key, description in list(state.statistics_only.items()):
+                if statistics_group(description) not in statistics_groups:
+                    del state.statistics_only[key]
+        for device_sn, key in list(self.entities):
+            entity = self.entities[(device_sn, key)]
+            if not isinstance(entity, FoxEssRawSensor):
+                continue
+            statistics_only = statistics_group(entity.entity_description) in statistics_groups
+            if key not in queried or statistics_only:
+                # Registry entries are kept, so history and customizations survive re-adding
+                self._async_remove(device_sn, key, keep_registry_entry=True)
+            if key in queried and statistics_only:
+                self.coordinator.devices[device_sn].statistics_only[key] = entity.entity_description
+
+    @callback
+    def _async_remove(self, device_sn: str, key: str, keep_registry_entry: bool) -> None:
+        """Remove a sensor, and optionally its registry entry."""
+        self._optional.pop((device_sn, key), None)
+        self._empty_since.pop((device_sn, key), None)
+        entity = self.entities.pop((device_sn, key), None)
+        if not keep_registry_entry:
+            registry = er.async_get(self.hass)
+            unique_id = f"{self.coordinator.devices[device_sn].unique_base}_{key}"
+            if entity_id := registry.async_get_entity_id(Platform.SENSOR, DOMAIN, unique_id):
+                _LOGGER.debug("Removing %s, which has had no value for a while", entity_id)
+                registry.async_remove(entity_id) # Also removes the entity itself
+                return
+        if entity is not None and entity.hass is not None:
+            self.hass.async_create_task(entity.async_remove())
+
+
+def _is_optional(key: str) -> bool:
+    """Return True for sensors that only exist on some hardware."""
+    return key in EXTENDED_PV_KEYS or (key not in RAW_DESCRIPTIONS and key not in RESERVED_KEYS)
 
 
 class FoxEssEntity(CoordinatorEntity, SensorEntity):
     """Base class for FoxESS Cloud sensor entities."""
 
     _attr_has_entity_name = True # Use description.name as the entity name suffix
+    _section = "raw" # Coordinator data section this entity follows, see FoxEssDataUpdateCoordinator
 
     def __init__(self, coordinator, description: SensorEntityDescription, device_sn: str):
         """Initialize the sensor."""
-        super().__init__(coordinator)
+        # The context limits coordinator notifications to updates of our section
+        super().__init__(coordinator, (device_sn, self._section))
         self.entity_description = description
         self._device_sn = device_sn
-        # Use the config entry's unique ID (either legacy deviceID or new deviceSN)
-        # as the base for the sensor's unique ID to ensure continuity.
-        config_entry_unique_id = coordinator.config_entry.unique_id
-        self._attr_unique_id = f"{config_entry_unique_id}_{description.key}"
+        # Use the inverter's unique base (legacy config entry unique ID or deviceSN)
+        # for the sensor's unique ID to ensure continuity.
+        unique_base = coordinator.devices[device_sn].unique_base
+        self._attr_unique_id = f"{unique_base}_{description.key}"
 
     @property
     def device_info(self) -> DeviceInfo:
         """Return device information."""
-        # Fetch device details stored during __init__.py setup
-        device_info_data = self.coordinator.hass.data[DOMAIN][self.coordinator.config_entry.entry_id][DEVICE_INFO_DATA]
-        return DeviceInfo(
-            identifiers={(DOMAIN, self._device_sn)},
-            name=device_info_data.get("plantName", f"FoxESS {self._device_sn}"),
-            manufacturer="FoxESS",
-            model=device_info_data.get("deviceType", "Unknown"),
-            sw_version=f"Master: {device_info_data.get('masterVersion', 'N/A')}, "
-                       f"Slave: {device_info_data.get('slaveVersion', 'N/A')}, "
-                       f"Manager: {device_info_data.get('managerVersion', 'N/A')}",
-        )
+        # Built once per inverter and device detail, not per entity
+        return self.coordinator.device_info(self._device_sn)
+
+    @property
+    def _device_data(self) -> dict:
+        """Return this inverter's part of the coordinator data."""
+        return (self.coordinator.data or {}).get(self._device_sn, {})
 
     @property
     def _data_source(self) -> dict | None:
@@ -148,13 +291,8 @@ class FoxEssEntity(CoordinatorEntity, SensorEntity):
     @property
     def available(self) -> bool:
         """Return True if entity is available."""
-        # Base availability check: coordinator updates, inverter online
-        base_available = (
-            super().available
-            and self.coordinator.data is not None
-            and self.coordinator.data.get("online", False)
-        )
-        if not base_available:
+        # Base availability check: the section's own fetch state (and the inverter online for real-time data)
+        if self.coordinator.data is None or not self.coordinator.section_available(self._device_sn, self._section):
             return False
 
         # Check if the specific data source exists and the key is present
@@ -189,10 +327,24 @@ class FoxEssEntity(CoordinatorEntity, SensorEntity):
 
 class FoxEssRawSensor(FoxEssEntity):
     """Sensor reading data from the 'raw' part of the coordinator data."""
+
+    # Rolling stats change every update; keep them out of the recorder
+    _unrecorded_attributes = frozenset({
+        "rolling_min", "rolling_max", "rolling_mean", "rate_of_change_per_hour", "today_min", "today_max",
+    })
+
+    @property
+    def extra_state_attributes(self) -> dict[str, Any] | None:
+        """Return rolling statistics, if enabled and samples exist."""
+        window = self.coordinator.devices[self._device_sn].rolling.get(self.entity_description.key)
+        if window is None or not len(window):
+            return None
+        return window.as_attributes()
+
     @property
     def _data_source(self) -> dict | None:
         """Return the 'raw' data dictionary."""
-        return self.coordinator.data.get("raw")
+        return self._device_data.get("raw")
 
     def _get_data_value(self, data_key: str) -> Any | None:
         """Get value from the 'raw' data dictionary."""
@@ -202,12 +354,28 @@ class FoxEssRawSensor(FoxEssEntity):
     # available property now handled by base class + _data_source check
 
 
+class FoxEssDerivedSensor(FoxEssEntity):
+    """Sensor reading values the coordinator derives from the 'raw' data."""
+    @property
+    def _data_source(self) -> dict | None:
+        """Return the 'derived' data dictionary."""
+        return self._device_data.get("derived")
+
+    def _get_data_value(self, data_key: str) -> Any | None:
+        """Get value from the 'derived' data dictionary."""
+        source = self._data_source
+        return source.get(data_key) if source else None
+
+
 class FoxEssBatterySettingSensor(FoxEssEntity):
     """Sensor reading data from the 'battery' part of the coordinator data."""
+
+    _section = "battery"
+
     @property
     def _data_source(self) -> dict | None:
         """Return the 'battery' data dictionary."""
-        return self.coordinator.data.get("battery")
+        return self._device_data.get("battery")
 
     def _get_data_value(self, data_key: str) -> Any | None:
         """Get value from the 'battery' data dictionary."""
@@ -222,12 +390,14 @@ class FoxEssReportSensor(FoxEssEntity):
     # This assumes the report data for 'today' is structured appropriately
     # Adjust the key access logic if the API response structure is different
 
+    _section = "report"
+
     @property
     def _data_source(self) -> dict | None:
         """Return the 'report' data dictionary (processed for today in coordinator)."""
         # The coordinator's _async_update_data now processes the report list
         # and stores today's values directly in the 'report' key.
-        report_data = self.coordinator.data.get("report")
+        report_data = self._device_data.get("report")
         return report_data if isinstance(report_data, dict) else None
 
     def _get_data_value(self, data_key: str) -> Any | None:
@@ -239,6 +409,22 @@ class FoxEssReportSensor(FoxEssEntity):
     # available property now handled by base class + _data_source check
 
 
+class FoxEssStringHealthSensor(FoxEssEntity):
+    """Sensor reading the PV string analysis from the 'strings' part of the coordinator data."""
+
+    _section = "strings" # Notified after each analysis, see FoxEssDataUpdateCoordinator.async_analyze_strings
+
+    @property
+    def _data_source(self) -> dict | None:
+        """Return the 'strings' data dictionary."""
+        return self._device_data.get("strings")
+
+    def _get_data_value(self, data_key: str) -> Any | None:
+        """Get value from the 'strings' data dictionary."""
+        source = self._data_source
+        return source.get(data_key) if source else None
+
+
 # --- Example Custom Sensor (Not using EntityDescription) ---
 class FoxEssInverterStatusSensor(FoxEssEntity): # Inherit from FoxEssEntity
     """Representation of the Inverter Status."""
@@ -246,6 +432,8 @@ class FoxEssInverterStatusSensor(FoxEssEntity): # Inherit from FoxEssEntity
     _attr_has_entity_name = True
     _attr_name = "Inverter Status"
     _attr_icon = "mdi:solar-power" # Or mdi:information-outline
+    # Notified only when the status snapshot changes, see FoxEssDataUpdateCoordinator._async_track_status
+    _section = "status"
 
     # Note: This sensor doesn't use an EntityDescription like the others
     # We still call the base __init__ but don't need the description param here.
@@ -257,37 +445,33 @@ class FoxEssInverterStatusSensor(FoxEssEntity): # Inherit from FoxEssEntity
         # Call super().__init__ without description
         # Need to handle the missing description in the base or bypass parts of it.
         # Let's call CoordinatorEntity.__init__ directly and set necessary attrs.
-        CoordinatorEntity.__init__(self, coordinator)
+        CoordinatorEntity.__init__(self, coordinator, (device_sn, self._section))
         # SensorEntity doesn't have an __init__ to call directly.
 
         self._device_sn = device_sn # Needed for device_info from FoxEssEntity
-        config_entry_unique_id = coordinator.config_entry.unique_id
-        self._attr_unique_id = f"{config_entry_unique_id}_inverter_status"
+        unique_base = coordinator.devices[device_sn].unique_base
+        self._attr_unique_id = f"{unique_base}_inverter_status"
         # _attr_name and _attr_icon are set as class attributes
 
     # No need to define entity_description property
 
     # device_info is now correctly inherited from FoxEssEntity
 
-    # This sensor's availability depends on the 'status' key in 'device_info'
+    @property
+    def _status(self) -> dict:
+        """Return the inverter's status snapshot."""
+        return self.coordinator.devices[self._device_sn].status
+
+    # This sensor's availability depends on the 'status' key of the device detail
     @property
     def available(self) -> bool:
         """Return True if entity is available."""
-        # Check base coordinator status first
-        if not CoordinatorEntity.available.fget(self): # Check CoordinatorEntity availability
-             return False
-        if not self.coordinator.data:
-             return False
-
-        # Then check for the specific key required by this sensor in device_info
-        device_info_data = self.coordinator.data.get("device_info")
-        return device_info_data is not None and "status" in device_info_data
+        return self.coordinator.section_available(self._device_sn, self._section) and "status" in self._status
 
     @property
     def native_value(self) -> str | None:
-        """Return the state of the sensor based on device_info status."""
-        device_info_data = self.coordinator.data.get("device_info", {})
-        status_code = device_info_data.get("status") # Use status from device_info
+        """Return the state of the sensor based on the device detail status."""
+        status_code = self._status.get("status")
 
         # Map status codes based on observed API response and old code logic
         # 1: online, 2: alarm, 3: offline
@@ -301,18 +485,26 @@ class FoxEssInverterStatusSensor(FoxEssEntity): # Inherit from FoxEssEntity
 
     @property
     def extra_state_attributes(self) -> dict[str, Any] | None:
-        """Return additional state attributes."""
-        attrs = {}
-        raw_data = self.coordinator.data.get("raw", {})
-        device_info_data = self.coordinator.data.get("device_info", {}) # Use correct key
-
-        # Add relevant attributes from raw data or device detail
-        attrs["device_status_code"] = device_info_data.get("status") # Add the code used for state
-        attrs["raw_running_status"] = raw_data.get("runningStatus") # Keep raw status if needed
-        # attrs["last_cloud_sync"] = device_info_data.get("lastCloudSync") # Not available in API response
-        # Add other potentially useful attributes like invStatus, dspStatus etc.
-        attrs["inv_status"] = raw_data.get("invStatus")
-        attrs["dsp_status"] = raw_data.get("dspStatus")
-        attrs["sys_status"] = raw_data.get("sysStatus")
-
-        return attrs
+        """Return additional state attributes; they only change with the status snapshot."""
+        status = self._status
+        faults = status.get(SNAPSHOT_FAULTS) or {}
+        return {
+            "device_status_code": status.get("status"), # The code used for state
+            "raw_running_status": status.get("runningStatus"),
+            "running_state": describe_status("runningStatus", status.get("runningStatus")),
+            "inv_status": status.get("invStatus"),
+            "dsp_status": status.get("dspStatus"),
+            "sys_status": status.get("sysStatus"),
+            "fault_codes": list(faults),
+            "faults": list(faults.values()),
+        }
+
+
+# Sensor class for each section of the coordinator data, in the order sensors are created
+SECTION_SENSOR_CLASSES: dict[str, type[FoxEssEntity]] = {
+    "raw": FoxEssRawSensor,
+    "derived": FoxEssDerivedSensor,
+    "battery": FoxEssBatterySettingSensor,
+    "report": FoxEssReportSensor,
+    "strings": FoxEssStringHealthSensor,
+}
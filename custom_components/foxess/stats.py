@@ -0,0 +1,140 @@
+"""Rolling statistics over a recent time span, without recorder queries."""
+from __future__ import annotations
+
+import math
+from array import array
+from collections import deque
+from datetime import date
+
+
+class RollingWindow:
+    """Array-backed ring buffer of the samples of one variable within the last `span` seconds.
+
+    Samples are evicted by timestamp, so the window covers the same time span
+    whatever the polling cadence; the buffer grows if more samples arrive than
+    `capacity` holds. Min, max and mean are maintained incrementally (monotonic
+    queues and a running sum), so each sample costs amortized O(1) however
+    large the window. Today's min/max is tracked alongside and reset when the
+    caller's local day changes.
+    """
+
+    __slots__ = (
+        "span", "_values", "_times", "_start", "_count", "_sum", "_seq", "_appended",
+        "_min_queue", "_max_queue", "_day", "day_min", "day_max",
+    )
+
+    def __init__(self, span: float, capacity: int = 64) -> None:
+        """Initialize an empty window."""
+        self.span = span
+        self._values = array("d", bytes(8 * capacity))
+        self._times = array("d", bytes(8 * capacity))
+        self._start = 0 # Index of the oldest sample
+        self._count = 0
+        self._sum = 0.0
+        self._seq = 0 # Sequence number of the next sample
+        self._appended = 0 # Samples since the sum was last rebuilt
+        # (seq, value) pairs, increasing for min and decreasing for max
+        self._min_queue: deque[tuple[int, float]] = deque()
+        self._max_queue: deque[tuple[int, float]] = deque()
+        self._day: date | None = None
+        self.day_min: float | None = None
+        self.day_max: float | None = None
+
+    def __len__(self) -> int:
+        """Return the number of samples held."""
+        return self._count
+
+    def _evict_oldest(self) -> None:
+        """Drop the oldest sample."""
+        self._sum -= self._values[self._start]
+        self._start = (self._start + 1) % len(self._values)
+        self._count -= 1
+        evicted = self._seq - self._count - 1
+        if self._min_queue[0][0] <= evicted:
+            self._min_queue.popleft()
+        if self._max_queue[0][0] <= evicted:
+            self._max_queue.popleft()
+
+    def _grow(self) -> None:
+        """Double the buffer, keeping the samples in order from index 0."""
+        capacity = len(self._values)
+        order = [(self._start + offset) % capacity for offset in range(self._count)]
+        padding = bytes(8 * capacity)
+        self._values = array("d", [self._values[index] for index in order]) + array("d", padding)
+        self._times = array("d", [self._times[index] for index in order]) + array("d", padding)
+        self._start = 0
+
+    def append(self, timestamp: float, value: float, day: date) -> None:
+        """Add a sample (timestamp in seconds since the epoch, day in the caller's time zone)."""
+        while self._count and self._times[self._start] <= timestamp - self.span:
+            self._evict_oldest()
+        if self._count == len(self._values):
+            self._grow()
+
+        capacity = len(self._values)
+        index = (self._start + self._count) % capacity
+        self._values[index] = value
+        self._times[index] = timestamp
+        self._count += 1
+        self._sum += value
+
+        while self._min_queue and self._min_queue[-1][1] >= value:
+            self._min_queue.pop()
+        self._min_queue.append((self._seq, value))
+        while self._max_queue and self._max_queue[-1][1] <= value:
+            self._max_queue.pop()
+        self._max_queue.append((self._seq, value))
+        self._seq += 1
+
+        self._appended += 1
+        if self._appended >= capacity:
+            # Once per buffer's worth of samples, rebuild the sum to stop float drift accumulating
+            self._appended = 0
+            self._sum = math.fsum(self._values[(self._start + offset) % capacity] for offset in range(self._count))
+
+        if day != self._day:
+            self._day = day
+            self.day_min = self.day_max = value
+        else:
+            self.day_min = min(self.day_min, value)
+            self.day_max = max(self.day_max, value)
+
+    @property
+    def minimum(self) -> float | None:
+        """Return the smallest value in the window."""
+        return self._min_queue[0][1] if self._count else None
+
+    @property
+    def maximum(self) -> float | None:
+        """Return the largest value in the window."""
+        return self._max_queue[0][1] if self._count else None
+
+    @property
+    def mean(self) -> float | None:
+        """Return the mean of the window."""
+        return self._sum / self._count if self._count else None
+
+    @property
+    def rate_of_change(self) -> float | None:
+        """Return the change per hour between the oldest and newest sample."""
+        if self._count < 2:
+            return None
+        newest = (self._start + self._count - 1) % len(self._values)
+        elapsed = self._times[newest] - self._times[self._start]
+        if elapsed <= 0:
+            return None
+        return (self._values[newest] - self._values[self._start]) / elapsed * 3600
+
+    def as_attributes(self) -> dict[str, float | None]:
+        """Return the statistics as entity state attributes."""
+        def _round(value: float | None) -> float | None:
+            return round(value, 3) if value is not None else None
+
+        return {
+            "rolling_min": _round(self.minimum),
+            "rolling_max": _round(self.maximum),
+            "rolling_mean": _round(self.mean),
+            "rate_of_change_per_hour": _round(self.rate_of_change),
+            "today_min": _round(self.day_min),
+            "today_max": _round(self.day_max),
+        }
@@ -0,0 +1,152 @@
+"""PV string health over the archived samples of the last days.
+
+Strings of one inverter see the same weather, so comparing them with each
+other takes the weather out: a string's daily yield divided by the median
+string's is steady unless the string gets shaded, soiled or degrades. Every
+string is compared with its own usual ratio (the earlier days of the window),
+so arrays of unequal strings (different lengths or orientations) aren't
+flagged for being unequal. All strings and days are computed together as
+(strings x samples) arrays in one pass; run analyze() in an executor.
+"""
+from __future__ import annotations
+
+from datetime import datetime, timedelta
+from typing import TYPE_CHECKING, Any
+import warnings
+
+import numpy as np
+
+if TYPE_CHECKING:
+    from .archive import DailyArchive
+
+MAX_STRINGS = 18
+ANALYSIS_DAYS = 14 # Window of daily yields the ratios and trends are taken over
+MIN_STRING_VOLTAGE = 20.0 # V; strings that never reach it aren't connected
+MAX_SAMPLE_GAP = 900 # Seconds; longer gaps (outages, nights offline) aren't integrated over
+MIN_DAY_SHARE = 0.05 # Days whose median yield is below this share of the best day's are too dark to compare
+PRODUCING_SHARE = 0.1 # Samples whose median power is below this share of the peak are left out of IV ratios
+MIN_TREND_DAYS = 7 # Days of yield needed for a trend
+
+# Thresholds for repair issues
+UNDERPERFORMING_RATIO = 0.8 # Today's normalized yield against the string's usual one
+IV_DEVIATION_LIMIT = 10.0 # % change of voltage or current against the median string's
+DEGRADATION_LIMIT = -5.0 # Percentage points of normalized yield per 30 days
+
+ISSUE_UNDERPERFORMING = "string_underperforming"
+ISSUE_IV_OUTLIER = "string_iv_outlier"
+ISSUE_DEGRADING = "string_degrading"
+
+# analyze() fields published as sensors -> key suffix after the string, e.g. pv1NormalizedYield
+SENSOR_FIELDS = {
+    "normalized_yield": "NormalizedYield",
+    "yield_trend": "YieldTrend",
+    "voltage_deviation": "VoltageDeviation",
+    "current_deviation": "CurrentDeviation",
+}
+
+STRING_VARIABLES = [
+    f"pv{string}{suffix}" for suffix in ("Power", "Volt", "Current") for string in range(1, MAX_STRINGS + 1)
+]
+
+
+def _nanmedian(values: np.ndarray, axis: int) -> np.ndarray:
+    """Return the median ignoring NaN, NaN (without a warning) where everything is."""
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore", RuntimeWarning)
+        return np.nanmedian(values, axis=axis)
+
+
+def _usual(ratios: np.ndarray, today: np.ndarray) -> np.ndarray:
+    """Return each string's median ratio before today, or 1 (the median string's) without history."""
+    usual = _nanmedian(np.where(today, np.nan, ratios), axis=1)
+    return np.where(np.isnan(usual), 1.0, usual)
+
+
+def analyze(archive: DailyArchive, device_sn: str, end: datetime) -> dict[str, dict[str, Any]]:
+    """Return the health of each connected string of an inverter over the days before `end`.
+
+    Keys are "pv1".."pv18"; each value holds the normalized yield of the last
+    24 hours (% of the median string's), its trend (percentage points per 30 days), the
+    change of voltage and current against the median string's (%), and the
+    issues found with the value that raised each. Fewer than two connected strings leave nothing to compare.
+    """
+    times, matrix = archive.samples(device_sn, STRING_VARIABLES, end - timedelta(days=ANALYSIS_DAYS), end)
+    power, volt, current = matrix.reshape(3, MAX_STRINGS, -1)
+    connected = np.nanmax(np.nan_to_num(volt), axis=1, initial=0.0) >= MIN_STRING_VOLTAGE
+    strings = np.flatnonzero(connected)
+    if len(strings) < 2 or len(times) < 2:
+        return {}
+    power, volt, current = np.abs(power[strings]), volt[strings], current[strings]
+
+    # Energy of each interval, counted only where every connected string reported both ends
+    valid = ~np.isnan(power).any(axis=0)
+    interval = np.diff(times)
+    usable = valid[1:] & valid[:-1] & (interval <= MAX_SAMPLE_GAP)
+    filled = np.nan_to_num(power)
+    energy = np.where(usable, (filled[:, 1:] + filled[:, :-1]) / 2 * interval, 0.0)
+
+    # Daily energy per string; day -1 is the last 24 hours, -ANALYSIS_DAYS the oldest
+    day = ((times[1:] - end.timestamp()) // 86400).astype(int) + ANALYSIS_DAYS
+    daily = np.zeros((len(strings), ANALYSIS_DAYS))
+    np.add.at(daily.T, np.clip(day, 0, ANALYSIS_DAYS - 1), energy.T)
+    median = np.median(daily, axis=0)
+    bright = median > MIN_DAY_SHARE * median.max() if median.max() > 0 else np.zeros(ANALYSIS_DAYS, bool)
+    with np.errstate(all="ignore"):
+        ratio = np.where(bright, daily / median, np.nan)
+    last_day = np.arange(ANALYSIS_DAYS) == ANALYSIS_DAYS - 1
+    normalized = ratio[:, -1]
+    usual_yield = _usual(ratio, np.broadcast_to(last_day, ratio.shape))
+
+    # Least-squares slope of the ratio over the bright days, for all strings at once
+    has = ~np.isnan(ratio)
+    days = np.where(has, np.arange(ANALYSIS_DAYS), 0.0)
+    values = np.nan_to_num(ratio)
+    count = has.sum(axis=1)
+    sum_x, sum_y = days.sum(axis=1), values.sum(axis=1)
+    with np.errstate(all="ignore"):
+        slope = (count * (days * values).sum(axis=1) - sum_x * sum_y) / (count * (days**2).sum(axis=1) - sum_x**2)
+    slope = np.where(count >= MIN_TREND_DAYS, slope, np.nan)
+
+    # Voltage and current against the median string's while producing, today vs usual
+    median_power = np.median(filled, axis=0)
+    producing = valid & (median_power > PRODUCING_SHARE * median_power.max())
+    today = np.broadcast_to(times >= end.timestamp() - 86400, power.shape)
+    deviations = []
+    for values in (volt, current):
+        with np.errstate(all="ignore"):
+            ratios = np.where(producing, values / _nanmedian(values, axis=0), np.nan)
+        latest = _nanmedian(np.where(today, ratios, np.nan), axis=1)
+        deviations.append((latest / _usual(ratios, today) - 1) * 100)
+
+    result = {}
+    for index, string in enumerate(strings):
+        health = {
+            "normalized_yield": _round(normalized[index] * 100),
+            "yield_trend": _round(slope[index] * 30 * 100),
+            "voltage_deviation": _round(deviations[0][index]),
+            "current_deviation": _round(deviations[1][index]),
+            "issues": {},
+        }
+        if not np.isnan(normalized[index]) and normalized[index] < UNDERPERFORMING_RATIO * usual_yield[index]:
+            health["issues"][ISSUE_UNDERPERFORMING] = health["normalized_yield"]
+        deviation = max((health["voltage_deviation"] or 0.0, health["current_deviation"] or 0.0), key=abs)
+        if abs(deviation) > IV_DEVIATION_LIMIT:
+            health["issues"][ISSUE_IV_OUTLIER] = deviation
+        if health["yield_trend"] is not None and health["yield_trend"] < DEGRADATION_LIMIT:
+            health["issues"][ISSUE_DEGRADING] = health["yield_trend"]
+        result[f"pv{string + 1}"] = health
+    return result
+
+
+def string_sensors(health: dict[str, dict[str, Any]]) -> dict[str, float | None]:
+    """Flatten analyze()'s result into the sensor keys of the "strings" section, e.g. pv1NormalizedYield."""
+    return {
+        f"{string}{suffix}": string_health[field]
+        for string, string_health in health.items()
+        for field, suffix in SENSOR_FIELDS.items()
+    }
+
+
+def _round(value: float) -> float | None:
+    """Return a value rounded for a state, None for NaN."""
+    return None if np.isnan(value) else round(float(value), 1)
@@ -0,0 +1,132 @@
+"""WebSocket API pushing an entry's snapshot once, then only what each update changed.
+
+A dashboard showing many FoxESS values would otherwise receive one full
+state_changed message per entity and update. The deltas are computed once
+per coordinator update and shared by all subscribers of the entry.
+"""
+from __future__ import annotations
+
+from collections.abc import Callable
+from typing import TYPE_CHECKING, Any
+
+import voluptuous as vol
+
+from homeassistant.components import websocket_api
+from homeassistant.core import HomeAssistant, callback
+
+from .const import DOMAIN, SNAPSHOT_STREAM, WS_SUBSCRIBE
+
+if TYPE_CHECKING:
+    from .coordinator import FoxEssDataUpdateCoordinator
+
+# Sections of the device data that are streamed, each variable:value pairs
+STREAM_SECTIONS = ("raw", "derived", "battery", "report")
+
+
+def build_snapshot(coordinator: FoxEssDataUpdateCoordinator) -> dict[str, dict[str, Any]]:
+    """Return the streamed part of the coordinator data, per inverter."""
+    snapshot = {}
+    for device_sn, device_data in (coordinator.data or {}).items():
+        device_snapshot: dict[str, Any] = {"online": bool(device_data.get("online"))}
+        for section in STREAM_SECTIONS:
+            device_snapshot[section] = dict(device_data.get(section) or {})
+        snapshot[device_sn] = device_snapshot
+    return snapshot
+
+
+def snapshot_delta(old: dict[str, dict[str, Any]], new: dict[str, dict[str, Any]]) -> dict[str, dict[str, Any]]:
+    """Return what changed between two snapshots; values that disappeared become None."""
+    delta = {}
+    for device_sn, device in new.items():
+        before = old.get(device_sn, {})
+        changes: dict[str, Any] = {}
+        if device["online"] != before.get("online"):
+            changes["online"] = device["online"]
+        for section in STREAM_SECTIONS:
+            old_values, new_values = before.get(section, {}), device[section]
+            section_changes = {
+                variable: value
+                for variable, value in new_values.items()
+                if variable not in old_values or old_values[variable] != value
+            }
+            section_changes.update(dict.fromkeys(old_values.keys() - new_values.keys()))
+            if section_changes:
+                changes[section] = section_changes
+        if changes:
+            delta[device_sn] = changes
+    return delta
+
+
+class SnapshotStream:
+    """Fan an entry's snapshot deltas out to its WebSocket subscribers.
+
+    It only listens to the coordinator while someone is subscribed.
+    """
+
+    def __init__(self, coordinator: FoxEssDataUpdateCoordinator) -> None:
+        """Initialize the stream."""
+        self._coordinator = coordinator
+        self._subscribers: set[Callable[[dict], None]] = set()
+        self._unsub_coordinator: Callable[[], None] | None = None
+        self.snapshot: dict[str, dict[str, Any]] = {}
+
+    @callback
+    def async_subscribe(self, send: Callable[[dict], None]) -> Callable[[], None]:
+        """Send the current snapshot, then the deltas; returns the unsubscribe."""
+        if self._unsub_coordinator is None:
+            self.snapshot = build_snapshot(self._coordinator)
+            # No context, so this hears about every update of every section
+            self._unsub_coordinator = self._coordinator.async_add_listener(self._async_update)
+        self._subscribers.add(send)
+        send({"snapshot": self.snapshot})
+
+        @callback
+        def _async_unsubscribe() -> None:
+            self._subscribers.discard(send)
+            if not self._subscribers:
+                self.async_close()
+
+        return _async_unsubscribe
+
+    @callback
+    def _async_update(self) -> None:
+        snapshot = build_snapshot(self._coordinator)
+        delta = snapshot_delta(self.snapshot, snapshot)
+        self.snapshot = snapshot
+        if not delta:
+            return
+        message = {"delta": delta}
+        for send in list(self._subscribers):
+            send(message)
+
+    @callback
+    def async_close(self) -> None:
+        """Stop listening to the coordinator (on unload, or without subscribers)."""
+        if self._unsub_coordinator is not None:
+            self._unsub_coordinator()
+            self._unsub_coordinator = None
+
+
+@callback
+def async_setup_websocket(hass: HomeAssistant) -> None:
+    """Register the WebSocket commands; registering again replaces them."""
+    websocket_api.async_register_command(hass, websocket_subscribe)
+
+
+@websocket_api.websocket_command({vol.Required("type"): WS_SUBSCRIBE, vol.Required("entry_id"): str})
+@callback
+def websocket_subscribe(
+    hass: HomeAssistant, connection: websocket_api.ActiveConnection, msg: dict[str, Any]
+) -> None:
+    """Subscribe to the snapshot and deltas of a loaded entry."""
+    entry_data = hass.data.get(DOMAIN, {}).get(msg["entry_id"])
+    if entry_data is None:
+        connection.send_error(msg["id"], websocket_api.ERR_NOT_FOUND, f"No loaded FoxESS Cloud entry {msg['entry_id']}")
+        return
+
+    @callback
+    def _async_send(event: dict) -> None:
+        connection.send_message(websocket_api.event_message(msg["id"], event))
+
+    connection.send_result(msg["id"])
+    connection.subscriptions[msg["id"]] = entry_data[SNAPSHOT_STREAM].async_subscribe(_async_send)
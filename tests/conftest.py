@@ -1,2 +1,39 @@
 """pytest fixtures for FoxESS Cloud integration tests."""
-# Add shared fixtures here, e.g., for mocking the API client.
\ No newline at end of file
+# Add shared fixtures here, e.g., for mocking the API client.
+from unittest.mock import patch
+
+import pytest
+from pytest_homeassistant_custom_component.common import MockConfigEntry
+
+from homeassistant.config_entries import ConfigEntryState
+from homeassistant.core import HomeAssistant
+
+from custom_components.foxess.config_flow import hub_unique_id
+from custom_components.foxess.const import DOMAIN, CONF_API_KEY, CONF_DEVICES
+
+
+@pytest.fixture
+async def mock_setup_entry(hass: HomeAssistant):
+    """Prevent the integration from being set up, or torn down, by config flow tests.
+
+    Entries the flows created are unloaded while still patched, as Home
+    Assistant would otherwise unload them for real when it stops.
+    """
+    with patch("custom_components.foxess.async_setup_entry", return_value=True) as mock_setup, patch(
+        "custom_components.foxess.async_unload_entry", return_value=True
+    ):
+        yield mock_setup
+        for entry in hass.config_entries.async_entries(DOMAIN):
+            if entry.state is ConfigEntryState.LOADED:
+                await hass.config_entries.async_unload(entry.entry_id)
+
+
+@pytest.fixture
+def mock_config_entry() -> MockConfigEntry:
+    """Return a hub config entry for the test API key with one inverter."""
+    return MockConfigEntry(
+        domain=DOMAIN,
+        version=2,
+        unique_id=hub_unique_id("test-api-key"),
+        data={CONF_API_KEY: "test-api-key", CONF_DEVICES: {"TEST_SN_123": "TEST_SN_123"}},
+    )
@@ -1,9 +1,27 @@
 """Unit tests for the FoxESS Cloud API Client."""
+import asyncio
+from contextlib import asynccontextmanager
+from email.utils import formatdate
+import json
+import time
+from unittest.mock import MagicMock, patch
+
+import aiohttp
 import pytest
 from aiohttp import ClientSession
+from pytest_homeassistant_custom_component.common import load_fixture
 
 # Import the class to test
-from custom_components.foxess.api import FoxEssApiClient
+from custom_components.foxess.api import (
+    DEFAULT_BASE_URL,
+    DEFAULT_TIMEOUT,
+    MIN_TIMEOUT,
+    EndpointLatency,
+    FoxEssApiClient,
+    FoxEssApiCancelledError,
+    FoxEssApiClockError,
+    FoxEssApiException,
+)
 
 # Constants for testing
 TEST_API_KEY = "test_api_key_123"
@@ -44,4 +62,227 @@ def test_md5c_upper(mock_session):
 #   - Test API error cases (e.g., errno != 0)
 #   - Test HTTP error cases (e.g., 401, 403, 500)
 #   - Test timeout cases
-#   - Test invalid JSON response cases
\ No newline at end of file
+#   - Test invalid JSON response cases
+
+async def test_close_cancels_inflight_request() -> None:
+    """Test that close() cancels a pending request instead of waiting for it."""
+    client = FoxEssApiClient(MagicMock(), TEST_API_KEY, TEST_DEVICE_SN)
+    started = asyncio.Event()
+
+    async def _hang(*args, **kwargs):
+        started.set()
+        await asyncio.sleep(3600)
+
+    with patch.object(client, "_send", side_effect=_hang):
+        request = asyncio.create_task(client.get_device_detail())
+        await started.wait()
+        client.close()
+        with pytest.raises(FoxEssApiCancelledError):
+            await request
+
+    # Requests after close fail fast
+    with pytest.raises(FoxEssApiCancelledError):
+        await client.get_device_detail()
+
+
+def test_endpoint_latency_adapts_timeout() -> None:
+    """Test that timeouts follow observed latency and back off after a timeout."""
+    stats = EndpointLatency()
+    assert stats.timeout == DEFAULT_TIMEOUT # Nothing known yet
+    assert stats.hedge_delay is None
+
+    for _ in range(10):
+        stats.record(1.0)
+    assert stats.timeout == MIN_TIMEOUT # Fast endpoint, clamped to the floor
+    assert stats.hedge_delay is not None and stats.hedge_delay < 2.0
+
+    stats.record_timeout()
+    assert stats.timeout == MIN_TIMEOUT * 2
+    stats.record(1.0)
+    assert stats.timeout == MIN_TIMEOUT
+
+    stats.record_size(1000)
+    stats.record_size(200)
+    assert stats.as_dict()["response_bytes"] == 900.0 # Smoothed like the latency
+
+
+async def test_raw_query_hedged_when_slow() -> None:
+    """Test that a slow raw query sends one duplicate and counts it against the budget."""
+    client = FoxEssApiClient(MagicMock(), TEST_API_KEY, TEST_DEVICE_SN)
+    latency = client._get_latency("/op/v0/device/real/query")
+    for _ in range(10):
+        latency.record(0.001)
+    calls = []
+
+    async def _send(*args, **kwargs):
+        client.budget.consume()
+        calls.append(args)
+        if len(calls) == 1:
+            await asyncio.sleep(3600) # First attempt stalls
+        return [{"datas": [{"variable": "pvPower", "value": 1.5}]}]
+
+    with patch("custom_components.foxess.api.MIN_HEDGE_DELAY", 0.01), patch.object(client, "_send", side_effect=_send):
+        result = await client.get_raw_data()
+
+    assert result == {"pvPower": 1.5}
+    assert len(calls) == 2
+    assert client.hedged_requests == 1
+    assert client.budget.used == 2
+
+
+async def test_device_list_paginated() -> None:
+    """Test that the device list follows pagination."""
+    client = FoxEssApiClient(MagicMock(), TEST_API_KEY)
+    pages = {
+        1: {"total": 3, "data": [{"deviceSN": "SN1"}, {"deviceSN": "SN2"}]},
+        2: {"total": 3, "data": [{"deviceSN": "SN3"}]},
+    }
+
+    async def _send(method, path, params=None, data=None):
+        return pages[data["currentPage"]]
+
+    with patch("custom_components.foxess.api.DEVICE_LIST_PAGE_SIZE", 2), patch.object(client, "_send", side_effect=_send) as mock_send:
+        devices = await client.get_device_list()
+
+    assert [device["deviceSN"] for device in devices] == ["SN1", "SN2", "SN3"]
+    assert mock_send.call_count == 2 # One call per page
+
+
+async def test_raw_data_batch_keyed_by_sn() -> None:
+    """Test that one batch real-time query covers several inverters."""
+    client = FoxEssApiClient(MagicMock(), TEST_API_KEY)
+
+    async def _send(method, path, params=None, data=None):
+        return [
+            {"deviceSN": sn, "datas": [{"variable": "pvPower", "value": index}]}
+            for index, sn in enumerate(data["sns"])
+        ]
+
+    with patch.object(client, "_send", side_effect=_send) as mock_send:
+        result = await client.get_raw_data_batch(["SN1", "SN2"])
+
+    assert result == {"SN1": {"pvPower": 0}, "SN2": {"pvPower": 1}}
+    assert mock_send.call_count == 1
+    assert mock_send.call_args.args[1] == "/op/v1/device/real/query"
+
+
+async def test_battery_settings_on_grid_key() -> None:
+    """Test the cloud's minSocOnGrid is returned as minGridSoc, and written back under its own name."""
+    client = FoxEssApiClient(MagicMock(), TEST_API_KEY)
+    settings = json.loads(load_fixture("battery_settings_success.json"))["result"]
+
+    with patch.object(client, "_send", return_value=settings) as mock_send:
+        assert await client.get_battery_settings(TEST_DEVICE_SN) == {"minSoc": 15, "minGridSoc": 20}
+        await client.set_battery_settings(15, 25, TEST_DEVICE_SN)
+
+    assert settings == {"minSoc": 15, "minSocOnGrid": 20} # The response itself is left alone
+    assert mock_send.call_args.args[3] == {"sn": TEST_DEVICE_SN, "minSoc": 15, "minSocOnGrid": 25}
+
+
+async def test_base_url_probing_and_failover() -> None:
+    """Test the fastest healthy candidate is picked, and a failing one is left at once."""
+    answers = {"https://slow.example": (0.05, 200), "https://fast.example": (0.0, 200), "https://down.example": (0.0, 503)}
+
+    @asynccontextmanager
+    async def _head(url, **kwargs):
+        delay, status = answers[url]
+        await asyncio.sleep(delay)
+        yield MagicMock(status=status)
+
+    session = MagicMock()
+    session.head = _head
+    client = FoxEssApiClient(session, TEST_API_KEY, TEST_DEVICE_SN)
+    assert client.base_url == DEFAULT_BASE_URL
+    assert await client.async_probe_endpoints() == DEFAULT_BASE_URL # Nothing to choose from
+
+    client.configure_endpoints("https://slow.example/", ["https://down.example", "https://fast.example"], "http://proxy:3128")
+    assert client.base_url == "https://slow.example" # The configured one until probed
+    assert await client.async_probe_endpoints() == "https://fast.example"
+    stats = client.endpoint_stats
+    assert stats["https://down.example"]["healthy"] is False
+    assert stats["https://fast.example"]["active"] is True and stats["https://fast.example"]["samples"] == 1
+
+    # Applying the same settings again keeps the choice
+    client.configure_endpoints("https://slow.example", ["https://down.example", "https://fast.example"], "http://proxy:3128")
+    assert client.base_url == "https://fast.example"
+
+    # A connection error fails over to the best other healthy candidate, through the proxy
+    session.request.side_effect = aiohttp.ClientConnectionError("refused")
+    with pytest.raises(FoxEssApiException):
+        await client.get_device_detail()
+    assert session.request.call_args.args[1] == "https://fast.example/op/v0/device/detail"
+    assert session.request.call_args.kwargs["proxy"] == "http://proxy:3128"
+    assert client.base_url == "https://slow.example"
+
+
+async def test_calls_paced_per_path() -> None:
+    """Test calls to one path are spaced by the minimum interval, while other paths go at once."""
+    sent = []
+
+    @asynccontextmanager
+    async def _request(method, url, headers=None, **kwargs):
+        sent.append((url.rsplit("/", 1)[-1], asyncio.get_running_loop().time()))
+        response = MagicMock(status=200, headers={})
+
+        async def _text():
+            return json.dumps({"errno": 0, "result": {}})
+
+        response.text = _text
+        yield response
+
+    session = MagicMock()
+    session.request = _request
+    client = FoxEssApiClient(session, TEST_API_KEY)
+    with patch("custom_components.foxess.api.PATH_MIN_INTERVAL", 0.1):
+        await asyncio.gather(
+            *(client.get_device_detail(f"SN{index}") for index in range(3)), client.get_battery_settings("SN0")
+        )
+
+    details = [at for path, at in sent if path == "detail"]
+    assert len(details) == 3
+    assert all(later - earlier >= 0.09 for earlier, later in zip(details, details[1:]))
+    assert next(at for path, at in sent if path == "get") - details[0] < 0.09 # Not queued behind the details
+
+
+async def test_clock_offset_resigns_rejected_request() -> None:
+    """Test a timestamp rejection teaches the server's clock, and the request is signed again once."""
+    server_ahead = 600.0 # Seconds the server's clock is ahead of ours
+    answers = [40256, 0]
+    timestamps = []
+
+    @asynccontextmanager
+    async def _request(method, url, headers=None, **kwargs):
+        timestamps.append(int(headers["timestamp"]) / 1000)
+        response = MagicMock(status=200, headers={"Date": formatdate(time.time() + server_ahead, usegmt=True)})
+        errno = answers.pop(0) if answers else 40256
+
+        async def _text():
+            return json.dumps({"errno": errno, "msg": "illegal request", "result": {"deviceSN": TEST_DEVICE_SN}})
+
+        response.text = _text
+        yield response
+
+    session = MagicMock()
+    session.request = _request
+    client = FoxEssApiClient(session, TEST_API_KEY, TEST_DEVICE_SN)
+    assert await client.get_device_detail() == {"deviceSN": TEST_DEVICE_SN}
+    assert client.clock_retries == 1
+    assert client.clock_offset == pytest.approx(server_ahead, abs=1)
+    assert timestamps[0] == pytest.approx(time.time(), abs=5) # Signed with the local clock
+    assert timestamps[1] == pytest.approx(time.time() + server_ahead, abs=5) # Signed again with the server's
+
+    # A rejection that teaches nothing new isn't the clock's fault, so it is raised as is
+    timestamps.clear()
+    with pytest.raises(FoxEssApiClockError):
+        await client.get_device_detail()
+    assert len(timestamps) == 1
+    assert client.clock_retries == 1
+
+    # ...and so is one with the clocks in step from the start
+    server_ahead = 0.0
+    client = FoxEssApiClient(session, TEST_API_KEY, TEST_DEVICE_SN)
+    timestamps.clear()
+    with pytest.raises(FoxEssApiClockError):
+        await client.get_device_detail()
+    assert len(timestamps) == 1
+    assert client.clock_retries == 0
@@ -0,0 +1,145 @@
+"""Tests for the FoxESS Cloud columnar archive."""
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta, timezone
+import os
+from unittest.mock import patch
+
+import numpy as np
+import pytest
+from pytest_homeassistant_custom_component.common import MockConfigEntry
+
+from homeassistant.core import HomeAssistant
+from homeassistant.exceptions import HomeAssistantError
+
+from custom_components.foxess.archive import DailyArchive
+from custom_components.foxess.const import (
+    CONF_API_KEY,
+    CONF_ARCHIVE,
+    CONF_DEVICES,
+    DOMAIN,
+    SERVICE_ARCHIVE_QUERY,
+)
+
+TEST_SN = "TEST_SN_ARCHIVE"
+MOCK_DEVICE_DETAIL = {"deviceSN": TEST_SN, "plantName": "Archive Plant", "hasBattery": False}
+START = datetime(2024, 3, 1, 23, 0, tzinfo=timezone.utc)
+
+
+@pytest.fixture(autouse=True)
+def mock_platforms():
+    """Don't set up entity platforms."""
+    with patch(f"custom_components.{DOMAIN}.PLATFORMS", []):
+        yield
+
+
+def test_archive_across_days(tmp_path) -> None:
+    """Test aggregates over open and compressed days match a brute-force pass."""
+    archive = DailyArchive(str(tmp_path))
+    samples = []
+    # Two hours around midnight; batVolt only shows up after midnight, pvPower drops out once
+    for minute in range(120):
+        timestamp = (START + timedelta(minutes=minute)).timestamp()
+        raw = {"pvPower": minute / 10, "runningState": "163"}
+        if minute == 30:
+            del raw["pvPower"]
+        if minute >= 60:
+            raw["batVolt"] = 50.0 + minute
+        archive.append(TEST_SN, timestamp, raw)
+        samples.append((timestamp, raw))
+
+    # The first sample after midnight closed the previous day
+    day_dir = tmp_path / TEST_SN / "2024-03-01"
+    assert sorted(os.listdir(day_dir)) == ["_time.gz", "pvPower.gz"]
+    assert sorted(os.listdir(tmp_path / TEST_SN / "2024-03-02")) == ["_time", "batVolt", "pvPower"]
+
+    start, end = START + timedelta(minutes=10), START + timedelta(minutes=100)
+    result = archive.query(TEST_SN, ["pvPower", "batVolt", "unknown"], start, end)
+
+    selected = [(t, raw) for t, raw in samples if start.timestamp() <= t <= end.timestamp() and "pvPower" in raw]
+    times = np.array([t for t, _ in selected])
+    values = np.array([raw["pvPower"] for _, raw in selected], dtype=np.float32).astype(np.float64)
+    assert result["pvPower"]["samples"] == len(selected) == 90
+    assert result["pvPower"]["min"] == pytest.approx(values.min())
+    assert result["pvPower"]["max"] == pytest.approx(values.max())
+    assert result["pvPower"]["mean"] == pytest.approx(values.mean())
+    assert result["pvPower"]["energy"] == pytest.approx(np.trapz(values, times) / 3600)
+    assert result["batVolt"]["samples"] == 41
+    assert result["batVolt"]["min"] == 110.0
+    assert result["unknown"] == {"min": None, "max": None, "mean": None, "energy": None, "samples": 0}
+
+
+def test_archive_reopens_day(tmp_path) -> None:
+    """Test a half-written row is dropped when a day is appended to after a restart."""
+    timestamp = START.timestamp()
+    DailyArchive(str(tmp_path)).append(TEST_SN, timestamp, {"pvPower": 1.0})
+    with open(tmp_path / TEST_SN / "2024-03-01" / "pvPower", "ab") as column:
+        column.write(b"\0\0") # Interrupted before the time column was written
+
+    archive = DailyArchive(str(tmp_path))
+    archive.append(TEST_SN, timestamp + 60, {"pvPower": 3.0})
+    result = archive.query(TEST_SN, ["pvPower"], START, START + timedelta(minutes=1))
+    assert result["pvPower"]["samples"] == 2
+    assert result["pvPower"]["energy"] == pytest.approx(2.0 / 60)
+
+
+def test_archive_writes_in_order(tmp_path, caplog) -> None:
+    """Test writes handed to a thread pool land in order, and a failed one is logged without stopping the rest."""
+    archive = DailyArchive(str(tmp_path), executor=(pool := ThreadPoolExecutor(max_workers=4)).submit)
+    write = archive._write
+    failed = []
+
+    def _write(device_sn, day, timestamp, values):
+        if timestamp == START.timestamp() + 600 and not failed:
+            failed.append(timestamp)
+            raise OSError("disk full")
+        write(device_sn, day, timestamp, values)
+
+    with patch.object(archive, "_write", side_effect=_write):
+        for minute in range(50):
+            archive.append(TEST_SN, (START + timedelta(minutes=minute)).timestamp(), {"pvPower": float(minute)})
+        pool.shutdown(wait=True)
+
+    times, matrix = archive.samples(TEST_SN, ["pvPower"], START, START + timedelta(hours=1))
+    assert len(times) == 49
+    assert np.all(np.diff(times) > 0)
+    assert list(matrix[0]) == [float(minute) for minute in range(50) if minute != 10]
+    assert "Archive write failed" in caplog.text and "disk full" in caplog.text
+
+
+async def test_archive_query_service(hass: HomeAssistant, tmp_path) -> None:
+    """Test the option archives updates and the service aggregates them."""
+    hass.config.config_dir = str(tmp_path)
+    entry = MockConfigEntry(
+        domain=DOMAIN,
+        version=2,
+        data={CONF_API_KEY: "test-api-key", CONF_DEVICES: {TEST_SN: TEST_SN}},
+    )
+    entry.add_to_hass(hass)
+    with patch("custom_components.foxess.FoxEssApiClient", autospec=True) as mock_api_client_class:
+        mock_api = mock_api_client_class.return_value
+        mock_api.get_device_detail.return_value = MOCK_DEVICE_DETAIL
+        mock_api.get_raw_data_batch.return_value = {TEST_SN: {"pvPower": 2.0}}
+        mock_api.get_report.return_value = []
+        assert await hass.config_entries.async_setup(entry.entry_id)
+        await hass.async_block_till_done()
+        coordinator = hass.data[DOMAIN][entry.entry_id]["coordinator"]
+        query = {"device_sn": TEST_SN, "variables": ["pvPower"], "start": "2000-01-01 00:00:00"}
+
+        with pytest.raises(HomeAssistantError):
+            await hass.services.async_call(DOMAIN, SERVICE_ARCHIVE_QUERY, query, blocking=True, return_response=True)
+
+        hass.config_entries.async_update_entry(entry, options={CONF_ARCHIVE: True})
+        await hass.async_block_till_done()
+        for pv_power in (4.0, 6.0):
+            mock_api.get_raw_data_batch.return_value = {TEST_SN: {"pvPower": pv_power}}
+            await coordinator.async_refresh()
+        await hass.async_block_till_done()
+
+        response = await hass.services.async_call(
+            DOMAIN, SERVICE_ARCHIVE_QUERY, query, blocking=True, return_response=True
+        )
+        assert response["variables"]["pvPower"]["samples"] == 2
+        assert response["variables"]["pvPower"]["mean"] == 5.0
+
+        assert await hass.config_entries.async_unload(entry.entry_id)
+        await hass.async_block_till_done()
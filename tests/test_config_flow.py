@@ -4,14 +4,12 @@ from unittest.mock import patch
 import pytest
 from homeassistant import config_entries, data_entry_flow
 from homeassistant.core import HomeAssistant
-from homeassistant.const import CONF_API_KEY
 
 # Import constants and the config flow class
-from custom_components.foxess.const import DOMAIN, CONF_DEVICE_SN
+from custom_components.foxess.const import DOMAIN, CONF_API_KEY, CONF_DEVICE_ID, CONF_DEVICE_SN, CONF_DEVICES
 from custom_components.foxess.config_flow import FoxESSConfigFlow
 
-# Import exceptions for potential future testing
-# from custom_components.foxess.api import FoxEssApiAuthError, FoxEssApiException
+from custom_components.foxess.api import FoxEssApiAuthError, FoxEssApiException
 
 # Pytest marker for all tests in this file
 pytestmark = pytest.mark.usefixtures("mock_setup_entry") # Assumes a fixture to prevent component setup
@@ -19,23 +17,18 @@ pytestmark = pytest.mark.usefixtures("mock_setup_entry") # Assumes a fixture to
 # Mock data
 MOCK_USER_INPUT = {
     CONF_API_KEY: "test-api-key",
-    CONF_DEVICE_SN: "TEST_SN_123",
 }
 
-MOCK_DEVICE_INFO_SUCCESS = { # Mock data returned by get_device_detail
-  "deviceSN": "TEST_SN_123",
-  "plantName": "Mock Plant",
-  "deviceType": "H1-5.0-E",
-  "masterVersion": "1.0",
-  "slaveVersion": "1.1",
-  "managerVersion": "1.2",
-  "hasBattery": True,
-  "status": 1,
-}
+MOCK_DEVICE_LIST = [ # Mock data returned by get_device_list
+    {"deviceSN": "TEST_SN_123", "stationName": "Mock Plant", "deviceType": "H1-5.0-E"},
+    {"deviceSN": "TEST_SN_456", "stationName": "Mock Plant", "deviceType": "H1-3.7-E"},
+]
+
+PATCH_DEVICE_LIST = "custom_components.foxess.config_flow.FoxEssApiClient.get_device_list"
 
 
 async def test_user_flow_success(hass: HomeAssistant) -> None:
-    """Test the full user configuration flow successfully creates an entry."""
+    """Test the full user configuration flow successfully creates a hub entry."""
     # Start the config flow
     result = await hass.config_entries.flow.async_init(
         DOMAIN, context={"source": config_entries.SOURCE_USER}
@@ -44,26 +37,60 @@ async def test_user_flow_success(hass: HomeAssistant) -> None:
     # Check that the initial form is shown
     assert result["type"] == data_entry_flow.RESULT_TYPE_FORM
     assert result["step_id"] == "user"
-    assert result["errors"] is None
-
-    # Simulate user input
-    # Patch the API call that might happen during validation (none currently, but good practice)
-    # with patch("custom_components.foxess.api.FoxEssApiClient.get_device_detail", return_value=MOCK_DEVICE_INFO_SUCCESS):
-    result2 = await hass.config_entries.flow.async_configure(
-        result["flow_id"],
-        user_input=MOCK_USER_INPUT,
+    assert result["errors"] == {}
+
+    # Simulate user input; the key is validated by listing its inverters
+    with patch(PATCH_DEVICE_LIST, return_value=MOCK_DEVICE_LIST):
+        result2 = await hass.config_entries.flow.async_configure(
+            result["flow_id"],
+            user_input=MOCK_USER_INPUT,
+        )
+    assert result2["type"] == data_entry_flow.RESULT_TYPE_FORM
+    assert result2["step_id"] == "devices"
+
+    result3 = await hass.config_entries.flow.async_configure(
+        result2["flow_id"],
+        user_input={CONF_DEVICES: ["TEST_SN_123", "TEST_SN_456"]},
     )
     await hass.async_block_till_done() # Allow tasks to complete
 
-    # Check that the flow finished and created an entry
-    assert result2["type"] == data_entry_flow.RESULT_TYPE_CREATE_ENTRY
-    assert result2["title"] == f"FoxESS Inverter {MOCK_USER_INPUT[CONF_DEVICE_SN]}"
-    assert result2["data"] == MOCK_USER_INPUT
-    assert result2["result"].unique_id == MOCK_USER_INPUT[CONF_DEVICE_SN]
+    # Check that the flow finished and created one entry for both inverters
+    assert result3["type"] == data_entry_flow.RESULT_TYPE_CREATE_ENTRY
+    assert result3["title"] == "FoxESS Cloud (2 inverters)"
+    assert result3["data"] == {
+        CONF_API_KEY: MOCK_USER_INPUT[CONF_API_KEY],
+        CONF_DEVICES: {"TEST_SN_123": "TEST_SN_123", "TEST_SN_456": "TEST_SN_456"},
+    }
+
+
+async def test_user_flow_adds_devices_to_existing_entry(hass: HomeAssistant, mock_config_entry) -> None:
+    """Test new inverters of a configured key join the existing entry."""
+    mock_config_entry.add_to_hass(hass)
+
+    result = await hass.config_entries.flow.async_init(
+        DOMAIN, context={"source": config_entries.SOURCE_USER}
+    )
+    with patch(PATCH_DEVICE_LIST, return_value=MOCK_DEVICE_LIST):
+        result2 = await hass.config_entries.flow.async_configure(
+            result["flow_id"],
+            user_input=MOCK_USER_INPUT,
+        )
+    # Only the inverter not configured yet is offered
+    assert result2["step_id"] == "devices"
+
+    result3 = await hass.config_entries.flow.async_configure(
+        result2["flow_id"],
+        user_input={CONF_DEVICES: ["TEST_SN_456"]},
+    )
+    await hass.async_block_till_done()
+
+    assert result3["type"] == data_entry_flow.RESULT_TYPE_ABORT
+    assert result3["reason"] == "devices_added"
+    assert mock_config_entry.data[CONF_DEVICES] == {"TEST_SN_123": "TEST_SN_123", "TEST_SN_456": "TEST_SN_456"}
 
 
 async def test_user_flow_already_configured(hass: HomeAssistant, mock_config_entry) -> None:
-    """Test the flow aborts if the device SN is already configured."""
+    """Test the flow aborts if every inverter of the key is already configured."""
     # Setup an existing entry with the same SN
     mock_config_entry.add_to_hass(hass)
 
@@ -72,19 +99,54 @@ async def test_user_flow_already_configured(hass: HomeAssistant, mock_config_ent
         DOMAIN, context={"source": config_entries.SOURCE_USER}
     )
 
-    # Simulate user input with the same SN
-    result2 = await hass.config_entries.flow.async_configure(
-        result["flow_id"],
-        user_input=MOCK_USER_INPUT, # Assumes MOCK_USER_INPUT SN matches mock_config_entry
-    )
+    # Simulate user input for an account whose only inverter is configured
+    with patch(PATCH_DEVICE_LIST, return_value=MOCK_DEVICE_LIST[:1]):
+        result2 = await hass.config_entries.flow.async_configure(
+            result["flow_id"],
+            user_input=MOCK_USER_INPUT,
+        )
 
     # Check that the flow aborted
     assert result2["type"] == data_entry_flow.RESULT_TYPE_ABORT
     assert result2["reason"] == "already_configured"
 
 
+async def test_import_joins_hub_of_key(hass: HomeAssistant, mock_config_entry) -> None:
+    """Test a YAML inverter of a configured key joins its hub, under its legacy unique ID base."""
+    mock_config_entry.add_to_hass(hass)
+
+    result = await hass.config_entries.flow.async_init(
+        DOMAIN,
+        context={"source": config_entries.SOURCE_IMPORT},
+        data={CONF_API_KEY: "test-api-key", CONF_DEVICE_SN: "TEST_SN_456", CONF_DEVICE_ID: "LEGACY_456"},
+    )
+
+    assert result["type"] == data_entry_flow.RESULT_TYPE_ABORT
+    assert result["reason"] == "already_configured"
+    assert mock_config_entry.data[CONF_DEVICES] == {"TEST_SN_456": "LEGACY_456", "TEST_SN_123": "TEST_SN_123"}
+
+
+@pytest.mark.parametrize(
+    ("error", "reason"),
+    [
+        (FoxEssApiAuthError("Invalid key"), "invalid_auth"),
+        (FoxEssApiException("Connection error"), "cannot_connect"),
+    ],
+)
+async def test_user_flow_api_errors(hass: HomeAssistant, error, reason) -> None:
+    """Test API errors while listing inverters are shown on the form."""
+    result = await hass.config_entries.flow.async_init(
+        DOMAIN, context={"source": config_entries.SOURCE_USER}
+    )
+    with patch(PATCH_DEVICE_LIST, side_effect=error):
+        result2 = await hass.config_entries.flow.async_configure(
+            result["flow_id"],
+            user_input=MOCK_USER_INPUT,
+        )
+
+    assert result2["type"] == data_entry_flow.RESULT_TYPE_FORM
+    assert result2["errors"] == {"base": reason}
+
+
 # Add more tests here for:
-# - Handling API errors during validation (if validation is added to config flow)
-#   - e.g., patch get_device_detail to raise FoxEssApiAuthError -> check for "invalid_auth" error
-#   - e.g., patch get_device_detail to raise FoxEssApiException -> check for "cannot_connect" error
-# - Re-authentication flow (async_step_reauth) if implemented
\ No newline at end of file
+# - Re-authentication flow (async_step_reauth) if implemented
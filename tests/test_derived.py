@@ -0,0 +1,38 @@
+"""Tests for the FoxESS Cloud derived power-flow values."""
+from custom_components.foxess.derived import compute_derived
+
+
+def test_compute_derived_daytime() -> None:
+    """Test derived values for a sunny snapshot with the battery charging."""
+    raw = {
+        "pvPower": 4.0,
+        "pv1Power": 3.0,
+        "pv2Power": 1.0,
+        "generationPower": 2.85,
+        "loadsPower": 2.0,
+        "feedinPower": 1.0,
+        "gridConsumptionPower": 0.0,
+        "batChargePower": 1.0,
+        "batDischargePower": 0.0,
+    }
+    derived = compute_derived(raw)
+
+    assert derived["netGridPower"] == -1.0 # Exporting
+    assert derived["netBatteryPower"] == -1.0 # Charging
+    assert derived["houseLoadWithoutBattery"] == 3.0
+    assert derived["selfConsumption"] == 75.0
+    assert derived["selfSufficiency"] == 100.0
+    assert derived["dcAcEfficiency"] == 95.0
+    assert derived["pv1Share"] == 75.0
+    assert derived["pv2Share"] == 25.0
+    assert "pv3Share" not in derived # String not reported
+
+
+def test_compute_derived_night_and_missing_inputs() -> None:
+    """Test that undefined ratios are None and missing inputs drop the value."""
+    derived = compute_derived({"pvPower": 0, "pv1Power": 0, "feedinPower": 0, "loadsPower": "n/a"})
+
+    assert derived["selfConsumption"] is None
+    assert derived["pv1Share"] is None
+    assert "selfSufficiency" not in derived
+    assert "netGridPower" not in derived
@@ -0,0 +1,97 @@
+"""Tests for FoxESS Cloud fault and status events."""
+from unittest.mock import patch
+
+import pytest
+from pytest_homeassistant_custom_component.common import MockConfigEntry, async_capture_events
+
+from homeassistant.core import HomeAssistant
+
+from custom_components.foxess.const import (
+    CONF_API_KEY,
+    CONF_DEVICES,
+    DOMAIN,
+    EVENT_FAULT,
+    EVENT_STATUS_CHANGED,
+)
+from custom_components.foxess.events import decode_faults
+
+TEST_SN = "TEST_SN_EVENTS"
+MOCK_DEVICE_DETAIL = {"deviceSN": TEST_SN, "plantName": "Events Plant", "hasBattery": False, "status": 1}
+
+
+@pytest.fixture(autouse=True)
+def mock_platforms():
+    """Don't set up entity platforms."""
+    with patch(f"custom_components.{DOMAIN}.PLATFORMS", []):
+        yield
+
+
+@pytest.mark.parametrize(
+    ("value", "expected"),
+    [
+        (None, {}),
+        ("", {}),
+        (0, {}),
+        ("1", {"1": "Grid lost"}),
+        ("1, 15;99", {"1": "Grid lost", "15": "Temperature", "99": "Fault 99"}),
+        ("Grid Lost Fault", {"Grid Lost Fault": "Grid Lost Fault"}),
+    ],
+)
+def test_decode_faults(value, expected) -> None:
+    """Test fault codes are decoded from the table and unknown ones passed through."""
+    assert decode_faults(value) == expected
+
+
+async def test_transition_events(hass: HomeAssistant) -> None:
+    """Test events and status notifications happen on transitions only."""
+    entry = MockConfigEntry(
+        domain=DOMAIN,
+        version=2,
+        data={CONF_API_KEY: "test-api-key", CONF_DEVICES: {TEST_SN: TEST_SN}},
+    )
+    entry.add_to_hass(hass)
+    faults = async_capture_events(hass, EVENT_FAULT)
+    status_changes = async_capture_events(hass, EVENT_STATUS_CHANGED)
+
+    with patch("custom_components.foxess.FoxEssApiClient", autospec=True) as mock_api_client_class:
+        mock_api = mock_api_client_class.return_value
+        mock_api.get_device_detail.return_value = MOCK_DEVICE_DETAIL
+        mock_api.get_raw_data_batch.return_value = {TEST_SN: {"runningStatus": 163, "currentFault": "", "pvPower": 1.0}}
+        mock_api.get_report.return_value = []
+        assert await hass.config_entries.async_setup(entry.entry_id)
+        await hass.async_block_till_done()
+        coordinator = hass.data[DOMAIN][entry.entry_id]["coordinator"]
+        notified = []
+        entry.async_on_unload(coordinator.async_add_listener(lambda: notified.append(True), (TEST_SN, "status")))
+
+        async def _update(raw: dict) -> None:
+            mock_api.get_raw_data_batch.return_value = {TEST_SN: raw}
+            await coordinator.async_refresh()
+            await hass.async_block_till_done()
+
+        # The first update sets the baseline; steady state fires nothing
+        assert coordinator.section_available(TEST_SN, "status")
+        await _update({"runningStatus": 163, "currentFault": "", "pvPower": 2.0})
+        assert (faults, status_changes, notified) == ([], [], [])
+
+        await _update({"runningStatus": 165, "currentFault": "1,15", "pvPower": 0.0})
+        assert [event.data for event in status_changes] == [{
+            "device_sn": TEST_SN, "plant": "Events Plant",
+            "field": "runningStatus", "from": 163, "to": 165, "description": "fault",
+        }]
+        assert [(event.data["code"], event.data["description"], event.data["active"]) for event in faults] == [
+            ("1", "Grid lost", True), ("15", "Temperature", True),
+        ]
+        assert len(notified) == 1
+
+        # An offline inverter reports nothing, which isn't a transition
+        await _update({})
+        assert len(faults) == 2 and len(notified) == 1
+
+        await _update({"runningStatus": 165, "currentFault": "15"})
+        assert faults[-1].data["code"] == "1" and faults[-1].data["active"] is False
+        assert coordinator.devices[TEST_SN].status["faults"] == {"15": "Temperature"}
+        assert len(notified) == 2
+
+        assert await hass.config_entries.async_unload(entry.entry_id)
+        await hass.async_block_till_done()
@@ -0,0 +1,131 @@
+"""Tests for the FoxESS Cloud headless fleet poller."""
+import json
+import os
+import subprocess
+import sys
+from unittest.mock import MagicMock, patch
+
+from custom_components.foxess.api import FoxEssApiException
+from custom_components.foxess.fleet import RecordWriter, load_inventory, poll_fleet
+
+
+def _write_inventory(tmp_path, inventory) -> str:
+    path = tmp_path / "inventory.json"
+    path.write_text(json.dumps(inventory))
+    return str(path)
+
+
+async def test_poll_fleet_records_and_summary(tmp_path) -> None:
+    """Test that every device is polled in one batch call per key and failures are counted."""
+    inventory = _write_inventory(tmp_path, [
+        {"api_key": "key-a", "devices": ["SN1", "SN2"]},
+        {"api_key": "key-b", "devices": ["SN3"]},
+    ])
+    keys = load_inventory(inventory, MagicMock())
+    assert [key.device_sns for key in keys] == [["SN1", "SN2"], ["SN3"]]
+    assert keys[0].budget is keys[0].client.budget # One client and budget per API key
+    assert keys[0].budget is not keys[1].budget
+
+    batches = []
+
+    async def _get_raw_data_batch(self, device_sns, extend_pv=False, variables=None):
+        self.budget.consume()
+        batches.append(device_sns)
+        if "SN3" in device_sns:
+            raise FoxEssApiException("boom")
+        return {device_sn: {"pvPower": 1.0} for device_sn in device_sns if device_sn != "SN2"}
+
+    output = tmp_path / "out.csv"
+    output.write_text("left over\n")
+    records = []
+    with patch(
+        "custom_components.foxess.api.FoxEssApiClient.get_raw_data_batch", _get_raw_data_batch
+    ), RecordWriter(str(output), "csv", ["pvPower", "SoC"]) as writer:
+
+        def _on_round(round_records):
+            writer.write(round_records)
+            records.extend(round_records)
+            # Each round is on disk as soon as it is over
+            assert len(output.read_text().splitlines()) == 1 + len(records)
+
+        stats = await poll_fleet(keys, rounds=2, interval=0, concurrency=2, on_round=_on_round)
+
+    assert sorted(batches) == [["SN1", "SN2"], ["SN1", "SN2"], ["SN3"], ["SN3"]]
+    assert len(records) == 6
+    assert [record.get("error") for record in records[:3]] == [None, "no data returned", "boom"]
+    summary = stats.summary()
+    assert summary["polls"] == 4
+    assert summary["successes"] == 2
+    assert summary["failures"] == 2
+    assert "latency_p95_s" in summary
+
+    lines = output.read_text().splitlines()
+    assert lines[0] == "sn,time,latency_s,error,pvPower,SoC" # The previous contents are replaced
+    assert lines[1].startswith("SN1,") and lines[1].endswith(",1.0,")
+    assert len(lines) == 7
+
+
+async def test_poll_fleet_batches_large_keys(tmp_path) -> None:
+    """Test that a key with more inverters than a batch takes makes one call per batch."""
+    device_sns = [f"SN{index}" for index in range(120)]
+    keys = load_inventory(_write_inventory(tmp_path, [{"api_key": "key-a", "devices": device_sns}]), MagicMock())
+    batches = []
+
+    async def _get_raw_data_batch(self, device_sns, extend_pv=False, variables=None):
+        batches.append(len(device_sns))
+        return {device_sn: {"pvPower": 1.0} for device_sn in device_sns}
+
+    records = []
+    with patch("custom_components.foxess.api.FoxEssApiClient.get_raw_data_batch", _get_raw_data_batch):
+        await poll_fleet(keys, interval=0, on_round=records.extend)
+
+    assert batches == [50, 50, 20]
+    assert [record["sn"] for record in records] == device_sns
+
+
+async def test_poll_fleet_enforces_key_budget(tmp_path) -> None:
+    """Test that batches are skipped once their key's budget is spent."""
+    inventory = _write_inventory(tmp_path, [{"api_key": "key-a", "devices": ["SN1", "SN2"], "daily_budget": 1}])
+    keys = load_inventory(inventory, MagicMock())
+
+    async def _get_raw_data_batch(self, device_sns, extend_pv=False, variables=None):
+        self.budget.consume()
+        return {device_sn: {"pvPower": 1.0} for device_sn in device_sns}
+
+    records = []
+    with patch("custom_components.foxess.api.FoxEssApiClient.get_raw_data_batch", _get_raw_data_batch):
+        stats = await poll_fleet(keys, rounds=2, interval=0, concurrency=1, on_round=records.extend)
+
+    assert stats.polls == 1
+    assert stats.budget_skips == 1
+    assert [record.get("error") for record in records] == [None, None, *["daily call budget exhausted"] * 2]
+
+
+def test_record_writer_jsonl_replaces(tmp_path) -> None:
+    """Test that JSON lines output replaces the file like the other formats, and appends round by round."""
+    output = tmp_path / "out.jsonl"
+    output.write_text('{"sn":"OLD"}\n')
+    with RecordWriter(str(output), "jsonl", ["pvPower"]) as writer:
+        writer.write([{"sn": "SN1", "data": {"pvPower": 1.0}}])
+        writer.write([{"sn": "SN1", "data": {"pvPower": 2.0}}])
+    assert [json.loads(line)["data"]["pvPower"] for line in output.read_text().splitlines()] == [1.0, 2.0]
+
+
+def test_fleet_script_without_home_assistant(tmp_path) -> None:
+    """Test that the poller runs as a script where Home Assistant can't be imported."""
+    blocker = tmp_path / "site" / "homeassistant"
+    blocker.mkdir(parents=True)
+    (blocker / "__init__.py").write_text('raise ImportError("homeassistant is not installed")\n')
+    script = os.path.join(os.path.dirname(__file__), os.pardir, "custom_components", "foxess", "fleet.py")
+    inventory = _write_inventory(tmp_path, [{"api_key": "key-a", "devices": []}])
+
+    result = subprocess.run(
+        [sys.executable, script, inventory, "--output", str(tmp_path / "out.jsonl")],
+        capture_output=True,
+        check=False,
+        env={**os.environ, "PYTHONPATH": str(tmp_path / "site")},
+        text=True,
+    )
+    assert result.returncode == 0, result.stderr
+    assert json.loads(result.stdout)["polls"] == 0
+    assert "homeassistant" not in result.stderr
@@ -0,0 +1,107 @@
+"""Tests for the FoxESS Cloud statistics-only mode."""
+from datetime import datetime, timezone
+from unittest.mock import patch
+
+import pytest
+from pytest_homeassistant_custom_component.common import MockConfigEntry
+
+from homeassistant.core import HomeAssistant
+from homeassistant.helpers import entity_registry as er
+
+from custom_components.foxess.const import CONF_API_KEY, CONF_DEVICES, CONF_STATISTICS_ONLY, COORDINATOR, DOMAIN
+from custom_components.foxess.hourly import HourlyAggregate, async_write_hour, statistic_id
+
+TEST_SN = "TEST_SN_HOURLY"
+MOCK_DEVICE_DETAIL = {"deviceSN": TEST_SN, "plantName": "Hourly Plant", "hasBattery": False}
+HOUR = datetime(2024, 6, 1, 10, 0, tzinfo=timezone.utc)
+
+
+def test_hourly_aggregate() -> None:
+    """Test samples are aggregated per hour and a finished hour is handed back once."""
+    aggregate = HourlyAggregate()
+    start = HOUR.timestamp()
+    assert aggregate.add(start + 60, {"RVolt": 230.0}) is None
+    assert aggregate.add(start + 120, {"RVolt": 240.0, "pv1Power": 1.5}) is None
+    restored = HourlyAggregate.from_dict(aggregate.as_dict()) # Through the cache, across a restart
+    assert restored.add(start + 180, {"RVolt": 250.0}) is None
+
+    hour, values = restored.add(start + 3600, {"RVolt": 235.0})
+    assert hour == start
+    assert values == {"RVolt": [720.0, 3, 230.0, 250.0], "pv1Power": [1.5, 1, 1.5, 1.5]}
+    assert restored.values == {"RVolt": [235.0, 1, 235.0, 235.0]}
+    assert statistic_id(TEST_SN, "pv1Power") == "foxess:test_sn_hourly_pv1power"
+
+
+async def test_statistics_only(hass: HomeAssistant, freezer) -> None:
+    """Test statistics-only groups get no entities, and their hours are written as statistics."""
+    freezer.move_to(HOUR.replace(minute=58))
+    entry = MockConfigEntry(
+        domain=DOMAIN,
+        version=2,
+        data={CONF_API_KEY: "test-api-key", CONF_DEVICES: {TEST_SN: TEST_SN}},
+    )
+    entry.add_to_hass(hass)
+    raw = {"pv1Power": 2.0, "pv1Volt": 300.0, "RVolt": 230.0, "invTemperation": 40.0, "SoC": 80}
+    with patch("custom_components.foxess.FoxEssApiClient", autospec=True) as mock_api_client_class, patch(
+        "custom_components.foxess.coordinator.async_write_hour", return_value=0
+    ) as mock_write:
+        mock_api = mock_api_client_class.return_value
+        mock_api.variable_info = {}
+        mock_api.get_device_detail.return_value = MOCK_DEVICE_DETAIL
+        mock_api.get_raw_data_batch.return_value = {TEST_SN: raw}
+        mock_api.get_report.return_value = []
+        mock_api.get_report_daily_generation.return_value = {}
+        assert await hass.config_entries.async_setup(entry.entry_id)
+        await hass.async_block_till_done()
+        coordinator = hass.data[DOMAIN][entry.entry_id][COORDINATOR]
+        entity_registry = er.async_get(hass)
+
+        def _entity(key: str) -> str | None:
+            """Return the entity ID of a live sensor; removed ones keep a restored registry state."""
+            entity_id = entity_registry.async_get_entity_id("sensor", DOMAIN, f"{TEST_SN}_{key}")
+            state = hass.states.get(entity_id) if entity_id else None
+            return entity_id if state is not None and not state.attributes.get("restored") else None
+
+        assert _entity("pv1Volt") and _entity("RVolt")
+
+        # Switching groups to statistics-only removes their entities, the others stay
+        hass.config_entries.async_update_entry(entry, options={CONF_STATISTICS_ONLY: ["pv_strings", "voltage"]})
+        await hass.async_block_till_done()
+        for key in ("pv1Power", "pv1Volt", "RVolt"):
+            assert _entity(key) is None, key
+        assert _entity("invTemperation") and _entity("SoC")
+
+        await coordinator.async_refresh()
+        raw.update(pv1Power=4.0, RVolt=240.0)
+        await coordinator.async_refresh()
+        await hass.async_block_till_done()
+        for key in ("pv1Power", "pv1Volt", "RVolt"):
+            assert _entity(key) is None, key # Not re-created by updates
+        mock_write.assert_not_called()
+
+        # The first update of the next hour writes the finished one
+        freezer.move_to(HOUR.replace(hour=11, minute=1))
+        await coordinator.async_refresh()
+        mock_write.assert_called_once()
+        _, device_sn, hour, values, descriptions, plant = mock_write.call_args.args
+        assert (device_sn, hour, plant) == (TEST_SN, HOUR.timestamp(), "Hourly Plant")
+        assert values == {
+            "pv1Power": [6.0, 2, 2.0, 4.0], "pv1Volt": [600.0, 2, 300.0, 300.0], "RVolt": [470.0, 2, 230.0, 240.0],
+        }
+        assert set(descriptions) == {"pv1Power", "pv1Volt", "RVolt"}
+
+        # Switching back brings the entities back with the next update
+        hass.config_entries.async_update_entry(entry, options={CONF_STATISTICS_ONLY: []})
+        await hass.async_block_till_done()
+        await coordinator.async_refresh()
+        await hass.async_block_till_done()
+        assert _entity("pv1Power") and _entity("RVolt")
+        assert not coordinator.devices[TEST_SN].statistics_only
+
+        assert await hass.config_entries.async_unload(entry.entry_id)
+        await hass.async_block_till_done()
+
+
+async def test_write_hour_without_recorder(hass: HomeAssistant) -> None:
+    """Test nothing is written when the recorder isn't loaded."""
+    assert async_write_hour(hass, TEST_SN, HOUR.timestamp(), {"RVolt": [230.0, 1, 230.0, 230.0]}, {}, "Plant") == 0
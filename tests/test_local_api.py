@@ -0,0 +1,174 @@
+"""Tests for the local FoxESS OpenAPI compatible endpoints."""
+from datetime import datetime
+import json
+import time
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import pytest
+from pytest_homeassistant_custom_component.common import MockConfigEntry
+
+from homeassistant.components.http import KEY_AUTHENTICATED
+from homeassistant.core import HomeAssistant
+from homeassistant.util import dt as dt_util
+
+from custom_components.foxess.api import request_signature
+from custom_components.foxess.const import CONF_API_KEY, CONF_DEVICES, CONF_LOCAL_API, DOMAIN
+from custom_components.foxess.local_api import (
+    ERRNO_INVALID_BODY,
+    ERRNO_INVALID_TOKEN,
+    ERRNO_MISSING_HEADERS,
+    ERRNO_UNKNOWN_DEVICE,
+    FoxEssLocalBatterySocView,
+    FoxEssLocalDeviceDetailView,
+    FoxEssLocalRealQueryBatchView,
+    FoxEssLocalRealQueryView,
+    FoxEssLocalReportView,
+)
+
+TEST_SN = "TEST_SN_LOCAL_API"
+MOCK_DEVICE_DETAIL = {"deviceSN": TEST_SN, "plantName": "Local Plant", "hasBattery": True}
+
+
+@pytest.fixture(autouse=True)
+def mock_platforms():
+    """Don't set up entity platforms."""
+    with patch(f"custom_components.{DOMAIN}.PLATFORMS", []):
+        yield
+
+
+async def _call(hass: HomeAssistant, view, method: str, body=None, query=None, headers=None) -> dict:
+    """Call a view like the HTTP stack would and return its decoded envelope.
+
+    Without headers, the request is authenticated by Home Assistant.
+    """
+    request = MagicMock()
+    request.app = {"hass": hass}
+    request.path = view.url
+    request.query = query or {}
+    request.headers = headers or {}
+    request.get = {KEY_AUTHENTICATED: headers is None}.get
+    request.json = AsyncMock(return_value=body)
+    response = await getattr(view(), method)(request)
+    assert response.status == 200 # Errors are in the envelope, like the cloud's
+    return json.loads(response.body)
+
+
+async def test_local_api(hass: HomeAssistant, freezer) -> None:
+    """Test the endpoints answer from the cached sections, only for entries that enable them."""
+    # Already the 1st of February in Home Assistant's time zone, still January 31st in UTC
+    hass.config.set_time_zone("Pacific/Auckland")
+    freezer.move_to(datetime(2024, 1, 31, 12, 30))
+    entry = MockConfigEntry(
+        domain=DOMAIN,
+        version=2,
+        data={CONF_API_KEY: "test-api-key", CONF_DEVICES: {TEST_SN: TEST_SN}},
+        options={CONF_LOCAL_API: True},
+    )
+    entry.add_to_hass(hass)
+    with patch("custom_components.foxess.FoxEssApiClient", autospec=True) as mock_api_client_class:
+        mock_api = mock_api_client_class.return_value
+        mock_api.variable_info = {"pvPower": {"unit": "kW", "name": "PVPower"}}
+        mock_api.get_device_detail.return_value = MOCK_DEVICE_DETAIL
+        mock_api.get_raw_data_batch.return_value = {TEST_SN: {"pvPower": 2.0, "SoC": 80}}
+        mock_api.get_battery_settings.return_value = {"minSoc": 10, "minGridSoc": 20}
+        mock_api.get_report_daily_generation.return_value = {"today": 7.5}
+        mock_api.get_report.return_value = [{"variable": "feedin", "values": [float(day) for day in range(1, 32)]}]
+        assert await hass.config_entries.async_setup(entry.entry_id)
+        await hass.async_block_till_done()
+        calls = len(mock_api.mock_calls)
+
+        response = await _call(hass, FoxEssLocalRealQueryView, "post", {"sn": TEST_SN, "variables": ["pvPower"]})
+        assert response["errno"] == 0
+        (item,) = response["result"]
+        assert item["deviceSN"] == TEST_SN and "time" in item
+        assert item["datas"] == [{"variable": "pvPower", "unit": "kW", "name": "PVPower", "value": 2.0}]
+
+        response = await _call(hass, FoxEssLocalRealQueryBatchView, "post", {"sns": [TEST_SN, "OTHER"]})
+        assert [item["deviceSN"] for item in response["result"]] == [TEST_SN]
+        assert len(response["result"][0]["datas"]) == 2 # No variables asks for all
+
+        response = await _call(hass, FoxEssLocalDeviceDetailView, "get", query={"sn": TEST_SN})
+        assert response["result"]["plantName"] == "Local Plant"
+        response = await _call(hass, FoxEssLocalBatterySocView, "get", query={"sn": TEST_SN})
+        assert response["result"] == {"minSoc": 10, "minSocOnGrid": 20} # As the cloud names it
+
+        today = dt_util.now()
+        report_query = {
+            "sn": TEST_SN, "year": today.year, "month": today.month, "dimension": "day", "variables": ["feedin", "generation"],
+        }
+        feedin, generation = (await _call(hass, FoxEssLocalReportView, "post", report_query))["result"]
+        assert feedin["values"] == [float(day) for day in range(1, len(feedin["values"]) + 1)] # The whole month report
+        assert len(feedin["values"]) == 29 # February 2024, Home Assistant's month
+        assert generation["values"][today.day - 1] == 7.5 # Today is Home Assistant's day, as the coordinator keys it
+        assert [value for value in generation["values"] if value is not None] == [7.5] # Only today has been seen
+        response = await _call(hass, FoxEssLocalReportView, "post", {**report_query, "dimension": "month"})
+        assert response["errno"] == ERRNO_INVALID_BODY
+
+        # Unknown inverters and bad bodies get the cloud's errors
+        response = await _call(hass, FoxEssLocalDeviceDetailView, "get", query={"sn": "OTHER"})
+        assert response == {"errno": ERRNO_UNKNOWN_DEVICE, "msg": "Inverter OTHER isn't served locally", "result": None}
+        response = await _call(hass, FoxEssLocalRealQueryView, "post", ["not", "an", "object"])
+        assert response["errno"] == ERRNO_INVALID_BODY
+        assert len(mock_api.mock_calls) == calls # All served from the cache
+
+        # Turning the option off stops serving the entry
+        hass.config_entries.async_update_entry(entry, options={CONF_LOCAL_API: False})
+        await hass.async_block_till_done()
+        response = await _call(hass, FoxEssLocalDeviceDetailView, "get", query={"sn": TEST_SN})
+        assert response["errno"] == ERRNO_UNKNOWN_DEVICE
+
+        assert await hass.config_entries.async_unload(entry.entry_id)
+        await hass.async_block_till_done()
+
+
+async def test_local_api_signed(hass: HomeAssistant) -> None:
+    """Test requests signed with the entry's API key like the cloud's are served without Home Assistant auth."""
+    entry = MockConfigEntry(
+        domain=DOMAIN,
+        version=2,
+        data={CONF_API_KEY: "test-api-key", CONF_DEVICES: {TEST_SN: TEST_SN}},
+        options={CONF_LOCAL_API: True},
+    )
+    entry.add_to_hass(hass)
+    with patch("custom_components.foxess.FoxEssApiClient", autospec=True) as mock_api_client_class:
+        mock_api = mock_api_client_class.return_value
+        mock_api.variable_info = {}
+        mock_api.get_device_detail.return_value = MOCK_DEVICE_DETAIL
+        mock_api.get_raw_data_batch.return_value = {TEST_SN: {"pvPower": 2.0}}
+        mock_api.get_battery_settings.return_value = {"minSoc": 10, "minGridSoc": 20}
+        mock_api.get_report_daily_generation.return_value = {}
+        mock_api.get_report.return_value = []
+        assert await hass.config_entries.async_setup(entry.entry_id)
+        await hass.async_block_till_done()
+
+        def _headers(token: str, path: str = "/op/v0/device/detail", age: float = 0) -> dict:
+            timestamp = str(round((time.time() - age) * 1000))
+            return {"token": token, "timestamp": timestamp, "signature": request_signature(path, token, timestamp)}
+
+        async def _detail(headers: dict) -> dict:
+            return await _call(hass, FoxEssLocalDeviceDetailView, "get", query={"sn": TEST_SN}, headers=headers)
+
+        response = await _detail(_headers("test-api-key"))
+        assert response["errno"] == 0 and response["result"]["plantName"] == "Local Plant"
+        batch = await _call(hass, FoxEssLocalRealQueryBatchView, "post", {"sns": [TEST_SN]}, headers=_headers(
+            "test-api-key", "/op/v1/device/real/query"
+        ))
+        assert [item["deviceSN"] for item in batch["result"]] == [TEST_SN]
+
+        # Another key, a signature for another path or an old timestamp are refused
+        for headers in (
+            _headers("other-api-key"),
+            _headers("test-api-key", "/op/v0/device/battery/soc/get"),
+            _headers("test-api-key", age=3600),
+        ):
+            assert (await _detail(headers))["errno"] == ERRNO_INVALID_TOKEN
+        # Unknown inverters look the same as known ones to requests not yet authorized
+        for headers in (_headers("test-api-key"), _headers("other-api-key")):
+            response = await _call(hass, FoxEssLocalDeviceDetailView, "get", query={"sn": "OTHER"}, headers=headers)
+            assert response == await _detail(_headers("other-api-key"))
+            batch = await _call(hass, FoxEssLocalRealQueryBatchView, "post", {"sns": ["OTHER"]}, headers=headers)
+            assert batch["errno"] == ERRNO_INVALID_TOKEN
+        assert (await _detail({"token": "test-api-key"}))["errno"] == ERRNO_MISSING_HEADERS
+
+        assert await hass.config_entries.async_unload(entry.entry_id)
+        await hass.async_block_till_done()
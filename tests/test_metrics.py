@@ -0,0 +1,97 @@
+"""Tests for the FoxESS Cloud Prometheus metrics."""
+from datetime import datetime
+from unittest.mock import MagicMock, patch
+
+import pytest
+from pytest_homeassistant_custom_component.common import MockConfigEntry
+
+from homeassistant.core import HomeAssistant
+
+from custom_components.foxess.const import DOMAIN, CONF_API_KEY, CONF_DEVICES, METRICS
+from custom_components.foxess.metrics import FoxEssMetricsView, render, render_entry
+
+TEST_SN = "TEST_SN_METRICS"
+MOCK_DEVICE_DETAIL = {"deviceSN": TEST_SN, "plantName": 'My "Roof"', "hasBattery": True}
+
+
+@pytest.fixture(autouse=True)
+def mock_platforms():
+    """Don't set up entity platforms, metrics don't need them."""
+    with patch(f"custom_components.{DOMAIN}.PLATFORMS", []):
+        yield
+
+
+def test_render() -> None:
+    """Test samples get serial and plant labels and each family's header appears once."""
+    coordinator = MagicMock()
+    coordinator.device_detail.side_effect = lambda device_sn: {"plantName": f"Plant {device_sn}"}
+    coordinator.data = {
+        "SN_A": {
+            "online": True,
+            "raw": {"pvPower": 1.5, "runningState": "normal"}, # Text values have no sample
+            "battery": {"minSoc": 10},
+            "last_update_raw": datetime(2024, 1, 1),
+        },
+        "SN_B": {"online": False, "raw": {}},
+    }
+    entry = render_entry(coordinator)
+    assert entry["foxess_realtime"] == ['foxess_realtime{serial="SN_A",plant="Plant SN_A",variable="pvPower"} 1.5']
+    assert entry["foxess_online"] == [
+        'foxess_online{serial="SN_A",plant="Plant SN_A"} 1',
+        'foxess_online{serial="SN_B",plant="Plant SN_B"} 0',
+    ]
+    assert entry["foxess_last_update_timestamp_seconds"] == [
+        'foxess_last_update_timestamp_seconds{serial="SN_A",plant="Plant SN_A"} 1704067200.0'
+    ]
+
+    text = render([entry, entry])
+    assert text.count("# TYPE foxess_realtime gauge") == 1
+    assert text.count('foxess_battery_setting{serial="SN_A",plant="Plant SN_A",variable="minSoc"} 10.0') == 2
+
+
+async def _scrape(hass: HomeAssistant) -> str:
+    """Return the view's response body."""
+    request = MagicMock()
+    request.app = {"hass": hass}
+    response = await FoxEssMetricsView().get(request)
+    assert response.headers["Content-Type"].startswith("text/plain; version=0.0.4")
+    return response.body.decode()
+
+
+async def test_metrics_view(hass: HomeAssistant) -> None:
+    """Test the view serves the latest update without calling the API."""
+    entry = MockConfigEntry(
+        domain=DOMAIN,
+        version=2,
+        data={CONF_API_KEY: "test-api-key", CONF_DEVICES: {TEST_SN: TEST_SN}},
+    )
+    entry.add_to_hass(hass)
+    with patch("custom_components.foxess.FoxEssApiClient", autospec=True) as mock_api_client_class:
+        mock_api = mock_api_client_class.return_value
+        mock_api.get_device_detail.return_value = MOCK_DEVICE_DETAIL
+        mock_api.get_raw_data_batch.return_value = {TEST_SN: {"pvPower": 2.0}}
+        mock_api.get_battery_settings.return_value = {"minSoc": 10, "minGridSoc": 20}
+        mock_api.get_report.return_value = []
+        assert await hass.config_entries.async_setup(entry.entry_id)
+        await hass.async_block_till_done()
+        coordinator = hass.data[DOMAIN][entry.entry_id]["coordinator"]
+
+        calls = mock_api.get_raw_data_batch.call_count
+        labels = f'serial="{TEST_SN}",plant="My \\"Roof\\""'
+        assert f'foxess_realtime{{{labels},variable="pvPower"}} 2.0' in await _scrape(hass)
+
+        # Rendered again by the first scrape after an update, then served from the cache
+        mock_api.get_raw_data_batch.return_value = {TEST_SN: {"pvPower": 3.0}}
+        await coordinator.async_refresh()
+        assert hass.data[DOMAIN][entry.entry_id][METRICS] is None
+        assert f'foxess_realtime{{{labels},variable="pvPower"}} 3.0' in await _scrape(hass)
+        with patch("custom_components.foxess.metrics.render_entry") as mock_render_entry:
+            await _scrape(hass)
+        mock_render_entry.assert_not_called()
+        assert mock_api.get_raw_data_batch.call_count == calls + 1
+
+        assert await hass.config_entries.async_unload(entry.entry_id)
+        await hass.async_block_till_done()
+
+    # Unloaded entries drop out of the exposition
+    assert TEST_SN not in await _scrape(hass)
@@ -0,0 +1,101 @@
+"""Tests for the FoxESS Cloud battery setting numbers."""
+from datetime import timedelta
+from unittest.mock import patch
+
+import pytest
+from pytest_homeassistant_custom_component.common import MockConfigEntry, async_fire_time_changed
+
+from homeassistant.core import HomeAssistant
+from homeassistant.exceptions import HomeAssistantError
+from homeassistant.helpers import entity_registry as er
+from homeassistant.util import dt as dt_util
+
+from custom_components.foxess.api import FoxEssApiException
+from custom_components.foxess.const import DOMAIN, CONF_API_KEY, CONF_DEVICES, COORDINATOR
+
+TEST_SN = "TEST_SN_NUMBER"
+MOCK_DEVICE_DETAIL = {"deviceSN": TEST_SN, "plantName": "Number Plant", "hasBattery": True}
+
+
+@pytest.fixture
+async def mock_api(hass: HomeAssistant):
+    """Set up an entry with a battery inverter and only the number platform."""
+    entry = MockConfigEntry(
+        domain=DOMAIN,
+        version=2,
+        data={CONF_API_KEY: "test-api-key", CONF_DEVICES: {TEST_SN: TEST_SN}},
+    )
+    entry.add_to_hass(hass)
+    with patch(
+        "custom_components.foxess.FoxEssApiClient", autospec=True
+    ) as mock_api_client_class, patch(f"custom_components.{DOMAIN}.PLATFORMS", ["number"]):
+        mock_api_instance = mock_api_client_class.return_value
+        mock_api_instance.get_device_detail.return_value = MOCK_DEVICE_DETAIL
+        mock_api_instance.get_raw_data_batch.return_value = {TEST_SN: {"SoC": 50}}
+        mock_api_instance.get_battery_settings.return_value = {"minSoc": 10, "minGridSoc": 20}
+        mock_api_instance.get_report.return_value = []
+
+        assert await hass.config_entries.async_setup(entry.entry_id)
+        await hass.async_block_till_done()
+        yield mock_api_instance
+
+        assert await hass.config_entries.async_unload(entry.entry_id)
+        await hass.async_block_till_done()
+
+
+async def _set(hass: HomeAssistant, entity_id: str, value: float) -> None:
+    await hass.services.async_call("number", "set_value", {"entity_id": entity_id, "value": value}, blocking=True)
+
+
+async def _advance(hass: HomeAssistant, freezer, seconds: float) -> None:
+    freezer.tick(timedelta(seconds=seconds))
+    async_fire_time_changed(hass, dt_util.utcnow())
+    await hass.async_block_till_done()
+
+
+async def test_battery_setting_write(hass: HomeAssistant, freezer, mock_api) -> None:
+    """Test changes show at once, are debounced into one write and read back once."""
+    entity_registry = er.async_get(hass)
+    min_soc = entity_registry.async_get_entity_id("number", DOMAIN, f"{TEST_SN}_minSoc")
+    min_grid_soc = entity_registry.async_get_entity_id("number", DOMAIN, f"{TEST_SN}_minGridSoc")
+    assert hass.states.get(min_soc).state == "10.0"
+
+    # Slider dragged: every value shows optimistically, nothing is written yet
+    for value in (12, 15, 18):
+        await _set(hass, min_soc, value)
+        await _advance(hass, freezer, 2)
+    await _set(hass, min_grid_soc, 30)
+    assert hass.states.get(min_soc).state == "18.0"
+    assert hass.states.get(min_grid_soc).state == "30.0"
+    mock_api.set_battery_settings.assert_not_called()
+
+    # One write of both limits once the changes settle
+    await _advance(hass, freezer, 5)
+    mock_api.set_battery_settings.assert_called_once_with(18, 30, TEST_SN)
+    reads = mock_api.get_battery_settings.call_count
+
+    # ...confirmed by one read a minute later, which also clears an earlier failed scheduled read
+    coordinator = next(iter(hass.data[DOMAIN].values()))[COORDINATOR]
+    coordinator.devices[TEST_SN].failed_sections.add("battery")
+    mock_api.get_battery_settings.return_value = {"minSoc": 18, "minGridSoc": 30}
+    await _advance(hass, freezer, 60)
+    assert mock_api.get_battery_settings.call_count == reads + 1
+    assert "battery" not in coordinator.devices[TEST_SN].failed_sections
+    assert hass.states.get(min_soc).state == "18.0"
+
+    # Invalid combinations are refused up front
+    with pytest.raises(HomeAssistantError):
+        await _set(hass, min_grid_soc, 15)
+
+
+async def test_battery_setting_write_failure(hass: HomeAssistant, freezer, mock_api) -> None:
+    """Test a failed write restores the confirmed value."""
+    min_soc = er.async_get(hass).async_get_entity_id("number", DOMAIN, f"{TEST_SN}_minSoc")
+    mock_api.set_battery_settings.side_effect = FoxEssApiException("boom")
+
+    await _set(hass, min_soc, 15)
+    assert hass.states.get(min_soc).state == "15.0"
+    await _advance(hass, freezer, 5)
+    assert hass.states.get(min_soc).state == "10.0"
+    await _advance(hass, freezer, 60)
+    mock_api.get_battery_settings.assert_called_once() # Nothing to read back
@@ -0,0 +1,134 @@
+"""Tests for the foxess.profile service."""
+import asyncio
+import cProfile
+from unittest.mock import patch
+
+import pytest
+from pytest_homeassistant_custom_component.common import MockConfigEntry
+
+from homeassistant.core import HomeAssistant
+from homeassistant.exceptions import HomeAssistantError
+
+from custom_components.foxess.const import DOMAIN, CONF_API_KEY, CONF_DEVICES, SERVICE_PROFILE
+
+MOCK_DEVICE_DETAIL = {"deviceSN": "TEST_SN_PROFILE", "plantName": "Profile Plant", "hasBattery": False}
+
+
+@pytest.fixture(autouse=True)
+def mock_platforms():
+    """Don't set up entity platforms."""
+    with patch(f"custom_components.{DOMAIN}.PLATFORMS", []):
+        yield
+
+
+async def test_profile_service(hass: HomeAssistant, tmp_path) -> None:
+    """Test profiling wraps the requested cycles only, then saves and restores."""
+    hass.config.config_dir = str(tmp_path)
+    entry = MockConfigEntry(
+        domain=DOMAIN,
+        version=2,
+        data={CONF_API_KEY: "test-api-key", CONF_DEVICES: {"TEST_SN_PROFILE": "TEST_SN_PROFILE"}},
+        entry_id="test-profile",
+    )
+    entry.add_to_hass(hass)
+
+    with patch(
+        "custom_components.foxess.FoxEssApiClient", autospec=True
+    ) as mock_api_client_class:
+        mock_api_instance = mock_api_client_class.return_value
+        mock_api_instance.get_device_detail.return_value = MOCK_DEVICE_DETAIL
+        mock_api_instance.get_raw_data_batch.return_value = {"TEST_SN_PROFILE": {"pvPower": 1.0}}
+        mock_api_instance.get_report.return_value = []
+
+        assert await hass.config_entries.async_setup(entry.entry_id)
+        await hass.async_block_till_done()
+        coordinator = hass.data[DOMAIN][entry.entry_id]["coordinator"]
+        assert "_async_update_data" not in vars(coordinator) # Nothing wrapped while idle
+
+        await hass.services.async_call(DOMAIN, SERVICE_PROFILE, {"cycles": 2}, blocking=True)
+        profiler = coordinator.profiler
+        assert profiler is not None
+        with pytest.raises(HomeAssistantError):
+            await hass.services.async_call(DOMAIN, SERVICE_PROFILE, {}, blocking=True)
+
+        for _ in range(2):
+            await coordinator.async_refresh()
+        await hass.async_block_till_done()
+
+    assert coordinator.profiler is None
+    assert "_async_update_data" not in vars(coordinator) # Restored after the cycles
+    assert "async_update_listeners" not in vars(coordinator)
+    assert len(profiler.timings) == 2
+    assert all(timing["update_wall"] > 0 and "write_wall" in timing for timing in profiler.timings)
+    assert sorted(path.name.rsplit("_", 1)[1] for path in tmp_path.glob("foxess_profile_*.prof")) == [
+        "update.prof", "write.prof",
+    ]
+
+
+class ExclusiveProfile(cProfile.Profile):
+    """A profiler that, like Python 3.12's, refuses to start while another one is active."""
+
+    active = None
+
+    def enable(self, *args, **kwargs):
+        if ExclusiveProfile.active is not None:
+            raise ValueError("Another profiling tool is already active")
+        ExclusiveProfile.active = self
+        super().enable(*args, **kwargs)
+
+    def disable(self):
+        super().disable()
+        ExclusiveProfile.active = None
+
+
+async def test_profile_overlapping_entries(hass: HomeAssistant, tmp_path) -> None:
+    """Test overlapping refreshes of profiled entries take turns and never fail for the profiler."""
+    hass.config.config_dir = str(tmp_path)
+    entries = []
+    for device_sn in ("SN_P1", "SN_P2"):
+        entry = MockConfigEntry(
+            domain=DOMAIN,
+            version=2,
+            data={CONF_API_KEY: f"key-{device_sn}", CONF_DEVICES: {device_sn: device_sn}},
+            entry_id=f"test-profile-{device_sn}",
+        )
+        entry.add_to_hass(hass)
+        entries.append(entry)
+
+    async def _raw(device_sns, **_):
+        await asyncio.sleep(0.01) # Keeps the update (and its profiler) open across an await
+        return {device_sn: {"pvPower": 1.0} for device_sn in device_sns}
+
+    with patch(
+        "custom_components.foxess.FoxEssApiClient", autospec=True
+    ) as mock_api_client_class, patch("custom_components.foxess.profiler.cProfile.Profile", ExclusiveProfile):
+        mock_api_instance = mock_api_client_class.return_value
+        mock_api_instance.get_device_detail.side_effect = lambda device_sn: {**MOCK_DEVICE_DETAIL, "deviceSN": device_sn}
+        mock_api_instance.get_raw_data_batch.side_effect = _raw
+        mock_api_instance.get_report.return_value = []
+
+        assert await hass.config_entries.async_setup(entries[0].entry_id) # Sets up both
+        await hass.async_block_till_done()
+        coordinators = [hass.data[DOMAIN][entry.entry_id]["coordinator"] for entry in entries]
+
+        await hass.services.async_call(DOMAIN, SERVICE_PROFILE, {"cycles": 1}, blocking=True)
+        profilers = [coordinator.profiler for coordinator in coordinators]
+        await asyncio.gather(*(coordinator.async_refresh() for coordinator in coordinators))
+        await hass.async_block_till_done()
+        assert all(coordinator.last_update_success for coordinator in coordinators)
+        assert all(profiler.timings[0]["update_wall"] > 0 for profiler in profilers)
+
+        # Another profiling tool holding the profiler only costs the profile, not the update
+        ExclusiveProfile.active = object()
+        try:
+            await hass.services.async_call(DOMAIN, SERVICE_PROFILE, {"cycles": 1}, blocking=True)
+            await coordinators[0].async_refresh()
+            await hass.async_block_till_done()
+        finally:
+            ExclusiveProfile.active = None
+        assert coordinators[0].last_update_success
+        assert coordinators[0].profiler is None
+
+        for entry in entries:
+            assert await hass.config_entries.async_unload(entry.entry_id)
+        await hass.async_block_till_done()
@@ -0,0 +1,162 @@
+"""Tests for recording and replaying FoxESS Cloud API traffic."""
+from datetime import timedelta
+from unittest.mock import MagicMock, patch
+
+import pytest
+from pytest_homeassistant_custom_component.common import MockConfigEntry
+
+from homeassistant.core import HomeAssistant
+
+from custom_components.foxess.api import FoxEssApiClient, FoxEssApiTimeoutError
+from custom_components.foxess.const import DOMAIN, CONF_API_KEY, CONF_DEVICES, SERVICE_RECORD
+from custom_components.foxess.replay import ApiRecorder, ReplayApiClient, async_replay, load_records
+
+TEST_SN = "TEST_SN_REPLAY"
+MOCK_DEVICE_DETAIL = {"deviceSN": TEST_SN, "plantName": "Replay Plant", "hasBattery": False}
+
+
+@pytest.fixture(autouse=True)
+def mock_platforms():
+    """Don't set up entity platforms."""
+    with patch(f"custom_components.{DOMAIN}.PLATFORMS", []):
+        yield
+
+
+def _raw_result(pv_power: float) -> list:
+    """Return a batch real-time query response for the test device."""
+    return [{"deviceSN": TEST_SN, "datas": [{"variable": "pvPower", "value": pv_power}]}]
+
+
+async def _record(path: str) -> None:
+    """Record a device detail and three update cycles, one of them failing."""
+    client = FoxEssApiClient(MagicMock(), "test-api-key")
+    client.recorder = ApiRecorder(path, flush_every=2)
+    responses = iter([MOCK_DEVICE_DETAIL, _raw_result(1.0), FoxEssApiTimeoutError("slow"), _raw_result(3.0)])
+
+    async def _send(*args, **kwargs):
+        response = next(responses)
+        if isinstance(response, Exception):
+            raise response
+        return response
+
+    with patch.object(client, "_send", side_effect=_send):
+        await client.get_device_detail(TEST_SN)
+        for _ in range(3):
+            try:
+                await client.get_raw_data_batch([TEST_SN])
+            except FoxEssApiTimeoutError:
+                pass
+    client.recorder.flush()
+
+
+async def test_record_and_replay(hass: HomeAssistant, tmp_path) -> None:
+    """Test a recording drives a coordinator through the same cycles offline."""
+    path = str(tmp_path / "traffic.jsonl.gz")
+    await _record(path)
+
+    records = load_records(path)
+    assert [record["path"] for record in records] == ["/op/v0/device/detail"] + ["/op/v1/device/real/query"] * 3
+    assert records[2]["error"]["type"] == "FoxEssApiTimeoutError"
+
+    client = ReplayApiClient(records, speed=0)
+    entry = MockConfigEntry(
+        domain=DOMAIN,
+        version=2,
+        data={CONF_API_KEY: "test-api-key", CONF_DEVICES: {TEST_SN: TEST_SN}},
+    )
+    entry.add_to_hass(hass)
+    with patch("custom_components.foxess.FoxEssApiClient", return_value=client):
+        assert await hass.config_entries.async_setup(entry.entry_id) # First recorded cycle
+        await hass.async_block_till_done()
+        coordinator = hass.data[DOMAIN][entry.entry_id]["coordinator"]
+        assert coordinator.data[TEST_SN]["raw"]["pvPower"] == 1.0
+
+        await coordinator.async_refresh() # Recorded timeout is replayed as one
+        assert not coordinator.last_update_success
+        await coordinator.async_refresh()
+        assert coordinator.last_update_success
+        assert coordinator.data[TEST_SN]["raw"]["pvPower"] == 3.0
+
+        # Once the recording is exhausted the last response repeats
+        assert await async_replay(coordinator, client) == 3
+        assert coordinator.data[TEST_SN]["raw"]["pvPower"] == 3.0
+
+    assert client.budget.used == 0 # Replays never touch the budget
+
+
+async def test_record_service(hass: HomeAssistant, tmp_path) -> None:
+    """Test the record service attaches a recorder and unload writes it out."""
+    hass.config.config_dir = str(tmp_path)
+    entry = MockConfigEntry(
+        domain=DOMAIN,
+        version=2,
+        data={CONF_API_KEY: "test-api-key", CONF_DEVICES: {TEST_SN: TEST_SN}},
+        entry_id="test-record",
+    )
+    entry.add_to_hass(hass)
+    client = FoxEssApiClient(MagicMock(), "test-api-key")
+    responses = {"/op/v0/device/detail": MOCK_DEVICE_DETAIL, "/op/v1/device/real/query": _raw_result(2.0)}
+
+    async def _send(method, path, params=None, data=None):
+        return responses.get(path, {})
+
+    with patch("custom_components.foxess.FoxEssApiClient", return_value=client), patch.object(client, "_send", side_effect=_send):
+        assert await hass.config_entries.async_setup(entry.entry_id)
+        await hass.async_block_till_done()
+        coordinator = hass.data[DOMAIN][entry.entry_id]["coordinator"]
+
+        await hass.services.async_call(DOMAIN, SERVICE_RECORD, {"duration": 5}, blocking=True)
+        assert client.recorder is not None
+        await coordinator.async_refresh()
+
+        assert await hass.config_entries.async_unload(entry.entry_id)
+        await hass.async_block_till_done()
+
+    assert client.recorder is None
+    (path,) = tmp_path.glob("foxess_record_test-record_*.jsonl.gz")
+    assert load_records(str(path))[-1]["result"] == _raw_result(2.0)
+
+
+async def test_replay_follows_recorded_clock(hass: HomeAssistant) -> None:
+    """Test an accelerated replay issues the recorded slow-section fetch in the recorded cycle."""
+    entry = MockConfigEntry(
+        domain=DOMAIN,
+        version=2,
+        data={CONF_API_KEY: "test-api-key", CONF_DEVICES: {TEST_SN: TEST_SN}},
+    )
+    entry.add_to_hass(hass)
+    # 17 one-minute cycles after setup; the device detail (15 minute interval) falls due in the 16th
+    records = []
+    for cycle in range(17):
+        started = 1_700_000_000 + cycle * 60
+        records.append({"ts": started + 0.5, "method": "POST", "path": "/op/v1/device/real/query",
+                        "params": None, "data": {"sns": [TEST_SN]}, "latency": 0.5, "result": _raw_result(float(cycle))})
+        if cycle == 15:
+            records.append({"ts": started + 1.0, "method": "GET", "path": "/op/v0/device/detail",
+                            "params": {"sn": TEST_SN}, "data": None, "latency": 0.5,
+                            "result": {**MOCK_DEVICE_DETAIL, "plantName": "Renamed Plant"}})
+    client = ReplayApiClient(records, speed=6000) # Ten minutes of recording per second
+
+    with patch("custom_components.foxess.FoxEssApiClient", autospec=True) as mock_api_client_class:
+        mock_api_instance = mock_api_client_class.return_value
+        mock_api_instance.variable_info = {}
+        mock_api_instance.get_device_detail.return_value = MOCK_DEVICE_DETAIL
+        mock_api_instance.get_raw_data_batch.return_value = {TEST_SN: {"pvPower": 0.0}}
+        mock_api_instance.get_report.return_value = []
+        mock_api_instance.get_report_daily_generation.return_value = {}
+        assert await hass.config_entries.async_setup(entry.entry_id)
+        await hass.async_block_till_done()
+    coordinator = hass.data[DOMAIN][entry.entry_id]["coordinator"]
+    coordinator.api_client = client
+
+    assert await async_replay(coordinator, client) == 17
+    device_data = coordinator.data[TEST_SN]
+    assert device_data["raw"]["pvPower"] == 16.0
+    assert device_data["device_detail"]["plantName"] == "Renamed Plant"
+    # Fetched in the 16th cycle, a minute of recorded time before the last one
+    assert device_data["last_update_raw"] - device_data["last_update_detail"] == timedelta(minutes=1)
+    assert not any(client._queues.values()) # Every recorded response served, in its own cycle
+    assert "_utcnow" not in vars(coordinator) # The real clock is back
+
+    assert await hass.config_entries.async_unload(entry.entry_id)
+    await hass.async_block_till_done()
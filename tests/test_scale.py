@@ -0,0 +1,115 @@
+"""Scale benchmark: startup of many mocked entries.
+
+Sets up N entries of one inverter each, as Home Assistant does at startup
+(all entries of the domain at once), and measures the time until every
+inverter's sensors have a state, peak and steady traced memory, and the
+event-loop lag seen by a probe task meanwhile. The entry counts can be set
+with FOXESS_SCALE_ENTRIES (e.g. "1,10,100"); run with -s to see the table:
+
+    FOXESS_SCALE_ENTRIES=1,10,50,100 pytest tests/test_scale.py -s
+"""
+import asyncio
+import json
+import os
+import time
+import tracemalloc
+from unittest.mock import patch
+
+import pytest
+from pytest_homeassistant_custom_component.common import MockConfigEntry, load_fixture
+
+from homeassistant.core import HomeAssistant
+from homeassistant.setup import async_setup_component
+
+from custom_components.foxess.api import REPORT_VARIABLES
+from custom_components.foxess.const import CONF_API_KEY, CONF_DEVICES, DOMAIN
+
+# Real-time values of a typical inverter, as the client returns them (variable: value)
+RAW_DATA = {item["variable"]: item["value"] for item in json.loads(load_fixture("raw_data_online.json"))["result"]["datas"]}
+DEVICE_DETAIL = json.loads(load_fixture("device_detail_success.json"))["result"]
+BATTERY_SETTINGS = json.loads(load_fixture("battery_settings_success.json"))["result"]
+BATTERY_SETTINGS["minGridSoc"] = BATTERY_SETTINGS.pop("minSocOnGrid") # As get_battery_settings() returns it
+REPORT_DATA = [{"variable": variable, "values": [1.0] * 31} for variable in REPORT_VARIABLES]
+
+SCALE_ENTRIES = [int(count) for count in os.environ.get("FOXESS_SCALE_ENTRIES", "1,10").split(",")]
+LAG_PROBE_INTERVAL = 0.005 # Seconds between event-loop lag samples
+
+
+async def _start(hass: HomeAssistant) -> dict[str, float]:
+    """Set up all entries at once and return the time to first state, memory and loop lag."""
+    lag = 0.0
+    probing = True
+
+    async def _probe_lag() -> None:
+        nonlocal lag
+        while probing:
+            started = time.perf_counter()
+            await asyncio.sleep(LAG_PROBE_INTERVAL)
+            lag = max(lag, time.perf_counter() - started - LAG_PROBE_INTERVAL)
+
+    tracemalloc.start()
+    probe = asyncio.create_task(_probe_lag())
+    started = time.perf_counter()
+    if DOMAIN in hass.config.components:
+        # Restart: the entity registry and the cached snapshots are there now
+        await asyncio.gather(*(hass.config_entries.async_setup(entry.entry_id) for entry in hass.config_entries.async_entries(DOMAIN)))
+    else:
+        assert await async_setup_component(hass, DOMAIN, {})
+    await hass.async_block_till_done()
+    first_state = time.perf_counter() - started
+    probing = False
+    await probe
+    steady, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return {
+        "first_state_s": first_state,
+        "peak_mib": peak / 2**20,
+        "steady_mib": steady / 2**20,
+        "max_loop_lag_ms": lag * 1000,
+    }
+
+
+async def _measure(hass: HomeAssistant, entries: int) -> dict[str, dict[str, float]]:
+    """Start N entries from scratch, then again as after a restart; return both measurements."""
+    for index in range(entries):
+        MockConfigEntry(
+            domain=DOMAIN,
+            version=2,
+            entry_id=f"scale-{index}",
+            data={CONF_API_KEY: f"scale-key-{index}", CONF_DEVICES: {f"SCALE_SN_{index}": f"SCALE_SN_{index}"}},
+        ).add_to_hass(hass)
+
+    with patch("custom_components.foxess.FoxEssApiClient", autospec=True) as mock_api_client_class:
+        mock_api = mock_api_client_class.return_value
+
+        async def _raw(device_sns, extend_pv=False, variables=None):
+            return {device_sn: RAW_DATA for device_sn in device_sns}
+
+        mock_api.get_raw_data_batch.side_effect = _raw
+        mock_api.get_device_detail.return_value = {**DEVICE_DETAIL, "hasBattery": True}
+        mock_api.get_battery_settings.return_value = BATTERY_SETTINGS
+        mock_api.get_report.return_value = REPORT_DATA
+        mock_api.get_report_daily_generation.return_value = {"today": 1.0}
+        mock_api.variable_info = {}
+
+        results = {}
+        for phase in ("cold", "warm"):
+            results[phase] = await _start(hass)
+            # Every inverter has its sensors
+            assert len(hass.states.async_all("sensor")) >= entries * len(RAW_DATA)
+            for entry in hass.config_entries.async_entries(DOMAIN):
+                assert await hass.config_entries.async_unload(entry.entry_id)
+            await hass.async_block_till_done()
+    return results
+
+
+@pytest.mark.parametrize("entries", SCALE_ENTRIES)
+async def test_scale(hass: HomeAssistant, entries: int) -> None:
+    """Report the startup cost of N entries, from scratch and after a restart."""
+    for phase, result in (await _measure(hass, entries)).items():
+        print(
+            "\n{entries:>4} entries, {phase}: first state {first_state_s:.3f}s ({per_entry_ms:.1f} ms/entry), "
+            "peak {peak_mib:.1f} MiB, steady {steady_mib:.1f} MiB, max loop lag {max_loop_lag_ms:.1f} ms".format(
+                entries=entries, phase=phase, per_entry_ms=result["first_state_s"] * 1000 / entries, **result
+            )
+        )
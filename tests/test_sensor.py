@@ -1,5 +1,6 @@
 """Tests for the FoxESS Cloud sensor platform."""
 import json
+from datetime import timedelta
 from pathlib import Path
 from unittest.mock import patch, AsyncMock
 
@@ -9,6 +10,8 @@ from pytest_homeassistant_custom_component.common import MockConfigEntry, load_f
 from homeassistant.core import HomeAssistant
 from homeassistant.const import STATE_UNAVAILABLE, STATE_UNKNOWN
 from homeassistant.config_entries import ConfigEntryState
+from homeassistant.helpers import entity_registry as er
+from homeassistant.util import dt as dt_util
 
 # Import constants and the domain
 from custom_components.foxess.const import DOMAIN, CONF_API_KEY, CONF_DEVICE_SN
@@ -25,6 +28,8 @@ DEVICE_DETAIL_SUCCESS = json.loads(load_fixture("device_detail_success.json"))
 RAW_DATA_ONLINE = json.loads(load_fixture("raw_data_online.json"))
 RAW_DATA_OFFLINE = json.loads(load_fixture("raw_data_offline.json"))
 BATTERY_SETTINGS = json.loads(load_fixture("battery_settings_success.json"))
+# As get_battery_settings() returns it, with the cloud's minSocOnGrid named minGridSoc
+BATTERY_SETTINGS["result"]["minGridSoc"] = BATTERY_SETTINGS["result"].pop("minSocOnGrid")
 REPORT_DATA = json.loads(load_fixture("report_data_success.json"))
 
 # Adjust fixture data SNs to match MOCK_CONFIG_DATA if necessary
@@ -37,10 +42,15 @@ RAW_DATA_OFFLINE["result"]["sn"] = MOCK_CONFIG_DATA[CONF_DEVICE_SN]
 @pytest.fixture(autouse=True)
 def mock_platforms_fixture():
     """Mock platforms loaded by the integration."""
-    with patch(f"custom_components.{DOMAIN}.PLATFORMS", return_value=["sensor"]):
+    with patch(f"custom_components.{DOMAIN}.PLATFORMS", ["sensor"]):
         yield
 
 
+def _entity_id(hass: HomeAssistant, key: str) -> str | None:
+    """Return the entity ID of a sensor of the test inverter, named after the plant."""
+    return er.async_get(hass).async_get_entity_id("sensor", DOMAIN, f"{MOCK_CONFIG_DATA[CONF_DEVICE_SN]}_{key}")
+
+
 async def setup_integration(hass: HomeAssistant, config_data=MOCK_CONFIG_DATA) -> MockConfigEntry:
     """Set up the integration with patched API client."""
     entry = MockConfigEntry(domain=DOMAIN, data=config_data, entry_id="test-sensor-entry")
@@ -52,11 +62,22 @@ async def setup_integration(hass: HomeAssistant, config_data=MOCK_CONFIG_DATA) -
     ) as mock_api_client_class:
         mock_api_instance = mock_api_client_class.return_value
 
-        # Define behavior for the initial setup calls
+        # Define behavior for the initial setup calls, with the values as the client returns them
+        mock_api_instance.variable_info = {}
         mock_api_instance.get_device_detail.return_value = DEVICE_DETAIL_SUCCESS["result"]
-        mock_api_instance.get_raw_data.return_value = RAW_DATA_ONLINE["result"] # First update is online
+        mock_api_instance.get_raw_data_batch.return_value = { # First update is online
+            config_data[CONF_DEVICE_SN]: {item["variable"]: item["value"] for item in RAW_DATA_ONLINE["result"]["datas"]}
+        }
         mock_api_instance.get_battery_settings.return_value = BATTERY_SETTINGS["result"]
-        mock_api_instance.get_report.return_value = REPORT_DATA["result"]
+        mock_api_instance.get_report_daily_generation.return_value = {
+            "today": REPORT_DATA["result"]["today"]["generation"]
+        }
+        today_index = dt_util.now().day - 1
+        mock_api_instance.get_report.return_value = [ # The month report by day, today's values from the fixture
+            {"variable": variable, "values": [0.0] * today_index + [value]}
+            for variable, value in REPORT_DATA["result"]["today"].items()
+            if variable != "generation"
+        ]
 
         # Setup the component
         assert await hass.config_entries.async_setup(entry.entry_id)
@@ -71,40 +92,40 @@ async def setup_integration(hass: HomeAssistant, config_data=MOCK_CONFIG_DATA) -
 
 async def test_sensor_creation_and_initial_state(hass: HomeAssistant) -> None:
     """Test that sensors are created and have the correct initial state."""
-    await setup_integration(hass)
+    entry = await setup_integration(hass)
     mock_api: AsyncMock = hass.data[f"{DOMAIN}_mock_api"] # Get the mock instance
 
     # --- Check Raw Data Sensors ---
     # Check a few key sensors based on RAW_DATA_ONLINE fixture
-    pv1_power_state = hass.states.get(f"sensor.foxess_{MOCK_CONFIG_DATA[CONF_DEVICE_SN]}_pv1_power")
+    pv1_power_state = hass.states.get(_entity_id(hass, "pv1Power"))
     assert pv1_power_state is not None
     assert pv1_power_state.state == "1234.5" # Value from raw_data_online.json
     assert pv1_power_state.attributes.get("unit_of_measurement") == "W"
 
-    soc_state = hass.states.get(f"sensor.foxess_{MOCK_CONFIG_DATA[CONF_DEVICE_SN]}_battery_soc")
+    soc_state = hass.states.get(_entity_id(hass, "SoC"))
     assert soc_state is not None
     assert soc_state.state == "75.5"
     assert soc_state.attributes.get("unit_of_measurement") == "%"
 
-    ambient_temp_state = hass.states.get(f"sensor.foxess_{MOCK_CONFIG_DATA[CONF_DEVICE_SN]}_ambient_temperature")
+    ambient_temp_state = hass.states.get(_entity_id(hass, "ambientTemperation"))
     assert ambient_temp_state is not None
     assert ambient_temp_state.state == "18.0"
     assert ambient_temp_state.attributes.get("unit_of_measurement") == "°C"
 
     # Check the custom status sensor
-    status_state = hass.states.get(f"sensor.foxess_{MOCK_CONFIG_DATA[CONF_DEVICE_SN]}_inverter_status")
+    status_state = hass.states.get(_entity_id(hass, "inverter_status"))
     assert status_state is not None
-    assert status_state.state == "Normal" # Mapped from "1" in raw_data_online.json
+    assert status_state.state == "Online" # Mapped from "1" in raw_data_online.json
 
     # --- Check Battery Setting Sensors ---
     # These rely on DEVICE_DETAIL_SUCCESS indicating hasBattery=true
-    min_soc_grid_state = hass.states.get(f"sensor.foxess_{MOCK_CONFIG_DATA[CONF_DEVICE_SN]}_min_soc_on_grid")
+    min_soc_grid_state = hass.states.get(_entity_id(hass, "minGridSoc"))
     assert min_soc_grid_state is not None
-    assert min_soc_grid_state.state == "20" # Value from battery_settings_success.json
+    assert min_soc_grid_state.state == "20.0" # Value from battery_settings_success.json
 
     # --- Check Report Sensors ---
     # These rely on data from REPORT_DATA fixture
-    gen_today_state = hass.states.get(f"sensor.foxess_{MOCK_CONFIG_DATA[CONF_DEVICE_SN]}_energy_generated_today")
+    gen_today_state = hass.states.get(_entity_id(hass, "generation"))
     assert gen_today_state is not None
     assert gen_today_state.state == "15.5" # Value from report_data_success.json
     assert gen_today_state.attributes.get("unit_of_measurement") == "kWh"
@@ -117,6 +138,9 @@ async def test_sensor_creation_and_initial_state(hass: HomeAssistant) -> None:
     assert min_soc_grid_state.state != STATE_UNAVAILABLE
     assert gen_today_state.state != STATE_UNAVAILABLE
 
+    assert await hass.config_entries.async_unload(entry.entry_id)
+    await hass.async_block_till_done()
+
 
 # Add more tests here for:
 # - Coordinator updates with different data (e.g., offline raw data)
@@ -125,4 +149,57 @@ async def test_sensor_creation_and_initial_state(hass: HomeAssistant) -> None:
 #   - Assert sensor states become unavailable or show offline status
 # - Handling missing keys in API responses
 # - Sensors becoming available/unavailable based on battery presence changing
-# - Attribute updates on the status sensor
\ No newline at end of file
+# - Attribute updates on the status sensor
+
+async def test_sensors_follow_data(hass: HomeAssistant, freezer) -> None:
+    """Test sensors are added once values arrive and optional ones expire when empty."""
+    entry = MockConfigEntry(domain=DOMAIN, data=MOCK_CONFIG_DATA, entry_id="test-sensor-dynamic")
+    entry.add_to_hass(hass)
+    device_sn = MOCK_CONFIG_DATA[CONF_DEVICE_SN]
+    entity_registry = er.async_get(hass)
+
+    def _entity_id(key: str) -> str | None:
+        return entity_registry.async_get_entity_id("sensor", DOMAIN, f"{device_sn}_{key}")
+
+    with patch(
+        "custom_components.foxess.FoxEssApiClient", autospec=True
+    ) as mock_api_client_class, patch(f"custom_components.{DOMAIN}.PLATFORMS", ["sensor"]):
+        mock_api_instance = mock_api_client_class.return_value
+        mock_api_instance.variable_info = {"fooPower": {"unit": "kW", "name": "Foo Power"}}
+        mock_api_instance.get_device_detail.return_value = DEVICE_DETAIL_SUCCESS["result"]
+        mock_api_instance.get_raw_data_batch.return_value = {} # Asleep at startup
+        mock_api_instance.get_battery_settings.return_value = BATTERY_SETTINGS["result"]
+        mock_api_instance.get_report.return_value = []
+
+        assert await hass.config_entries.async_setup(entry.entry_id)
+        await hass.async_block_till_done()
+    coordinator = hass.data[DOMAIN][entry.entry_id]["coordinator"]
+    assert _entity_id("pv1Power") is None
+    assert _entity_id("inverter_status") is not None # Always there
+
+    # Inverter wakes up: described, extended and unknown variables get sensors
+    mock_api_instance.get_raw_data_batch.return_value = {
+        device_sn: {"pv1Power": 1.5, "pv5Power": 0.2, "pv6Power": None, "fooPower": 0.7}
+    }
+    await coordinator.async_refresh()
+    await hass.async_block_till_done()
+    assert hass.states.get(_entity_id("pv1Power")).state == "1.5"
+    assert _entity_id("pv6Power") is None # No value yet
+    foo_state = hass.states.get(_entity_id("fooPower"))
+    assert foo_state.state == "0.7"
+    assert foo_state.attributes["unit_of_measurement"] == "kW"
+    assert foo_state.attributes["device_class"] == "power"
+
+    # PV5 stays empty for a day of online updates and is removed; PV1 is not optional
+    mock_api_instance.get_raw_data_batch.return_value = {device_sn: {"pv1Power": 0.0, "fooPower": 0.1}}
+    for _ in range(2):
+        await coordinator.async_refresh()
+        freezer.tick(timedelta(hours=13))
+    await coordinator.async_refresh()
+    await hass.async_block_till_done()
+    assert _entity_id("pv5Power") is None
+    assert _entity_id("fooPower") is not None
+    assert hass.states.get(_entity_id("pv1Power")).state == "0.0"
+
+    assert await hass.config_entries.async_unload(entry.entry_id)
+    await hass.async_block_till_done()
@@ -0,0 +1,205 @@
+"""Time-accelerated simulation of whole days of FoxESS Cloud updates.
+
+A fake cloud behind a mocked FoxEssApiClient counts calls per endpoint and
+UTC day against the entry's real CallBudget, while HA's test clock is moved
+one minute at a time. A simulated day takes seconds, so scheduling changes
+can be checked against call counts, the budget, midnight and update gaps.
+"""
+import calendar
+import logging
+from collections import Counter
+from datetime import datetime, timedelta
+from statistics import quantiles
+from unittest.mock import create_autospec, patch
+
+import pytest
+from pytest_homeassistant_custom_component.common import MockConfigEntry, async_fire_time_changed
+
+from homeassistant.core import HomeAssistant
+from homeassistant.util import dt as dt_util
+
+from custom_components.foxess.api import DAILY_CALL_BUDGET, REPORT_VARIABLES, FoxEssApiClient
+from custom_components.foxess.const import DOMAIN, CONF_API_KEY, CONF_DEVICES
+
+# Starts half an hour before midnight on the last but one day of a month, so a
+# simulated day covers one whole UTC budget day, a midnight and a month change
+SIMULATION_START = datetime(2024, 1, 30, 23, 30)
+SIMULATION_MINUTES = 25 * 60
+
+
+class SimulatedCloud:
+    """Fake cloud for one API key, answering the client methods the coordinator uses."""
+
+    def __init__(self, device_sns: list[str], has_battery: bool, budget) -> None:
+        """Initialize the fake cloud."""
+        self.device_sns = device_sns
+        self.has_battery = has_battery
+        self.budget = budget
+        self.calls: Counter[tuple[str, str]] = Counter() # (endpoint, UTC date) -> calls
+        self.raw_times: list[datetime] = []
+        self.client = create_autospec(FoxEssApiClient, instance=True)
+        self.client.get_raw_data_batch.side_effect = self._raw
+        self.client.get_device_detail.side_effect = self._detail
+        self.client.get_battery_settings.side_effect = self._battery
+        self.client.get_report.side_effect = self._report
+        self.client.get_report_daily_generation.side_effect = self._generation
+
+    def _count(self, endpoint: str) -> None:
+        self.budget.consume()
+        self.calls[(endpoint, dt_util.utcnow().date().isoformat())] += 1
+
+    def calls_on(self, day: str, endpoint: str | None = None) -> int:
+        """Return the calls made on a UTC day, to one or all endpoints."""
+        return sum(count for (name, date), count in self.calls.items() if date == day and endpoint in (None, name))
+
+    async def _raw(self, device_sns, extend_pv=False, variables=None):
+        self._count("raw")
+        self.raw_times.append(dt_util.utcnow())
+        return {device_sn: {"pvPower": 1.0, "loadsPower": 0.5} for device_sn in device_sns}
+
+    async def _detail(self, device_sn=None):
+        self._count("detail")
+        return {"deviceSN": device_sn, "plantName": f"Plant {device_sn}", "hasBattery": self.has_battery}
+
+    async def _battery(self, device_sn=None):
+        self._count("battery")
+        return {"minSoc": 10, "minGridSoc": 20}
+
+    async def _report(self, device_sn=None, variables=REPORT_VARIABLES, day=None):
+        # Like the cloud: one value per day of the month asked for, here the day number
+        self._count("report")
+        day = day or dt_util.now().date()
+        days = calendar.monthrange(day.year, day.month)[1]
+        return [{"variable": variable, "values": [float(day) for day in range(1, days + 1)]} for variable in variables]
+
+    async def _generation(self, device_sn=None):
+        self._count("generation")
+        day = dt_util.now().day # The plant's day, in Home Assistant's time zone
+        return {"today": float(day), "month": float(day * (day + 1) / 2), "cumulative": 1000.0}
+
+
+@pytest.fixture(autouse=True)
+def mock_platforms():
+    """Don't set up entity platforms, only the coordinators are simulated."""
+    with patch(f"custom_components.{DOMAIN}.PLATFORMS", []):
+        yield
+
+
+def _listen(hass: HomeAssistant, entry: MockConfigEntry):
+    """Subscribe to the entry's coordinator in place of the entities, which keeps its timer running."""
+    coordinator = hass.data[DOMAIN][entry.entry_id]["coordinator"]
+    entry.async_on_unload(coordinator.async_add_listener(lambda: None))
+    return coordinator
+
+
+async def _simulate(hass: HomeAssistant, freezer, entries: dict[str, tuple[list[str], bool]]) -> dict[str, SimulatedCloud]:
+    """Set up one entry per API key and run the simulated minutes."""
+    clouds: dict[str, SimulatedCloud] = {}
+
+    def _client(session, api_key, device_sn=None, budget=None):
+        clouds[api_key] = SimulatedCloud(*entries[api_key], budget)
+        return clouds[api_key].client
+
+    freezer.move_to(SIMULATION_START)
+    with patch("custom_components.foxess.FoxEssApiClient", side_effect=_client):
+        for api_key, (device_sns, _) in entries.items():
+            entry = MockConfigEntry(
+                domain=DOMAIN,
+                version=2,
+                data={CONF_API_KEY: api_key, CONF_DEVICES: {device_sn: device_sn for device_sn in device_sns}},
+            )
+            entry.add_to_hass(hass)
+            assert await hass.config_entries.async_setup(entry.entry_id)
+            _listen(hass, entry)
+        await hass.async_block_till_done()
+
+        for _ in range(SIMULATION_MINUTES):
+            freezer.tick(timedelta(minutes=1))
+            # Coordinator timers carry a sub-second offset; fire them without moving the clock further
+            async_fire_time_changed(hass, dt_util.utcnow() + timedelta(seconds=1))
+            await hass.async_block_till_done()
+    return clouds
+
+
+def _gaps(times: list[datetime]) -> list[float]:
+    """Return the seconds between consecutive real-time queries."""
+    return [(later - earlier).total_seconds() for earlier, later in zip(times, times[1:])]
+
+
+async def test_simulated_day(hass: HomeAssistant, freezer, caplog) -> None:
+    """Test a day of updates for a single inverter and a two-inverter hub."""
+    caplog.set_level(logging.INFO, logger="custom_components.foxess.coordinator")
+    clouds = await _simulate(hass, freezer, {
+        "single-key": (["SN_SINGLE"], True),
+        "hub-key": (["SN_HUB_A", "SN_HUB_B"], False),
+    })
+    full_day = "2024-01-31"
+
+    # Hub: one batched real-time query per minute, slow sections on their intervals
+    hub = clouds["hub-key"]
+    assert hub.calls_on(full_day, "raw") == 1440
+    assert hub.calls_on(full_day, "detail") == 2 * 96 # Every 15 minutes
+    assert hub.calls_on(full_day, "report") == 2 * 24 # Hourly, realigned to midnight
+    assert hub.calls_on(full_day, "generation") == 2 * 24 # Along with the report
+    assert hub.calls_on(full_day, "battery") == 0 # No battery fitted
+    assert hub.calls_on(full_day) <= 2 * DAILY_CALL_BUDGET
+    assert set(_gaps(hub.raw_times)) == {60.0}
+
+    # Single inverter: an update every minute plus slow sections doesn't fit 1440
+    # calls, so updates are thinned out evenly instead of stopping in the evening
+    single = clouds["single-key"]
+    assert 95 <= single.calls_on(full_day, "detail") <= 96 # Skipped updates can push one into the next day
+    assert single.calls_on(full_day, "battery") == 24
+    assert single.calls_on(full_day, "report") == 24
+    assert single.calls_on(full_day, "generation") == 24
+    assert DAILY_CALL_BUDGET - 20 <= single.calls_on(full_day) <= DAILY_CALL_BUDGET
+    evening = [time for time in single.raw_times if time.date().isoformat() == full_day and time.hour == 23]
+    assert len(evening) >= 45 # Still updating before the budget resets
+    gaps = _gaps(single.raw_times)
+    assert max(gaps) <= 120
+    assert quantiles(gaps, n=10)[4] == 60.0 # Median update gap is the scan interval
+
+    # Thinning out is logged at info level once per UTC day (the simulation covers two)
+    paced = [record for record in caplog.records if record.getMessage().startswith("Thinning out updates")]
+    assert 1 <= len(paced) <= 2
+    assert all(record.levelno == logging.INFO for record in paced)
+
+
+async def test_report_rolls_over_at_midnight(hass: HomeAssistant, freezer) -> None:
+    """Test today's report values switch to the new day at local midnight, not with the next hourly fetch.
+
+    Home Assistant's time zone is far from the host's, and local midnight (which
+    is also a month end) falls in the middle of a UTC day.
+    """
+    hass.config.set_time_zone("Pacific/Auckland")
+    freezer.move_to(datetime(2024, 1, 31, 10, 30)) # 23:30 in Auckland
+    assert dt_util.now().utcoffset() != datetime.now().astimezone().utcoffset() # Not the host's time zone
+    clouds: dict[str, SimulatedCloud] = {}
+
+    def _client(session, api_key, device_sn=None, budget=None):
+        clouds[api_key] = SimulatedCloud(["SN_MIDNIGHT"], False, budget)
+        return clouds[api_key].client
+
+    entry = MockConfigEntry(
+        domain=DOMAIN,
+        version=2,
+        data={CONF_API_KEY: "midnight-key", CONF_DEVICES: {"SN_MIDNIGHT": "SN_MIDNIGHT"}},
+    )
+    entry.add_to_hass(hass)
+    with patch("custom_components.foxess.FoxEssApiClient", side_effect=_client):
+        assert await hass.config_entries.async_setup(entry.entry_id)
+        coordinator = _listen(hass, entry)
+        await hass.async_block_till_done()
+        reports = {}
+        for _ in range(3 * 60):
+            freezer.tick(timedelta(minutes=1))
+            async_fire_time_changed(hass, dt_util.utcnow() + timedelta(seconds=1))
+            await hass.async_block_till_done()
+            device_data = coordinator.data["SN_MIDNIGHT"]
+            if device_data["last_update_raw"] == datetime.utcnow(): # Not skipped to save budget
+                reports[dt_util.now()] = (device_data["report"]["generation"], device_data["report"]["loads"])
+
+    assert len(reports) > 150
+    assert {now.day for now in reports} == {31, 1}
+    for now, values in reports.items():
+        assert values == (now.day, now.day), now # Day number, per the fake cloud
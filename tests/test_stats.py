@@ -0,0 +1,65 @@
+"""Tests for the FoxESS Cloud rolling statistics ring buffer."""
+from datetime import date
+import random
+
+import pytest
+
+from custom_components.foxess.stats import RollingWindow
+
+DAY = date(2024, 1, 1)
+
+
+def test_rolling_window_matches_brute_force() -> None:
+    """Test incremental min/max/mean against a recomputation over the window."""
+    rng = random.Random(42)
+    window = RollingWindow(600, capacity=4) # Ten minutes of samples, grown from a small buffer
+    samples = []
+    for i in range(100):
+        value = rng.uniform(-50, 50)
+        samples.append(value)
+        window.append(1_700_000_000 + i * 60, value, DAY)
+        recent = samples[-10:]
+        assert len(window) == len(recent)
+        assert window.minimum == min(recent)
+        assert window.maximum == max(recent)
+        assert window.mean == pytest.approx(sum(recent) / len(recent))
+
+
+def test_rolling_window_spans_time() -> None:
+    """Test samples are evicted by age, so the window covers the same span at any cadence."""
+    rng = random.Random(7)
+    window = RollingWindow(3600)
+    samples = []
+    timestamp = 1_700_000_000.0
+    for _ in range(300):
+        timestamp += rng.choice((10, 60, 300, 900)) # Manual refreshes, paced skips and slow tiers
+        value = rng.uniform(0, 10)
+        samples.append((timestamp, value))
+        window.append(timestamp, value, DAY)
+        recent = [value for time, value in samples if time > timestamp - 3600]
+        assert len(window) == len(recent)
+        assert window.minimum == min(recent)
+        assert window.maximum == max(recent)
+        assert window.mean == pytest.approx(sum(recent) / len(recent))
+
+
+def test_rolling_window_rate_of_change() -> None:
+    """Test rate of change is reported per hour over the window."""
+    window = RollingWindow(300)
+    assert window.rate_of_change is None
+    for i in range(8):
+        window.append(i * 60.0, i * 2.0, DAY) # +2 per minute
+    assert window.rate_of_change == pytest.approx(120.0)
+    attributes = window.as_attributes()
+    assert attributes["rolling_min"] == 6.0
+    assert attributes["rolling_max"] == 14.0
+
+
+def test_rolling_window_day_reset() -> None:
+    """Test today's min/max reset when the caller's day changes."""
+    window = RollingWindow(3600)
+    window.append(0.0, 5.0, DAY)
+    window.append(60.0, 1.0, DAY)
+    window.append(120.0, 3.0, date(2024, 1, 2))
+    assert (window.day_min, window.day_max) == (3.0, 3.0)
+    assert window.minimum == 1.0 # The rolling window spans midnight
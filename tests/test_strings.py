@@ -0,0 +1,117 @@
+"""Tests for the FoxESS Cloud PV string analysis."""
+from datetime import datetime, timedelta, timezone
+import math
+from unittest.mock import patch
+
+import pytest
+from pytest_homeassistant_custom_component.common import MockConfigEntry
+
+from homeassistant.core import HomeAssistant
+from homeassistant.helpers import entity_registry as er, issue_registry as ir
+
+from custom_components.foxess.archive import DailyArchive
+from custom_components.foxess.const import ARCHIVE_DIR, CONF_API_KEY, CONF_ARCHIVE, CONF_DEVICES, COORDINATOR, DOMAIN
+from custom_components.foxess.strings import (
+    ANALYSIS_DAYS,
+    ISSUE_DEGRADING,
+    ISSUE_IV_OUTLIER,
+    ISSUE_UNDERPERFORMING,
+    analyze,
+)
+
+TEST_SN = "TEST_SN_STRINGS"
+MOCK_DEVICE_DETAIL = {"deviceSN": TEST_SN, "plantName": "String Plant", "hasBattery": False}
+END = datetime(2024, 6, 15, 0, 0, tzinfo=timezone.utc)
+
+
+def _fill(archive: DailyArchive) -> None:
+    """Archive two weeks of 15 minute samples of five strings.
+
+    PV1 and PV4 are alike, PV2 is a smaller string facing elsewhere, PV3 loses
+    1% a day and half its current on the last day, PV5 isn't connected.
+    """
+    start = END - timedelta(days=ANALYSIS_DAYS)
+    for step in range(ANALYSIS_DAYS * 96):
+        timestamp = start + timedelta(minutes=15 * step)
+        day, hour = step // 96, timestamp.hour + timestamp.minute / 60
+        weather = 0.5 + 0.5 * (day * 7 % 5) / 4 # The same clouds over every string
+        sun = max(math.sin(math.pi * (hour - 6) / 12), 0.0) * weather if 6 <= hour <= 18 else 0.0
+        pv3 = (1 - 0.01 * day) * (0.5 if day == ANALYSIS_DAYS - 1 else 1.0)
+        raw = {}
+        for string, (scale, volt) in enumerate(((1.0, 400.0), (0.7, 300.0), (pv3, 400.0), (1.0, 400.0), (0.0, 0.0)), 1):
+            power = 4000 * scale * sun
+            raw[f"pv{string}Power"] = power
+            raw[f"pv{string}Volt"] = volt if sun else 0.0
+            raw[f"pv{string}Current"] = power / volt if volt else 0.0
+        archive.append(TEST_SN, timestamp.timestamp(), raw)
+
+
+def test_analyze(tmp_path) -> None:
+    """Test a shaded, degrading string is told apart from a merely smaller one."""
+    archive = DailyArchive(str(tmp_path))
+    _fill(archive)
+    health = analyze(archive, TEST_SN, END)
+
+    assert set(health) == {"pv1", "pv2", "pv3", "pv4"} # PV5 never had a voltage
+    for string in ("pv1", "pv2", "pv4"):
+        assert health[string]["issues"] == {}, string
+    assert health["pv2"]["normalized_yield"] < 100 # Smaller, as it always was
+
+    pv3 = health["pv3"]
+    assert set(pv3["issues"]) == {ISSUE_UNDERPERFORMING, ISSUE_IV_OUTLIER, ISSUE_DEGRADING}
+    assert pv3["normalized_yield"] < 80
+    assert pv3["current_deviation"] == pytest.approx(-50, abs=5)
+    assert abs(pv3["voltage_deviation"]) < 1
+    assert pv3["yield_trend"] < -5
+
+    # Nothing to compare with a single string, or without samples
+    assert analyze(archive, TEST_SN, END - timedelta(days=ANALYSIS_DAYS + 1)) == {}
+    assert analyze(archive, "OTHER", END) == {}
+
+
+async def test_string_sensors_and_issues(hass: HomeAssistant, tmp_path, freezer) -> None:
+    """Test the analysis publishes diagnostic sensors and repair issues, and clears them."""
+    freezer.move_to(END)
+    hass.config.config_dir = str(tmp_path)
+    _fill(DailyArchive(hass.config.path(ARCHIVE_DIR)))
+    entry = MockConfigEntry(
+        domain=DOMAIN,
+        version=2,
+        data={CONF_API_KEY: "test-api-key", CONF_DEVICES: {TEST_SN: TEST_SN}},
+        options={CONF_ARCHIVE: True},
+    )
+    entry.add_to_hass(hass)
+    with patch("custom_components.foxess.FoxEssApiClient", autospec=True) as mock_api_client_class:
+        mock_api = mock_api_client_class.return_value
+        mock_api.variable_info = {}
+        mock_api.get_device_detail.return_value = MOCK_DEVICE_DETAIL
+        mock_api.get_raw_data_batch.return_value = {TEST_SN: {"pvPower": 2.0}}
+        mock_api.get_report.return_value = []
+        mock_api.get_report_daily_generation.return_value = {}
+        assert await hass.config_entries.async_setup(entry.entry_id)
+        await hass.async_block_till_done() # The first analysis runs with setup
+        coordinator = hass.data[DOMAIN][entry.entry_id][COORDINATOR]
+
+        entity_registry = er.async_get(hass)
+        entity_id = entity_registry.async_get_entity_id("sensor", DOMAIN, f"{TEST_SN}_pv3NormalizedYield")
+        assert entity_id is not None
+        assert entity_registry.async_get(entity_id).entity_category == "diagnostic"
+        assert float(hass.states.get(entity_id).state) < 80
+        assert entity_registry.async_get_entity_id("sensor", DOMAIN, f"{TEST_SN}_pv5NormalizedYield") is None
+
+        issue_registry = ir.async_get(hass)
+        issue = issue_registry.async_get_issue(DOMAIN, f"{ISSUE_UNDERPERFORMING}_{TEST_SN}_pv3")
+        assert issue is not None
+        assert issue.translation_placeholders["plant"] == "String Plant"
+        assert issue.translation_placeholders["string"] == "PV3"
+        assert issue_registry.async_get_issue(DOMAIN, f"{ISSUE_UNDERPERFORMING}_{TEST_SN}_pv1") is None
+
+        # Later analyses replace the section; turning the archive off clears the issues
+        await coordinator.async_analyze_strings()
+        assert hass.states.get(entity_id).state != "unavailable"
+        hass.config_entries.async_update_entry(entry, options={CONF_ARCHIVE: False})
+        await hass.async_block_till_done()
+        assert not [issue for issue in issue_registry.issues.values() if issue.domain == DOMAIN]
+
+        assert await hass.config_entries.async_unload(entry.entry_id)
+        await hass.async_block_till_done()
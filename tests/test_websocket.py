@@ -0,0 +1,83 @@
+"""Tests for the FoxESS Cloud WebSocket subscription."""
+from unittest.mock import MagicMock, patch
+
+import pytest
+from pytest_homeassistant_custom_component.common import MockConfigEntry
+
+from homeassistant.core import HomeAssistant
+
+from custom_components.foxess.const import CONF_API_KEY, CONF_DEVICES, DOMAIN, WS_SUBSCRIBE
+from custom_components.foxess.websocket import websocket_subscribe
+
+TEST_SN = "TEST_SN_WEBSOCKET"
+MOCK_DEVICE_DETAIL = {"deviceSN": TEST_SN, "plantName": "WebSocket Plant", "hasBattery": False}
+
+
+@pytest.fixture(autouse=True)
+def mock_platforms():
+    """Don't set up entity platforms."""
+    with patch(f"custom_components.{DOMAIN}.PLATFORMS", []):
+        yield
+
+
+def _connection() -> MagicMock:
+    """Return a connection that keeps what is sent to it."""
+    connection = MagicMock()
+    connection.subscriptions = {}
+    return connection
+
+
+def _events(connection: MagicMock) -> list[dict]:
+    return [call.args[0]["event"] for call in connection.send_message.call_args_list]
+
+
+async def test_subscribe(hass: HomeAssistant) -> None:
+    """Test a subscriber gets the snapshot once, then only changed values."""
+    entry = MockConfigEntry(
+        domain=DOMAIN,
+        version=2,
+        data={CONF_API_KEY: "test-api-key", CONF_DEVICES: {TEST_SN: TEST_SN}},
+    )
+    entry.add_to_hass(hass)
+    with patch("custom_components.foxess.FoxEssApiClient", autospec=True) as mock_api_client_class:
+        mock_api = mock_api_client_class.return_value
+        mock_api.get_device_detail.return_value = MOCK_DEVICE_DETAIL
+        mock_api.get_raw_data_batch.return_value = {TEST_SN: {"pvPower": 2.0, "loadsPower": 0.5}}
+        mock_api.get_report.return_value = []
+        assert await hass.config_entries.async_setup(entry.entry_id)
+        await hass.async_block_till_done()
+        coordinator = hass.data[DOMAIN][entry.entry_id]["coordinator"]
+
+        connection = _connection()
+        websocket_subscribe(hass, connection, {"id": 5, "type": WS_SUBSCRIBE, "entry_id": entry.entry_id})
+        connection.send_result.assert_called_once_with(5)
+        (snapshot,) = _events(connection)
+        assert snapshot["snapshot"][TEST_SN]["raw"] == {"pvPower": 2.0, "loadsPower": 0.5}
+        assert snapshot["snapshot"][TEST_SN]["online"] is True
+
+        # Only the value that changed is pushed, and nothing when nothing did
+        mock_api.get_raw_data_batch.return_value = {TEST_SN: {"pvPower": 3.0, "loadsPower": 0.5}}
+        await coordinator.async_refresh()
+        await coordinator.async_refresh()
+        (update,) = _events(connection)[1:]
+        assert update["delta"][TEST_SN]["raw"] == {"pvPower": 3.0}
+        assert "online" not in update["delta"][TEST_SN]
+
+        # Offline: the values are gone
+        mock_api.get_raw_data_batch.return_value = {}
+        await coordinator.async_refresh()
+        delta = _events(connection)[-1]["delta"][TEST_SN]
+        assert delta["online"] is False
+        assert delta["raw"] == {"pvPower": None, "loadsPower": None}
+
+        # Unsubscribing stops listening to the coordinator
+        listeners = len(coordinator._listeners)
+        connection.subscriptions[5]()
+        assert len(coordinator._listeners) == listeners - 1
+
+        unknown = _connection()
+        websocket_subscribe(hass, unknown, {"id": 6, "type": WS_SUBSCRIBE, "entry_id": "nope"})
+        unknown.send_error.assert_called_once()
+
+        assert await hass.config_entries.async_unload(entry.entry_id)
+        await hass.async_block_till_done()